@@ -0,0 +1,101 @@
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.lexer import Source, TableLexer
+from src.lexer.tokens import BaseToken
+from src.parser import Parser
+
+
+def generate_program(lines: int):
+    out = []
+    for i in range(lines // 11):
+        out.append(f'x{i} <- {i} * 2 + (3 - 1) / 4')
+        out.append(f'IF x{i} >= 10 THEN')
+        out.append(f'OUTPUT "big {i}", STRING(x{i} MOD 7)')
+        out.append('ELSE')
+        out.append(f'y <- [1, 2.5, x{i}]')
+        out.append('ENDIF')
+        out.append(f'FUNCTION f{i}(a, b) => a ** 2 // b')
+        out.append(f'z <- f{i}(3, 4) <> 2; w <- "s" * 3')
+        out.append('FOR k <- 1 TO 2')
+        out.append('w <- w + STRING(k)')
+        out.append('NEXT k')
+    return "\n".join(out)
+
+
+def fields(obj: any):
+    if hasattr(obj, "__dict__"):
+        return list(vars(obj).values())
+    return [getattr(obj, name) for cls in type(obj).__mro__ for name in getattr(cls, "__slots__", ())]
+
+
+def walk(root: any):
+    nodes = []
+    tokens = 0
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, (list, tuple)):
+            stack.extend(obj)
+        elif isinstance(obj, BaseToken):
+            tokens += 1
+        elif type(obj).__module__.endswith(".nodes"):
+            nodes.append(obj)
+            stack.extend(fields(obj))
+    return nodes, tokens
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Report how much memory a parsed tree takes per node")
+    ap.add_argument("filename", nargs="?", help="Program to parse instead of the generated one")
+    ap.add_argument("--lines", type=int, default=50000, help="Size of the generated program")
+    args = ap.parse_args()
+
+    if args.filename:
+        source = Source.from_file(args.filename)
+    else:
+        source = Source("<generated>", generate_program(args.lines))
+
+    tokens, error = TableLexer(source).lex_buffer()
+    if error:
+        print(error.render(source))
+        return
+
+    parser = Parser()
+    parser.initialize(tokens)
+    gc.collect()
+
+    tracemalloc.start()
+    res = parser.parse()
+    tree_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    if res.error:
+        print(res.error.render(source))
+        return
+
+    nodes, token_count = walk(res.node)
+    node_count = len(nodes)
+
+    start = time.perf_counter()
+    for _ in range(10):
+        for node in nodes:
+            node.start_position
+            node.end_position
+    access_time = time.perf_counter() - start
+
+    print(f"nodes:          {node_count}")
+    print(f"tokens in tree: {token_count}")
+    print(f"tree size:      {tree_bytes / 1e6:.1f} MB")
+    print(f"bytes per node: {tree_bytes / (node_count + token_count):.1f} (tokens included)")
+    print(f"position reads: {access_time / (20 * node_count) * 1e9:.1f} ns per attribute")
+
+
+if __name__ == "__main__":
+    main()
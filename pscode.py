@@ -1,13 +1,49 @@
-from src.main import repl, exec_file
+from src.main import repl, exec_file, compile_paths
+from src.parser.stack_parser import MAX_DEPTH
+from src.interpreter.stack_interpreter import MAX_CALL_DEPTH
 
 import argparse
+import sys
+
+
+def compile_command(argv):
+    ap = argparse.ArgumentParser(prog="pscode compile", description="Lex and parse every .psc file under the given paths")
+    ap.add_argument("paths", nargs="+", help="Files or directories to compile")
+    ap.add_argument("-j", "--jobs", type=int, default=None, help="Number of worker processes, defaults to one per core")
+    ap.add_argument("-w", "--write", action="store_true", help="Write the parsed trees to __pscache__")
+    ap.add_argument("-q", "--quiet", action="store_true", help="Only report files with errors")
+    args = ap.parse_args(argv)
+    return 1 if compile_paths(args.paths, args.jobs, args.write, args.quiet) else 0
+
 
 if __name__ == "__main__":
+    if sys.argv[1:2] == ["compile"]:
+        sys.exit(compile_command(sys.argv[2:]))
+
     ap = argparse.ArgumentParser()
-    ap.add_argument("filename", nargs="?", help="File that pscode should run")
+    ap.add_argument("filename", nargs="?", help="File that pscode should run, or 'compile' to compile a directory")
+    ap.add_argument("--stream", action="store_true", help="Lex the file lazily while it is being parsed")
+    ap.add_argument("--no-cache", action="store_true", help="Always re-parse instead of using the __pscache__ directory")
+    ap.add_argument("--explicit-stack", action="store_true",
+                    help="Parse and evaluate on a heap allocated stack instead of the Python call stack")
+    ap.add_argument("--max-depth", type=int, default=MAX_DEPTH,
+                    help="Deepest nesting the parser and evaluator accept with --explicit-stack")
+    ap.add_argument("--max-call-depth", type=int, default=MAX_CALL_DEPTH,
+                    help="Deepest function recursion allowed with --explicit-stack or the vm engine")
+    ap.add_argument("--engine", choices=["tree", "raising", "closure", "vm", "python"], default="tree",
+                    help="Evaluate by walking the tree, by walking it with RETURN, CONTINUE, BREAK and errors "
+                         "raised as exceptions, by compiling it to Python closures first, "
+                         "by compiling it to bytecode for a stack based virtual machine, "
+                         "or by transpiling it to Python source")
+    ap.add_argument("--disassemble", action="store_true",
+                    help="Print the bytecode the file compiles to instead of running it")
     args, unknown_args = ap.parse_known_args()
     if args.filename:
-        exec_file(args.filename, unknown_args)
+        exec_file(
+            args.filename, unknown_args, not args.no_cache,
+            stream_tokens=args.stream, explicit_stack=args.explicit_stack,
+            max_depth=args.max_depth, max_call_depth=args.max_call_depth, engine=args.engine,
+            disassemble=args.disassemble
+        )
     else:
         repl()
-
@@ -1,4 +1,4 @@
 from .errors import (
     IllegalCharError, InvalidSyntaxError, RuntimeError, NotImplementedError,
-    ExpectedCharError, UnexpectedEOFError
+    ExpectedCharError, UnexpectedEOFError, PythonError
 )
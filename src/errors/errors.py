@@ -1,3 +1,19 @@
+# The stripped line start_position is on, with the columns of start_position and end_position in it. A
+# span running on to a later line is underlined to the end of the first, and an empty one such as that
+# of a newline still gets one mark.
+def underline_columns(source, start_position, end_position):
+    line_number = source.line(start_position)
+    text = source.line_text(line_number)
+    line = text.strip()
+    indent = len(text) - len(text.lstrip())
+    start_column = min(max(source.column(start_position) - indent, 0), len(line))
+    if end_position > start_position and source.line(end_position - 1) == line_number:
+        end_column = min(max(source.end_column(end_position) - indent, start_column), len(line))
+    else:
+        end_column = len(line)
+    return line, start_column, max(end_column, start_column + 1)
+
+
 class BasePSError:
     def __init__(self, start_position, end_position, error_type, error_message, context):
         self.start_position = start_position
@@ -6,7 +22,7 @@ class BasePSError:
         self.error_message = error_message
         self.context = context
 
-    def generate_traceback(self):
+    def generate_traceback(self, source):
         result = ""
         prev_line = ""
         count = 1
@@ -14,7 +30,7 @@ class BasePSError:
         context = self.context
 
         while context:
-            line = f'  File {pos.filename}, line {str(pos.line + 1)}, in {context.display_name}'
+            line = f'  File {source.filename}, line {str(source.line(pos) + 1)}, in {context.display_name}'
             if line == prev_line:
                 count += 1
             else:
@@ -28,19 +44,14 @@ class BasePSError:
             prev_line = line
         return "Traceback (most recent call last):\n" + result
 
-    def __repr__(self):
-        idx_start = max(self.start_position.ftxt.rfind('\n', 0, self.start_position.index), 0)
-        idx_end = self.start_position.ftxt.find('\n', idx_start + 1)
-        if idx_end < 0:
-            idx_end = len(self.start_position.ftxt)
-
-        line = self.start_position.ftxt[idx_start:idx_end]
-        return (self.generate_traceback()
+    def render(self, source):
+        line, start_column, end_column = underline_columns(source, self.start_position, self.end_position)
+        return (self.generate_traceback(source)
                 + "    "
-                + line.strip()
-                + "\n    " + "-" * self.start_position.column
-                + "~" * (self.end_position.column - self.start_position.column)
-                + "-" * (len(line) - self.end_position.column - 2)
+                + line
+                + "\n    " + "-" * start_column
+                + "~" * (end_column - start_column)
+                + "-" * (len(line) - end_column)
                 + f"\npscode > ERROR: {self.error_type}\n"
                 + f'{self.error_message}'
                 )
@@ -51,20 +62,15 @@ class IllegalCharError:
         self.position = position
         self.char = char
 
-    def __repr__(self):
-        idx_start = max(self.position.ftxt.rfind('\n', 0, self.position.index), 0)
-        idx_end = self.position.ftxt.find('\n', idx_start + 1)
-        if idx_end < 0:
-            idx_end = len(self.position.ftxt)
-
-        line = self.position.ftxt[idx_start:idx_end]
+    def render(self, source):
+        line_number = source.line(self.position)
+        line = source.line_text(line_number)
+        column = source.column(self.position)
         return (f"pscode > ERROR: Illegal Character '{self.char}'\n"
-                f'  File "{self.position.filename}", line {self.position.line + 1}'
+                f'  File "{source.filename}", line {line_number + 1}'
                 + "\n    "
-                + line[1:self.position.column + 1]
-                + line[self.position.column + 1]
-                + line[self.position.column + 2:]
-                + "\n    " + "-" * self.position.column + "^" + (len(line) - self.position.column - 1) * "-")
+                + line
+                + "\n    " + "-" * column + "^" + (len(line) - column - 1) * "-")
 
 
 class ExpectedCharError:
@@ -72,20 +78,15 @@ class ExpectedCharError:
         self.position = position
         self.details = details
 
-    def __repr__(self):
-        idx_start = max(self.position.ftxt.rfind('\n', 0, self.position.index), 0)
-        idx_end = self.position.ftxt.find('\n', idx_start + 1)
-        if idx_end < 0:
-            idx_end = len(self.position.ftxt)
-
-        line = self.position.ftxt[idx_start:idx_end]
+    def render(self, source):
+        line_number = source.line(self.position)
+        line = source.line_text(line_number)
+        column = source.column(self.position)
         return (f"pscode > ERROR: {self.details}\n"
-                f'  File "{self.position.filename}", line {self.position.line + 1}'
+                f'  File "{source.filename}", line {line_number + 1}'
                 + "\n    "
-                + line[1:self.position.column + 1]
-                + line[self.position.column + 1]
-                + line[self.position.column + 2:]
-                + "\n    " + "-" * self.position.column + "^" + (len(line) - self.position.column - 1) * "-")
+                + line
+                + "\n    " + "-" * column + "^" + (len(line) - column - 1) * "-")
 
 
 class UnexpectedEOFError:
@@ -93,16 +94,12 @@ class UnexpectedEOFError:
         self.position = position
         self.details = details
 
-    def __repr__(self):
-        idx_start = max(self.position.ftxt.rfind('\n', 0, self.position.index), 0)
-        idx_end = self.position.ftxt.find('\n', idx_start + 1)
-        if idx_end < 0:
-            idx_end = len(self.position.ftxt)
-
-        line = self.position.ftxt[idx_start:idx_end][1:]
+    def render(self, source):
+        line_number = source.line(self.position)
+        line = source.line_text(line_number)
         return (f"pscode > ERROR: Unexpected EOF while parsing string\n"
                 + self.details
-                + f'\n  File "{self.position.filename}", line {self.position.line + 1}'
+                + f'\n  File "{source.filename}", line {line_number + 1}'
                 + "\n    "
                 + line + "\n    "
                 + "-" * (len(line)) + "^")
@@ -110,27 +107,21 @@ class UnexpectedEOFError:
 
 class InvalidSyntaxError:
     def __init__(self, start_position, end_position, error_message):
-        self.start_position = start_position.copy()
-        self.end_position = end_position.copy()
+        self.start_position = start_position
+        self.end_position = end_position
         self.error_message = error_message
 
-    def __repr__(self):
-        idx_start = max(self.start_position.ftxt.rfind('\n', 0, self.start_position.index), 0)
-        idx_end = self.start_position.ftxt.find('\n', idx_start + 1)
-        if idx_end < 0:
-            idx_end = len(self.start_position.ftxt)
-
-        line = self.start_position.ftxt[idx_start:idx_end].strip()
+    def render(self, source):
+        line_number = source.line(self.start_position)
+        line, start_column, end_column = underline_columns(source, self.start_position, self.end_position)
         return (f"pscode > ERROR: Invalid Syntax\n"
                 f'{self.error_message}\n'
-                f'  File "{self.start_position.filename}", line {self.start_position.line + 1}'
+                f'  File "{source.filename}", line {line_number + 1}'
                 + "\n    "
-                + line[:self.start_position.column]
-                + line[self.start_position.column:self.end_position.column]
-                + line[self.end_position.column:]
-                + "\n    " + "-" * self.start_position.column
-                + "~" * (self.end_position.column - self.start_position.column)
-                + "-" * (len(line) - self.end_position.column))
+                + line
+                + "\n    " + "-" * start_column
+                + "~" * (end_column - start_column)
+                + "-" * (len(line) - end_column))
 
 
 class RuntimeError(BasePSError):
@@ -142,3 +133,8 @@ class NotImplementedError(BasePSError):
     def __init__(self, start_position, end_position, error_message, context):
         super().__init__(start_position, end_position, "Not Implemented", error_message, context)
 
+
+# A Python exception raised by transpiled code, placed at the pseudocode it was generated from
+class PythonError(BasePSError):
+    def __init__(self, start_position, end_position, exception, context):
+        super().__init__(start_position, end_position, exception.__class__.__name__, str(exception), context)
@@ -1 +1,3 @@
 from .executor import PSCodeExecutor
+from .ast_cache import ASTCache
+from .batch import compile_file, compile_files
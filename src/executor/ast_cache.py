@@ -0,0 +1,61 @@
+import gc
+import hashlib
+import os
+import pickle
+from .. import __version__
+from ..lexer.source import Source
+
+CACHE_DIR = "__pscache__"
+
+# Bump this whenever the node classes change shape, so caches written by an older tree are rebuilt
+CACHE_FORMAT = 4
+
+
+class ASTCache:
+    def __init__(self, version: str = __version__):
+        self.tag = f"pscode-{version}-{CACHE_FORMAT}"
+
+    def path_for(self, filename: str):
+        directory, name = os.path.split(os.path.abspath(filename))
+        return os.path.join(directory, CACHE_DIR, f"{name}.{self.tag}.pscc")
+
+    def header(self, source: Source):
+        digest = hashlib.sha256(source.text.encode("utf-8")).hexdigest()
+        return f"{self.tag}\n{digest}\n".encode("ascii")
+
+    def load(self, source: Source):
+        try:
+            with open(self.path_for(source.filename), "rb") as file:
+                header = self.header(source)
+                if file.read(len(header)) != header:
+                    return None
+
+                # The tree holds no reference cycles, so collecting while it is rebuilt is wasted work
+                gc_was_enabled = gc.isenabled()
+                gc.disable()
+                try:
+                    return pickle.load(file)
+                finally:
+                    if gc_was_enabled:
+                        gc.enable()
+
+        # A truncated or stale file can fail to unpickle with almost any exception, and is then a miss
+        except Exception:
+            return None
+
+    def store(self, source: Source, node: any):
+        path = self.path_for(source.filename)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            data = pickle.dumps(node, pickle.HIGHEST_PROTOCOL)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(temp_path, "wb") as file:
+                file.write(self.header(source))
+                file.write(data)
+            os.replace(temp_path, path)
+
+        except (OSError, pickle.PicklingError, RecursionError):
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
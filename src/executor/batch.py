@@ -0,0 +1,37 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+from ..lexer.source import Source
+from .ast_cache import ASTCache
+from .executor import PSCodeExecutor
+
+
+def compile_file(filename: str, write: bool = False):
+    try:
+        source = Source.from_file(filename)
+    except (OSError, UnicodeDecodeError) as e:
+        return filename, f"pscode > ERROR: Can't read file \"{filename}\": {e}"
+
+    executor = PSCodeExecutor()
+    executor.source = source
+    node, error = executor.compile(0)
+    if error:
+        return filename, error.render(source)
+
+    if write and node is not None:
+        ASTCache().store(source, node)
+    return filename, None
+
+
+def compile_files(filenames: List[str], jobs: int = None, write: bool = False):
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(filenames) < 2:
+        for filename in filenames:
+            yield compile_file(filename, write)
+        return
+
+    # Big chunks keep the pool busy without paying a round trip per file, while still leaving
+    # enough of them to even out directories where a few files are much larger than the rest
+    chunksize = max(1, len(filenames) // (jobs * 8))
+    with ProcessPoolExecutor(jobs) as pool:
+        yield from pool.map(compile_file, filenames, [write] * len(filenames), chunksize=chunksize)
@@ -1,38 +1,125 @@
-from ..lexer import Lexer
-from ..parser import Parser
-from ..interpreter import Interpreter
+from ..lexer import TableLexer, TokenStream
+from ..lexer.source import Source
+from .ast_cache import ASTCache
+from ..parser import Parser, StackParser
+from ..parser.stack_parser import MAX_DEPTH
+from ..interpreter import (
+    Interpreter, StackInterpreter, ClosureInterpreter, RaisingInterpreter, VirtualMachine, PythonEngine, Compiler,
+    disassemble
+)
+from ..interpreter.stack_interpreter import MAX_CALL_DEPTH
+from ..interpreter.optimizer import Optimizer
 from ..interpreter.context import Context
-from ..interpreter.symbol_table import SymbolTable
+from ..interpreter.symbol_table import SymbolTable, FrameSymbolTable
 
 from typing import List
 from ..builtins.ps_builtins import populate_builtins
 
 
 class PSCodeExecutor:
-    def __init__(self):
-        self.parser = Parser()
-        self.global_symbol_table = SymbolTable()
+    def __init__(self, stream_tokens: bool = False, ast_cache: ASTCache = None, explicit_stack: bool = False,
+                 max_depth: int = MAX_DEPTH, max_call_depth: int = MAX_CALL_DEPTH, optimize: bool = True,
+                 engine: str = "tree", disassemble: bool = False):
+        self.stream_tokens = stream_tokens
+        self.ast_cache = ast_cache
+        self.optimizer = Optimizer() if optimize else None
+        self.disassemble = disassemble
+        if explicit_stack:
+            self.parser = StackParser(max_depth)
+        else:
+            self.parser = Parser()
+
+        if engine == "closure":
+            self.interpreter = ClosureInterpreter()
+        elif engine == "raising":
+            self.interpreter = RaisingInterpreter()
+        elif engine == "vm":
+            self.interpreter = VirtualMachine(max_call_depth)
+        elif engine == "python":
+            self.interpreter = PythonEngine()
+        elif engine != "tree":
+            raise ValueError(f"Unknown engine '{engine}'")
+        elif explicit_stack:
+            self.interpreter = StackInterpreter(max_depth, max_call_depth)
+        else:
+            self.interpreter = Interpreter()
+        self.source = None
+        # The vm engine keeps the variables a program binds in slots of the global table
+        self.global_symbol_table = FrameSymbolTable({}) if engine == "vm" else SymbolTable()
         self.context = Context("<main>")
         self.context.symbol_table = self.global_symbol_table
         populate_builtins(self.context.symbol_table)
-        self.interpreter = Interpreter()
+
+    def load_source(self, filename: str, code: str):
+        if self.source is None or self.source.filename != filename:
+            self.source = Source(filename, code)
+            return 0
+
+        return self.source.extend(code)
 
     def execute(self, filename: str, code: str, args: List[str]):
-        if code.strip() == "":
+        start = self.load_source(filename, code)
+        self.run(start, args)
+
+    def execute_source(self, source: Source, args: List[str]):
+        self.source = source
+        if self.ast_cache is None:
+            self.run(0, args)
             return
 
-        lexer = Lexer(filename, code.strip())
-        tokens, error = lexer.lex_line()
+        node = self.ast_cache.load(source)
+        if node is None:
+            node = self.parse(0)
+            if node is None:
+                return
+            self.ast_cache.store(source, node)
 
+        self.interpret(node, args)
+
+    def run(self, start: int, args: List[str]):
+        node = self.parse(start)
+        if node is not None:
+            self.interpret(node, args)
+
+    def parse(self, start: int):
+        node, error = self.compile(start)
         if error:
-            print(error)
-            return
+            print(error.render(self.source))
+        return node
+
+    def compile(self, start: int):
+        start, end = self.source.content_bounds(start)
+        if start == end:
+            return None, None
+
+        lexer = TableLexer(self.source, start, end)
+
+        if self.stream_tokens:
+            tokens = TokenStream(lexer.stream())
+        else:
+            tokens, error = lexer.lex_buffer()
+            if error:
+                return None, error
 
         self.parser.initialize(tokens)
         ast = self.parser.parse()
+
+        if self.stream_tokens:
+            if ast.error:
+                tokens.drain()
+            if lexer.error:
+                return None, lexer.error
+
         if ast.error:
-            print(ast.error)
+            return None, ast.error
+        return ast.node, None
+
+    def interpret(self, node: any, args: List[str]):
+        if self.optimizer is not None:
+            node = self.optimizer.optimize(node)
+        if self.disassemble:
+            print(disassemble(Compiler().compile(node), self.source))
             return
-        result = self.interpreter.visit(ast.node, self.context)
+        result = self.interpreter.visit(node, self.context)
         if result.error:
-            print(result.error)
+            print(result.error.render(self.source))
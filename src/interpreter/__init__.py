@@ -1 +1,9 @@
 from .interpreter import Interpreter
+from .stack_interpreter import StackInterpreter
+from .closure_interpreter import ClosureInterpreter
+from .raising_interpreter import RaisingInterpreter
+from .bytecode import Compiler, disassemble
+from .vm import VirtualMachine
+from .transpiler import Transpiler
+from .python_engine import PythonEngine
+from .optimizer import Optimizer
\ No newline at end of file
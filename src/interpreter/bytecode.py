@@ -0,0 +1,516 @@
+from array import array
+from .interpreter import Interpreter, Number, String, Boolean, BINARY_OPERATIONS, KEYWORD_OPERATIONS
+from .closure_interpreter import NUMBER_ARITHMETIC, NUMBER_COMPARISONS
+from .resolver import Resolver
+from .symbol_table import FrameSymbolTable
+from ..lexer.tokens import TokenKind
+from ..parser.nodes import (
+    NumberNode, StringNode, BooleanNode, NullNode, ConstantNode, BinOpNode, UnaryOpNode, VarAccessNode,
+    VarAssignNode, IfNode, CaseNode, ListNode, ForNode, WhileNode, ListIndexNode, RepeatNode, FuncDefNode,
+    CallNode, ReturnNode, ContinueNode, BreakNode, PrintNode, InputNode
+)
+
+
+class Opcode:
+    LOAD_NAME = 0
+    LOAD_CONST = 1
+    LOAD_LITERAL = 2
+    LOAD_NULL = 3
+    PUSH_NULL = 4
+    STORE_NAME = 5
+    POP = 6
+    ARITHMETIC_OP = 7
+    COMPARE_OP = 8
+    BINARY_OP = 9
+    UNARY_OP = 10
+    BUILD_LIST = 11
+    LIST_INDEX = 12
+    JUMP = 13
+    POP_JUMP_IF_FALSE = 14
+    POP_JUMP_IF_NOT_CASE = 15
+    LOAD_CASE_SUBJECT = 16
+    MATCH_CASE = 17
+    FOR_SETUP = 18
+    FOR_ITER = 19
+    NEW_ELEMENTS = 20
+    LIST_APPEND = 21
+    END_LOOP = 22
+    MAKE_FUNCTION = 23
+    LOAD_CALLEE = 24
+    PREPARE_CALL = 25
+    CALL_NAME = 26
+    CALL = 27
+    RETURN_VALUE = 28
+    CONTINUE = 29
+    PRINT = 30
+    INPUT = 31
+    UNKNOWN_NODE = 32
+    LOAD_FAST = 33
+    STORE_FAST = 34
+    LOAD_FAST_CALLEE = 35
+    TAIL_CALL = 36
+
+
+OPCODE_NAMES = {value: name for name, value in vars(Opcode).items() if name.isupper()}
+KIND_NAMES = {value: name for name, value in vars(TokenKind).items() if name.isupper()}
+
+# Operands of ARITHMETIC_OP, COMPARE_OP and BINARY_OP, indexes into these. The first two are only
+# given operators that have a Number fast path.
+OPERATORS = (
+    TokenKind.PLUS, TokenKind.MINUS, TokenKind.MULTIPLY, TokenKind.POWER,
+    TokenKind.EQUALS, TokenKind.NOT_EQUALS, TokenKind.GREATER_THAN, TokenKind.LESS_THAN,
+    TokenKind.GREATER_THAN_OR_EQUALS, TokenKind.LESS_THAN_OR_EQUALS,
+    TokenKind.DIVIDE, TokenKind.FLOOR_DIVIDE, TokenKind.MODULO, "AND", "OR",
+)
+OPERATIONS = tuple(
+    KEYWORD_OPERATIONS[operator] if isinstance(operator, str) else BINARY_OPERATIONS[operator]
+    for operator in OPERATORS
+)
+NUMBER_OPERATIONS = tuple(
+    NUMBER_ARITHMETIC.get(operator) or NUMBER_COMPARISONS.get(operator) for operator in OPERATORS
+)
+
+# Operand of UNARY_OP
+UNARY_PLUS = 0
+UNARY_NEGATE = 1
+UNARY_NOT = 2
+
+# Instructions whose operand is an index into names, into slot_names and into consts
+NAME_OPERANDS = {Opcode.LOAD_NAME, Opcode.STORE_NAME, Opcode.LOAD_CASE_SUBJECT, Opcode.FOR_SETUP, Opcode.LOAD_CALLEE}
+SLOT_OPERANDS = {Opcode.LOAD_FAST, Opcode.STORE_FAST, Opcode.LOAD_FAST_CALLEE}
+CONST_OPERANDS = {Opcode.LOAD_CONST, Opcode.LOAD_LITERAL, Opcode.MAKE_FUNCTION, Opcode.INPUT, Opcode.UNKNOWN_NODE}
+JUMP_OPERANDS = {
+    Opcode.JUMP, Opcode.POP_JUMP_IF_FALSE, Opcode.POP_JUMP_IF_NOT_CASE, Opcode.MATCH_CASE, Opcode.FOR_ITER
+}
+
+# How many values each instruction leaves on the stack, less how many it takes. FOR_ITER also pops
+# the loop state when it jumps out, which the compiler accounts for at the jump target.
+STACK_EFFECTS = {
+    Opcode.LOAD_NAME: 1, Opcode.LOAD_CONST: 1, Opcode.LOAD_LITERAL: 1, Opcode.LOAD_NULL: 1, Opcode.PUSH_NULL: 1,
+    Opcode.STORE_NAME: 0, Opcode.POP: -1, Opcode.ARITHMETIC_OP: -1, Opcode.COMPARE_OP: -1, Opcode.BINARY_OP: -1,
+    Opcode.UNARY_OP: 0, Opcode.LIST_INDEX: -1, Opcode.JUMP: 0, Opcode.POP_JUMP_IF_FALSE: -1,
+    Opcode.POP_JUMP_IF_NOT_CASE: -1, Opcode.LOAD_CASE_SUBJECT: 1, Opcode.MATCH_CASE: -1, Opcode.FOR_SETUP: -2,
+    Opcode.FOR_ITER: 0, Opcode.NEW_ELEMENTS: 1, Opcode.LIST_APPEND: -1, Opcode.END_LOOP: 0,
+    Opcode.MAKE_FUNCTION: 1, Opcode.LOAD_CALLEE: 1, Opcode.PREPARE_CALL: 0, Opcode.RETURN_VALUE: -1,
+    Opcode.CONTINUE: 0, Opcode.INPUT: 1, Opcode.UNKNOWN_NODE: 1, Opcode.LOAD_FAST: 1, Opcode.STORE_FAST: 0,
+    Opcode.LOAD_FAST_CALLEE: 1,
+}
+
+
+def stack_effect(op: int, arg: int):
+    if op == Opcode.BUILD_LIST or op == Opcode.PRINT:
+        return 1 - arg
+    if op == Opcode.CALL or op == Opcode.CALL_NAME or op == Opcode.TAIL_CALL:
+        return -arg
+    return STACK_EFFECTS[op]
+
+
+# A compiled program or function body. Instruction i is ops[i] with operand args[i], and came from
+# the node spanning starts[i] to ends[i], which is where the errors it raises point. continue_table
+# maps each CONTINUE, BREAK and call inside a loop to the loop's continue target and the stack depth
+# to cut back to, for when that instruction continues the loop. slot_index numbers the variables kept
+# in the slots of the FrameSymbolTable the code runs with, and slot_names lists them in that order.
+class Code:
+    def __init__(self, name: str, arg_names: list = None, body_node: any = None, should_auto_return: bool = False):
+        self.name = name
+        self.arg_names = arg_names
+        self.body_node = body_node
+        self.should_auto_return = should_auto_return
+        self.ops = array("B")
+        self.args = array("q")
+        self.starts = array("q")
+        self.ends = array("q")
+        self.consts = []
+        self.names = []
+        self.slot_index = {}
+        self.slot_names = []
+        self.continue_table = {}
+
+    def __len__(self):
+        return len(self.ops)
+
+    def __repr__(self):
+        return f"<code {self.name or '<anonymous>'}>"
+
+    # The offset and line number of every instruction that starts a new line
+    def line_table(self, source: any):
+        table = []
+        for offset, start in enumerate(self.starts):
+            line = source.line(start) + 1
+            if not table or table[-1][1] != line:
+                table.append((offset, line))
+        return table
+
+
+# Compiles a tree into Code for the VirtualMachine. Every node compiles to instructions that leave
+# its value on the stack, the same value the tree walker gives it, except where keep is False; then
+# the value is never used and loops and statement lists skip building it.
+class Compiler:
+    # Nodes whose compile method takes keep, the rest are compiled and then popped
+    STATEMENT_NODES = (ListNode, IfNode, CaseNode, ForNode, WhileNode, RepeatNode)
+
+    def __init__(self):
+        self.compilers = {}
+        self.functions = {}
+        self.resolver = Resolver()
+        self.code = None
+        self.name_indexes = None
+        self.depth = 0
+        self.loops = []
+
+    # The value of a whole program is never used, so its statements are compiled without keeping theirs.
+    # Given the FrameSymbolTable the program will run with, the variables it binds get slots there.
+    def compile(self, node: any, name: str = "<main>", symbol_table: any = None):
+        code = Code(name)
+        if isinstance(symbol_table, FrameSymbolTable):
+            for var_name in self.resolver.bound_names(node):
+                symbol_table.slot(var_name)
+            code.slot_index = symbol_table.index
+            code.slot_names = list(symbol_table.index)
+
+        state = self.begin(code)
+        self.compile_node(node, False)
+        self.emit(Opcode.PUSH_NULL, 0, node)
+        self.emit(Opcode.RETURN_VALUE, 0, node)
+        return self.end(state)
+
+    def compile_function(self, node: any, name: str, arg_names: list, should_auto_return: bool):
+        code = Code(name, arg_names, node, should_auto_return)
+        code.slot_index = self.resolver.scope(node, arg_names)
+        code.slot_names = list(code.slot_index)
+        state = self.begin(code)
+        self.compile_node(node, should_auto_return)
+        if not should_auto_return:
+            self.emit(Opcode.PUSH_NULL, 0, node)
+        self.emit(Opcode.RETURN_VALUE, 0, node)
+        code = self.functions[node] = self.end(state)
+        return code
+
+    def begin(self, code: Code):
+        state = (self.code, self.name_indexes, self.depth, self.loops)
+        self.code, self.name_indexes, self.depth, self.loops = code, {}, 0, []
+        return state
+
+    def end(self, state: tuple):
+        code = self.code
+        self.code, self.name_indexes, self.depth, self.loops = state
+        return code
+
+    def emit(self, op: int, arg: int, node: any):
+        code = self.code
+        code.ops.append(op)
+        code.args.append(arg)
+        code.starts.append(node.start_position)
+        code.ends.append(node.end_position)
+        self.depth += stack_effect(op, arg)
+        return len(code.ops) - 1
+
+    def emit_continuable(self, op: int, arg: int, node: any):
+        offset = self.emit(op, arg, node)
+        if self.loops:
+            self.code.continue_table[offset] = self.loops[-1]
+        return offset
+
+    def patch(self, offset: int):
+        self.code.args[offset] = len(self.code.ops)
+
+    def name(self, name: str):
+        index = self.name_indexes.get(name)
+        if index is None:
+            index = self.name_indexes[name] = len(self.code.names)
+            self.code.names.append(name)
+        return index
+
+    def const(self, value: any):
+        self.code.consts.append(value)
+        return len(self.code.consts) - 1
+
+    def compile_node(self, node: any, keep: bool = True):
+        try:
+            compiler = self.compilers[type(node)]
+        except KeyError:
+            compiler = self.compilers[type(node)] = self.compiler(type(node))
+
+        if isinstance(node, self.STATEMENT_NODES):
+            compiler(node, keep)
+        else:
+            compiler(node)
+            if not keep:
+                self.emit(Opcode.POP, 0, node)
+
+    def compiler(self, node_class: type):
+        method_name = "compile" + Interpreter.get_method_name(node_class.__name__)[len("visit"):]
+        return getattr(self, method_name, self.compile_unknown_node)
+
+    def compile_unknown_node(self, node: any):
+        self.emit(Opcode.UNKNOWN_NODE, self.const(node), node)
+
+    def compile_constant_node(self, node: ConstantNode):
+        self.emit(Opcode.LOAD_CONST, self.const(node.value), node)
+
+    def compile_number_node(self, node: NumberNode):
+        self.emit(Opcode.LOAD_LITERAL, self.const((Number, node.tok.value)), node)
+
+    def compile_string_node(self, node: StringNode):
+        self.emit(Opcode.LOAD_LITERAL, self.const((String, node.tok.value)), node)
+
+    def compile_boolean_node(self, node: BooleanNode):
+        self.emit(Opcode.LOAD_LITERAL, self.const((Boolean, node.tok.value == "TRUE")), node)
+
+    def compile_null_node(self, node: NullNode):
+        self.emit(Opcode.LOAD_NULL, 0, node)
+
+    def compile_list_node(self, node: ListNode, keep: bool):
+        for element_node in node.element_nodes:
+            self.compile_node(element_node, keep)
+        if keep:
+            self.emit(Opcode.BUILD_LIST, len(node.element_nodes), node)
+
+    def compile_list_index_node(self, node: ListIndexNode):
+        self.compile_node(node.list_instance)
+        self.compile_node(node.index)
+        self.emit(Opcode.LIST_INDEX, 0, node)
+
+    def compile_bin_op_node(self, node: BinOpNode):
+        self.compile_node(node.left_node)
+        self.compile_node(node.right_node)
+        operator = node.op_tok.value if node.op_tok.kind == TokenKind.KEYWORD else node.op_tok.kind
+        index = OPERATORS.index(operator)
+        if operator in NUMBER_ARITHMETIC:
+            self.emit(Opcode.ARITHMETIC_OP, index, node)
+        elif operator in NUMBER_COMPARISONS:
+            self.emit(Opcode.COMPARE_OP, index, node)
+        else:
+            self.emit(Opcode.BINARY_OP, index, node)
+
+    def compile_unary_op_node(self, node: UnaryOpNode):
+        self.compile_node(node.node)
+        if node.op_tok.kind == TokenKind.MINUS:
+            self.emit(Opcode.UNARY_OP, UNARY_NEGATE, node)
+        elif node.op_tok.matches_keyword("NOT"):
+            self.emit(Opcode.UNARY_OP, UNARY_NOT, node)
+        else:
+            self.emit(Opcode.UNARY_OP, UNARY_PLUS, node)
+
+    def compile_var_access_node(self, node: VarAccessNode):
+        slot = self.code.slot_index.get(node.var_name_tok.value)
+        if slot is None:
+            self.emit(Opcode.LOAD_NAME, self.name(node.var_name_tok.value), node)
+        else:
+            self.emit(Opcode.LOAD_FAST, slot, node)
+
+    def compile_var_assign_node(self, node: VarAssignNode):
+        self.compile_node(node.value_node)
+        slot = self.code.slot_index.get(node.var_name_tok.value)
+        if slot is None:
+            self.emit(Opcode.STORE_NAME, self.name(node.var_name_tok.value), node)
+        else:
+            self.emit(Opcode.STORE_FAST, slot, node)
+
+    # The body of an IF or CASE branch, whose value is replaced by NULL when should_auto_return
+    def compile_branch(self, node: any, should_auto_return: bool, keep: bool):
+        if should_auto_return:
+            self.compile_node(node, False)
+            if keep:
+                self.emit(Opcode.PUSH_NULL, 0, node)
+        else:
+            self.compile_node(node, keep)
+
+    def compile_if_node(self, node: IfNode, keep: bool):
+        depth = self.depth
+        exits = []
+        for condition, expr, should_auto_return in node.cases:
+            self.compile_node(condition)
+            next_case = self.emit(Opcode.POP_JUMP_IF_NOT_CASE, 0, node)
+            self.compile_branch(expr, should_auto_return, keep)
+            exits.append(self.emit(Opcode.JUMP, 0, node))
+            self.patch(next_case)
+            self.depth = depth
+
+        if node.else_case:
+            expr, should_auto_return = node.else_case
+            self.compile_branch(expr, should_auto_return, keep)
+        elif keep:
+            self.emit(Opcode.PUSH_NULL, 0, node)
+
+        for offset in exits:
+            self.patch(offset)
+
+    def compile_case_node(self, node: CaseNode, keep: bool):
+        self.emit(Opcode.LOAD_CASE_SUBJECT, self.name(node.var_name_tok.value), node)
+        depth = self.depth
+        exits = []
+        for value, response, should_auto_return in node.cases:
+            self.compile_node(value)
+            next_case = self.emit(Opcode.MATCH_CASE, 0, value)
+            self.emit(Opcode.POP, 0, node)
+            self.compile_branch(response, should_auto_return, keep)
+            exits.append(self.emit(Opcode.JUMP, 0, node))
+            self.patch(next_case)
+            self.depth = depth
+
+        self.emit(Opcode.POP, 0, node)
+        if node.otherwise_case:
+            expr, should_auto_return = node.otherwise_case
+            self.compile_branch(expr, should_auto_return, keep)
+        elif keep:
+            self.emit(Opcode.PUSH_NULL, 0, node)
+
+        for offset in exits:
+            self.patch(offset)
+
+    # The body of a loop, whose value is appended to the list under the loop state when collecting
+    def compile_loop_body(self, node: any, continue_target: int, collect: bool, state_size: int):
+        self.loops.append((continue_target, self.depth))
+        self.compile_node(node, collect)
+        self.loops.pop()
+        if collect:
+            self.emit(Opcode.LIST_APPEND, state_size, node)
+
+    def end_loop(self, node: any, collect: bool, keep: bool):
+        if collect:
+            self.emit(Opcode.END_LOOP, 0, node)
+        elif keep:
+            self.emit(Opcode.PUSH_NULL, 0, node)
+
+    def compile_for_node(self, node: ForNode, keep: bool):
+        collect = keep and not node.should_auto_return
+        if collect:
+            self.emit(Opcode.NEW_ELEMENTS, 0, node)
+
+        self.compile_node(node.start_value_node)
+        self.compile_node(node.end_value_node)
+        if node.step_value_node:
+            self.compile_node(node.step_value_node)
+        else:
+            self.emit(Opcode.LOAD_CONST, self.const(Number(1.0)), node)
+        self.emit(Opcode.FOR_SETUP, self.name(node.var_name_tok.value), node)
+
+        top = self.emit(Opcode.FOR_ITER, 0, node)
+        self.compile_loop_body(node.body_node, top, collect, 2)
+        self.emit(Opcode.JUMP, top, node)
+        self.patch(top)
+        self.depth -= 1
+        self.end_loop(node, collect, keep)
+
+    def compile_while_node(self, node: WhileNode, keep: bool):
+        collect = keep and node.should_auto_return
+        if collect:
+            self.emit(Opcode.NEW_ELEMENTS, 0, node)
+
+        top = len(self.code)
+        self.compile_node(node.condition_node)
+        exit_jump = self.emit(Opcode.POP_JUMP_IF_FALSE, 0, node)
+        self.compile_loop_body(node.body_node, top, collect, 1)
+        self.emit(Opcode.JUMP, top, node)
+        self.patch(exit_jump)
+        self.end_loop(node, collect, keep)
+
+    def compile_repeat_node(self, node: RepeatNode, keep: bool):
+        collect = keep and node.should_auto_return
+        if collect:
+            self.emit(Opcode.NEW_ELEMENTS, 0, node)
+
+        top = len(self.code)
+        self.compile_loop_body(node.body_node, top, collect, 1)
+        self.compile_node(node.condition_node)
+        self.emit(Opcode.POP_JUMP_IF_FALSE, top, node)
+        self.end_loop(node, collect, keep)
+
+    def compile_func_def_node(self, node: FuncDefNode):
+        func_name = node.var_name_tok.value if node.var_name_tok else None
+        arg_names = [arg_name.value for arg_name in node.arg_name_toks]
+        code = self.compile_function(node.body_node, func_name, arg_names, node.should_auto_return)
+        self.emit(Opcode.MAKE_FUNCTION, self.const(code), node)
+
+    def compile_call_node(self, node: CallNode):
+        # A function read from a variable is called without copying it first
+        if isinstance(node.node_to_call, VarAccessNode):
+            var_name = node.node_to_call.var_name_tok.value
+            slot = self.code.slot_index.get(var_name)
+            if slot is None:
+                self.emit(Opcode.LOAD_CALLEE, self.name(var_name), node.node_to_call)
+            else:
+                self.emit(Opcode.LOAD_FAST_CALLEE, slot, node.node_to_call)
+            call = Opcode.TAIL_CALL if node.is_tail_call else Opcode.CALL_NAME
+        else:
+            self.compile_node(node.node_to_call)
+            self.emit(Opcode.PREPARE_CALL, 0, node)
+            call = Opcode.CALL
+
+        for arg_node in node.arg_nodes:
+            self.compile_node(arg_node)
+        self.emit_continuable(call, len(node.arg_nodes), node)
+
+    def compile_print_node(self, node: PrintNode):
+        for obj in node.objects_to_print:
+            self.compile_node(obj)
+        self.emit(Opcode.PRINT, len(node.objects_to_print), node)
+
+    def compile_input_node(self, node: InputNode):
+        self.emit(Opcode.INPUT, self.const(node), node)
+
+    def compile_return_node(self, node: ReturnNode):
+        if node.node_to_return:
+            self.compile_node(node.node_to_return)
+        else:
+            self.emit(Opcode.PUSH_NULL, 0, node)
+        self.emit(Opcode.RETURN_VALUE, 0, node)
+        # Keeps the stack depth the same as every other node, the jump never runs
+        self.depth += 1
+
+    def compile_continue_node(self, node: ContinueNode):
+        self.emit_continuable(Opcode.CONTINUE, 0, node)
+        self.depth += 1
+
+    # BREAK continues the loop, as it does in the tree walker
+    def compile_break_node(self, node: BreakNode):
+        self.emit_continuable(Opcode.CONTINUE, 0, node)
+        self.depth += 1
+
+
+def describe_operand(code: Code, op: int, arg: int):
+    if op in NAME_OPERANDS:
+        return code.names[arg]
+    if op in SLOT_OPERANDS:
+        return code.slot_names[arg]
+    if op in JUMP_OPERANDS:
+        return f"to {arg}"
+    if op in (Opcode.ARITHMETIC_OP, Opcode.COMPARE_OP, Opcode.BINARY_OP):
+        operator = OPERATORS[arg]
+        return operator if isinstance(operator, str) else KIND_NAMES[operator]
+    if op == Opcode.UNARY_OP:
+        return ("PLUS", "MINUS", "NOT")[arg]
+    if op == Opcode.LOAD_LITERAL:
+        value_class, value = code.consts[arg]
+        return f"{value_class.__name__}({value!r})"
+    if op in CONST_OPERANDS:
+        return repr(code.consts[arg])
+    return ""
+
+
+# Lists the instructions of code and of every function defined in it, in the style of Python's dis:
+# the line each instruction starts (when source is given), a '>>' on jump targets, the offset, the
+# instruction and its operand.
+def disassemble(code: Code, source: any = None):
+    lines = dict(code.line_table(source)) if source is not None else {}
+    targets = {arg for op, arg in zip(code.ops, code.args) if op in JUMP_OPERANDS}
+    targets.update(target for target, _ in code.continue_table.values())
+
+    result = [f"Disassembly of {code!r}:"]
+    for offset, (op, arg) in enumerate(zip(code.ops, code.args)):
+        line = str(lines.get(offset, "")).rjust(4)
+        marker = ">>" if offset in targets else "  "
+        operand = describe_operand(code, op, arg)
+        if offset in code.continue_table:
+            target, depth = code.continue_table[offset]
+            operand = f"{operand}, " if operand else ""
+            operand += f"continues at {target} with depth {depth}"
+        text = f"{line}  {marker} {offset:>5} {OPCODE_NAMES[op]:<22} {arg}"
+        result.append(f"{text} ({operand})" if operand else text)
+
+    for const in code.consts:
+        if isinstance(const, Code):
+            result.append("")
+            result.append(disassemble(const, source))
+    return "\n".join(result)
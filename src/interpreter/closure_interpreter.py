@@ -0,0 +1,648 @@
+import operator
+from .context import Context
+from .symbol_table import SymbolTable
+from .interpreter import (
+    Interpreter, RTResult, Number, String, Boolean, List, PSFunction, BINARY_OPERATIONS, KEYWORD_OPERATIONS,
+    with_context, new_value, for_counters, TailCall
+)
+from ..errors import RuntimeError, InvalidSyntaxError
+from ..lexer.tokens import TokenKind
+from ..parser.nodes import (
+    NumberNode, StringNode, BooleanNode, NullNode, ConstantNode, BinOpNode, UnaryOpNode, VarAccessNode,
+    VarAssignNode, IfNode, CaseNode, ListNode, ForNode, WhileNode, ListIndexNode, RepeatNode, FuncDefNode,
+    CallNode, ReturnNode, ContinueNode, BreakNode, PrintNode, InputNode
+)
+
+
+# Operators whose result for two Numbers the closures build directly rather than through the Number
+# methods. The result is the same object those methods and set_pos would give.
+NUMBER_ARITHMETIC = {
+    TokenKind.PLUS: operator.add,
+    TokenKind.MINUS: operator.sub,
+    TokenKind.MULTIPLY: operator.mul,
+    TokenKind.POWER: operator.pow,
+}
+
+NUMBER_COMPARISONS = {
+    TokenKind.EQUALS: operator.eq,
+    TokenKind.NOT_EQUALS: operator.ne,
+    TokenKind.GREATER_THAN: operator.gt,
+    TokenKind.LESS_THAN: operator.lt,
+    TokenKind.GREATER_THAN_OR_EQUALS: operator.ge,
+    TokenKind.LESS_THAN_OR_EQUALS: operator.le,
+}
+
+# Operators a closure applies to unboxed operands itself, by the Python types of both operands. What
+# they give is the value of what the Number, String and Boolean methods would give.
+RAW_NUMBER_OPERATIONS = {
+    **NUMBER_ARITHMETIC,
+    **NUMBER_COMPARISONS,
+    TokenKind.DIVIDE: operator.truediv,
+    TokenKind.FLOOR_DIVIDE: lambda left, right: float(left // right),
+    TokenKind.MODULO: lambda left, right: float(left % right),
+}
+
+RAW_STRING_OPERATIONS = {
+    TokenKind.PLUS: operator.add,
+    **NUMBER_COMPARISONS,
+}
+
+RAW_BOOLEAN_OPERATIONS = {
+    TokenKind.EQUALS: operator.eq,
+    TokenKind.NOT_EQUALS: operator.ne,
+    "AND": lambda left, right: right and left,
+    "OR": lambda left, right: right or left,
+}
+
+# What the right operand must pass for a number operator not to fail, which is left to the Number
+# methods to report
+NUMBER_GUARDS = {
+    TokenKind.DIVIDE: bool,
+    TokenKind.FLOOR_DIVIDE: bool,
+    TokenKind.MODULO: lambda right: right != 0 and right == int(right),
+}
+
+NUMBERS = (int, float)
+
+# The unboxed values IF takes as a condition, standing for a Number or a Boolean
+CONDITIONS = (int, float, complex, bool)
+
+# Values whose copy() is a plain copy of value, which variable reads can then make directly
+PRIMITIVES = (Number, String, Boolean)
+
+# The value class for each Python type a primitive's value can have
+BOXES = {int: Number, float: Number, complex: Number, str: String, bool: Boolean}
+
+
+# The Python value standing for value while an expression is evaluated, or value itself if it is not
+# a primitive
+def unbox(value: any):
+    if type(value) in PRIMITIVES and BOXES.get(type(value.value)) is type(value):
+        return value.value
+    return value
+
+
+def box(value: any, context: Context, start: int, end: int):
+    value_class = BOXES.get(type(value))
+    if value_class is None:
+        return value
+    return new_value(value_class, value, context, start, end)
+
+
+# The three ways a node can finish early. In the tree walker these are RTResults that every node
+# checks with should_return() and hands straight back, so raising them has the same effect.
+class Failure(Exception):
+    def __init__(self, error):
+        super().__init__()
+        self.error = error
+
+
+class Return(Exception):
+    def __init__(self, value):
+        super().__init__()
+        self.value = value
+
+
+class Continue(Exception):
+    pass
+
+
+# BREAK sets loop_should_continue in the tree walker, so it goes on with the next iteration just as
+# CONTINUE does. It has a signal of its own, which anything catching Continue also catches.
+class Break(Continue):
+    pass
+
+
+# Compiles a tree into nested closures, each taking the context and returning the node's value, then
+# runs them. Every closure does what the matching Interpreter.visit_ method does, with the node's
+# children, operator and positions looked up once when it is compiled.
+#
+# The operands of operators and the conditions of IF, WHILE and REPEAT are compiled by compile_raw
+# instead, to closures that give numbers, strings and booleans unboxed, as the Python values of the
+# Number, String and Boolean they stand for. An operator applies to those directly and its result is
+# only boxed when it leaves the expression, such as by being assigned, passed, put in a list or
+# printed. An operator the unboxed values cannot do goes through the value methods, with its operands
+# boxed at the positions of their nodes, so that is where any error is reported.
+class ClosureInterpreter(Interpreter):
+    def __init__(self):
+        super().__init__()
+        self.compilers = {}
+        self.function_bodies = {}
+        self.raw_compilers = {
+            NumberNode: self.compile_raw_literal, StringNode: self.compile_raw_literal,
+            BooleanNode: self.compile_raw_literal, ConstantNode: self.compile_raw_literal,
+            VarAccessNode: self.compile_raw_var_access_node, BinOpNode: self.compile_raw_bin_op_node,
+            UnaryOpNode: self.compile_raw_unary_op_node,
+        }
+
+    def visit(self, node: any, context: Context) -> RTResult:
+        res = RTResult()
+        try:
+            return res.success(self.compile(node)(context))
+        except Failure as failure:
+            return res.failure(failure.error)
+        except Return as signal:
+            return res.success_return(signal.value)
+        except Continue:
+            return res.success_continue()
+
+    def compile(self, node: any):
+        try:
+            compiler = self.compilers[type(node)]
+        except KeyError:
+            compiler = self.compilers[type(node)] = self.compiler(type(node))
+        return compiler(node)
+
+    def compiler(self, node_class: type):
+        method_name = "compile" + self.get_method_name(node_class.__name__)[len("visit"):]
+        return getattr(self, method_name, self.compile_unknown_node)
+
+    # A closure giving the node's value unboxed when it is a number, string or boolean. A node with
+    # nothing to gain from that gives its value as compile's closure would.
+    def compile_raw(self, node: any):
+        compiler = self.raw_compilers.get(type(node))
+        if compiler is None:
+            return self.compile(node)
+        return compiler(node)
+
+    # The closure compile_raw gives for node, with its result boxed at the node's positions
+    def compile_boxed(self, node: any):
+        raw_node = self.compile_raw(node)
+        start, end = node.start_position, node.end_position
+
+        def boxed_node(context):
+            value = raw_node(context)
+            value_class = BOXES.get(type(value))
+            if value_class is None:
+                return value
+            return new_value(value_class, value, context, start, end)
+        return boxed_node
+
+    @staticmethod
+    def compile_raw_literal(node: any):
+        value = unbox(node.value) if type(node) is ConstantNode else node.tok.value
+        if type(node) is BooleanNode:
+            value = value == "TRUE"
+
+        def raw_literal(_context):
+            return value
+        return raw_literal
+
+    @staticmethod
+    def compile_raw_var_access_node(node: VarAccessNode):
+        var_name, start, end = node.var_name_tok.value, node.start_position, node.end_position
+
+        def raw_var_access_node(context):
+            value = context.symbol_table.get(var_name)
+            if value is None:
+                raise Failure(RuntimeError(start, end, f"'{var_name}' is not defined.", context))
+            if type(value) in PRIMITIVES:
+                if BOXES.get(type(value.value)) is type(value):
+                    return value.value
+                return new_value(type(value), value.value, context, start, end)
+            return value.copy().set_pos(start, end).set_context(context)
+        return raw_var_access_node
+
+    def compile_raw_bin_op_node(self, node: BinOpNode):
+        left, right = self.compile_raw(node.left_node), self.compile_raw(node.right_node)
+        left_start, left_end = node.left_node.start_position, node.left_node.end_position
+        right_start, right_end = node.right_node.start_position, node.right_node.end_position
+        start, end = node.start_position, node.end_position
+        if node.op_tok.kind == TokenKind.KEYWORD:
+            key = node.op_tok.value
+            operation = KEYWORD_OPERATIONS.get(key)
+        else:
+            key = node.op_tok.kind
+            operation = BINARY_OPERATIONS.get(key)
+        numbers = RAW_NUMBER_OPERATIONS.get(key)
+        strings = RAW_STRING_OPERATIONS.get(key)
+        booleans = RAW_BOOLEAN_OPERATIONS.get(key)
+        guard = NUMBER_GUARDS.get(key)
+
+        # Anything but two unboxed numbers the operator can do, including boxed operands such as list
+        # elements, which the value methods are given as they are
+        def operate(context, left_value, right_value):
+            left_raw, right_raw = unbox(left_value), unbox(right_value)
+            left_type, right_type = type(left_raw), type(right_raw)
+            if left_type in NUMBERS and right_type in NUMBERS:
+                if numbers is not None and (guard is None or guard(right_raw)):
+                    return numbers(left_raw, right_raw)
+            elif left_type is right_type:
+                if left_type is str and strings is not None:
+                    return strings(left_raw, right_raw)
+                if left_type is bool and booleans is not None:
+                    return booleans(left_raw, right_raw)
+
+            result, error = operation(
+                box(left_value, context, left_start, left_end), box(right_value, context, right_start, right_end)
+            )
+            if error:
+                raise Failure(with_context(error, context))
+            return unbox(result.set_pos(start, end))
+
+        if numbers is None:
+            def raw_bin_op_node(context):
+                return operate(context, left(context), right(context))
+        elif guard is None:
+            def raw_bin_op_node(context):
+                left_value, right_value = left(context), right(context)
+                if type(left_value) in NUMBERS and type(right_value) in NUMBERS:
+                    return numbers(left_value, right_value)
+                return operate(context, left_value, right_value)
+        else:
+            def raw_bin_op_node(context):
+                left_value, right_value = left(context), right(context)
+                if type(left_value) in NUMBERS and type(right_value) in NUMBERS and guard(right_value):
+                    return numbers(left_value, right_value)
+                return operate(context, left_value, right_value)
+        return raw_bin_op_node
+
+    def compile_raw_unary_op_node(self, node: UnaryOpNode):
+        operand_node = self.compile_raw(node.node)
+        start, end = node.start_position, node.end_position
+        negate = node.op_tok.kind == TokenKind.MINUS
+        invert = node.op_tok.matches_keyword("NOT")
+
+        def raw_unary_op_node(context):
+            operand = operand_node(context)
+            if type(operand) in NUMBERS:
+                return operand * -1 if negate else operand
+            if type(operand) is bool:
+                return not operand if invert else operand
+            if type(operand) is str:
+                return operand
+            return unbox(self.unary(box(operand, context, start, end), negate, invert, start, end))
+        return raw_unary_op_node
+
+    def compile_unknown_node(self, node: any):
+        def unknown_node(context):
+            raise Failure(self.no_visit_method(node, context).error)
+        return unknown_node
+
+    @staticmethod
+    def compile_constant_node(node: ConstantNode):
+        value = node.value
+
+        def constant_node(_context):
+            return value
+        return constant_node
+
+    @staticmethod
+    def compile_number_node(node: NumberNode):
+        value, start, end = node.tok.value, node.start_position, node.end_position
+
+        def number_node(context):
+            return Number(value).set_context(context).set_pos(start, end)
+        return number_node
+
+    @staticmethod
+    def compile_string_node(node: StringNode):
+        value, start, end = node.tok.value, node.start_position, node.end_position
+
+        def string_node(context):
+            return String(value).set_context(context).set_pos(start, end)
+        return string_node
+
+    @staticmethod
+    def compile_boolean_node(node: BooleanNode):
+        value, start, end = node.tok.value == "TRUE", node.start_position, node.end_position
+
+        def boolean_node(context):
+            return Boolean(value).set_context(context).set_pos(start, end)
+        return boolean_node
+
+    @staticmethod
+    def compile_null_node(node: NullNode):
+        start, end = node.start_position, node.end_position
+
+        def null_node(context):
+            return context.symbol_table.get("NULL").set_pos(start, end)
+        return null_node
+
+    def compile_list_node(self, node: ListNode):
+        elements = [self.compile(element_node) for element_node in node.element_nodes]
+        start, end = node.start_position, node.end_position
+
+        if node.is_statement:
+            def statements_node(context):
+                for element in elements:
+                    element(context)
+                return context.symbol_table.get("NULL")
+            return statements_node
+
+        def list_node(context):
+            return List([element(context) for element in elements]).set_context(context).set_pos(start, end)
+        return list_node
+
+    def compile_list_index_node(self, node: ListIndexNode):
+        list_instance, index = self.compile(node.list_instance), self.compile(node.index)
+
+        def list_index_node(context):
+            result, error = list_instance(context)[index(context)]
+            if error:
+                raise Failure(with_context(error, context))
+            return result
+        return list_index_node
+
+    def compile_bin_op_node(self, node: BinOpNode):
+        return self.compile_boxed(node)
+
+    def compile_unary_op_node(self, node: UnaryOpNode):
+        return self.compile_boxed(node)
+
+    @staticmethod
+    def unary(operand: any, negate: bool, invert: bool, start: int, end: int):
+        if isinstance(operand, Number):
+            if negate:
+                operand, error = operand * Number(-1)
+        elif isinstance(operand, Boolean):
+            if invert:
+                operand = Boolean(not operand.value).set_context(operand.context)
+        return operand.set_pos(start, end)
+
+    @staticmethod
+    def compile_var_access_node(node: VarAccessNode):
+        var_name, start, end = node.var_name_tok.value, node.start_position, node.end_position
+
+        def var_access_node(context):
+            value = context.symbol_table.get(var_name)
+            if value is None:
+                raise Failure(RuntimeError(start, end, f"'{var_name}' is not defined.", context))
+            if type(value) in PRIMITIVES:
+                return new_value(type(value), value.value, context, start, end)
+            return value.copy().set_pos(start, end).set_context(context)
+        return var_access_node
+
+    def compile_var_assign_node(self, node: VarAssignNode):
+        var_name, value_node = node.var_name_tok.value, self.compile(node.value_node)
+
+        def var_assign_node(context):
+            value = value_node(context)
+            context.symbol_table.set(var_name, value)
+            return value
+        return var_assign_node
+
+    def compile_if_node(self, node: IfNode):
+        cases = [(self.compile_raw(condition), self.compile(expr), should_auto_return)
+                 for condition, expr, should_auto_return in node.cases]
+        else_case = (self.compile(node.else_case[0]), node.else_case[1]) if node.else_case else None
+        start, end = node.start_position, node.end_position
+
+        def if_node(context):
+            for condition, expr, should_auto_return in cases:
+                condition_value = condition(context)
+                if type(condition_value) in CONDITIONS or isinstance(condition_value, (Number, Boolean)):
+                    if condition_value:
+                        expr_value = expr(context)
+                        return expr_value if not should_auto_return else context.symbol_table.get("NULL")
+                else:
+                    raise Failure(InvalidSyntaxError(start, end, "Invalid case - must evaluate to Boolean or Number."))
+
+            if else_case:
+                expr, should_auto_return = else_case
+                else_value = expr(context)
+                return else_value if not should_auto_return else context.symbol_table.get("NULL")
+
+            return context.symbol_table.get("NULL")
+        return if_node
+
+    def compile_case_node(self, node: CaseNode):
+        var_name = node.var_name_tok.value
+        cases = [(self.compile(value), self.compile(response), should_auto_return)
+                 for value, response, should_auto_return in node.cases]
+        otherwise_case = (self.compile(node.otherwise_case[0]), node.otherwise_case[1]) if node.otherwise_case else None
+
+        def case_node(context):
+            var_value = context.symbol_table.get(var_name)
+
+            for value, response, should_auto_return in cases:
+                case_matched, error = value(context) == var_value
+                if error:
+                    raise Failure(with_context(error, context))
+
+                if case_matched:
+                    expr_value = response(context)
+                    return context.symbol_table.get("NULL") if should_auto_return else expr_value
+
+            if otherwise_case:
+                expr, should_auto_return = otherwise_case
+                otherwise_value = expr(context)
+                return context.symbol_table.get("NULL") if should_auto_return else otherwise_value
+
+            return context.symbol_table.get("NULL")
+        return case_node
+
+    def compile_for_node(self, node: ForNode):
+        var_name = node.var_name_tok.value
+        start_value_node, end_value_node = self.compile(node.start_value_node), self.compile(node.end_value_node)
+        step_value_node = self.compile(node.step_value_node) if node.step_value_node else None
+        body_node = self.compile(node.body_node)
+        collect = not (node.should_auto_return or node.is_statement)
+        start, end = node.start_position, node.end_position
+
+        def for_node(context):
+            elements = []
+            start_value = start_value_node(context)
+            end_value = end_value_node(context)
+            step_value = step_value_node(context) if step_value_node else Number(1.0)
+
+            context.symbol_table.set(var_name, start_value)
+
+            for i in for_counters(start_value, end_value, step_value):
+                context.symbol_table.set(var_name, i)
+                try:
+                    value = body_node(context)
+                except Continue:
+                    continue
+                if collect:
+                    elements.append(value)
+
+            return (List(elements).set_context(context).set_pos(start, end)
+                    if collect
+                    else context.symbol_table.get("NULL"))
+        return for_node
+
+    def compile_while_node(self, node: WhileNode):
+        condition_node, body_node = self.compile_raw(node.condition_node), self.compile(node.body_node)
+        collect = node.should_auto_return and not node.is_statement
+        start, end = node.start_position, node.end_position
+
+        def while_node(context):
+            elements = []
+
+            while condition_node(context):
+                try:
+                    value = body_node(context)
+                except Continue:
+                    continue
+                if collect:
+                    elements.append(value)
+
+            return (List(elements).set_context(context).set_pos(start, end)
+                    if collect
+                    else context.symbol_table.get("NULL"))
+        return while_node
+
+    def compile_repeat_node(self, node: RepeatNode):
+        condition_node, body_node = self.compile_raw(node.condition_node), self.compile(node.body_node)
+        collect = node.should_auto_return and not node.is_statement
+        start, end = node.start_position, node.end_position
+
+        def repeat_node(context):
+            elements = []
+
+            while True:
+                try:
+                    value = body_node(context)
+                except Continue:
+                    continue
+                if collect:
+                    elements.append(value)
+
+                if condition_node(context):
+                    break
+
+            return (List(elements).set_context(context).set_pos(start, end)
+                    if collect
+                    else context.symbol_table.get("NULL"))
+        return repeat_node
+
+    def compile_func_def_node(self, node: FuncDefNode):
+        func_name = node.var_name_tok.value if node.var_name_tok else None
+        body_node = node.body_node
+        arg_names = [arg_name.value for arg_name in node.arg_name_toks]
+        should_auto_return = node.should_auto_return
+        start, end = node.start_position, node.end_position
+        self.function_bodies[body_node] = self.compile(body_node)
+
+        def func_def_node(context):
+            func_value = PSFunction(func_name, body_node, arg_names, should_auto_return).set_context(
+                context).set_pos(start, end)
+
+            if func_name:
+                context.symbol_table.set(func_name, func_value)
+
+            return func_value
+        return func_def_node
+
+    def compile_call_node(self, node: CallNode):
+        arg_nodes = [self.compile(arg_node) for arg_node in node.arg_nodes]
+        is_tail_call = node.is_tail_call
+        start, end = node.start_position, node.end_position
+
+        # Each callee gives the value and the context the tree walker's copy of it would have. Reading
+        # a variable sets that to the current context, so the value can be used without copying it.
+        if isinstance(node.node_to_call, VarAccessNode):
+            var_name = node.node_to_call.var_name_tok.value
+            var_start, var_end = node.node_to_call.start_position, node.node_to_call.end_position
+
+            def callee(context):
+                value = context.symbol_table.get(var_name)
+                if value is None:
+                    raise Failure(RuntimeError(var_start, var_end, f"'{var_name}' is not defined.", context))
+                return value, context
+        else:
+            node_to_call = self.compile(node.node_to_call)
+
+            def callee(context):
+                value = node_to_call(context)
+                return value, value.context
+
+        def call_node(context):
+            value_to_call, parent = callee(context)
+
+            if isinstance(value_to_call, PSFunction):
+                args = [arg_node(context) for arg_node in arg_nodes]
+                if is_tail_call and len(args) == len(value_to_call.arg_names):
+                    return TailCall(value_to_call, args, node)
+                return_value = self.call_function(value_to_call, parent, args, start, end, context)
+            else:
+                value_to_call = value_to_call.copy().set_pos(start, end).set_context(parent)
+                args = [arg_node(context) for arg_node in arg_nodes]
+                res = value_to_call(args)
+                if res.error:
+                    raise Failure(with_context(res.error, context))
+                return_value = res.value
+
+            if type(return_value) in PRIMITIVES:
+                return new_value(type(return_value), return_value.value, context, start, end)
+            return return_value.copy().set_pos(start, end).set_context(context)
+        return call_node
+
+    # PSFunction.__call__ and PSFunction.return_value, for a copy of function positioned at the call
+    # and with parent as its context, running the compiled body and then any TailCall it gives
+    def call_function(self, function: PSFunction, parent: Context, args: list, start: int, end: int,
+                      context: Context):
+        arg_names = function.arg_names
+        if len(args) != len(arg_names):
+            raise Failure(with_context(RuntimeError(
+                start, end,
+                f"Invalid number of arguments passed to function.\n"
+                f"You passed {len(args)} arguments. The function expects {len(arg_names)} arguments.",
+                parent
+            ), context))
+
+        exec_ctx = Context(function.name, parent, start)
+        exec_ctx.symbol_table = SymbolTable(parent.symbol_table)
+
+        while True:
+            for name, value in zip(function.arg_names, args):
+                exec_ctx.symbol_table.set(name, value.set_context(exec_ctx))
+
+            body = self.function_bodies.get(function.body_node)
+            if body is None:
+                body = self.function_bodies[function.body_node] = self.compile(function.body_node)
+
+            try:
+                value = body(exec_ctx)
+            except Return as signal:
+                value = signal.value
+            else:
+                value = (value if function.should_auto_return else None) or exec_ctx.symbol_table.get("NULL")
+
+            if type(value) is not TailCall:
+                return value
+            # A call of the function itself runs again in the same context, anything else in one under it
+            if value.function.body_node is not function.body_node:
+                function = value.function
+                exec_ctx = Context(function.name, exec_ctx, value.node.start_position)
+                exec_ctx.symbol_table = SymbolTable(exec_ctx.parent.symbol_table)
+            args = value.args
+
+    def compile_print_node(self, node: PrintNode):
+        objects_to_print = [self.compile(obj) for obj in node.objects_to_print]
+
+        def print_node(context):
+            print_list = [obj(context) for obj in objects_to_print]
+
+            for obj in print_list[:-1]:
+                print(obj, end=" ")
+
+            print(print_list[-1])
+            return context.symbol_table.get("NULL")
+        return print_node
+
+    def compile_input_node(self, node: InputNode):
+        def input_node(context):
+            return self.visit_input_node(node, context).value
+        return input_node
+
+    def compile_return_node(self, node: ReturnNode):
+        node_to_return = self.compile(node.node_to_return) if node.node_to_return else None
+
+        def return_node(context):
+            value = node_to_return(context) if node_to_return else context.symbol_table.get("NULL")
+            raise Return(value or context.symbol_table.get("NULL"))
+        return return_node
+
+    @staticmethod
+    def compile_continue_node(_node: ContinueNode):
+        def continue_node(_context):
+            raise Continue()
+        return continue_node
+
+    @staticmethod
+    def compile_break_node(_node: BreakNode):
+        def break_node(_context):
+            raise Break()
+        return break_node
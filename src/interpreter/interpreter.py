@@ -1,30 +1,64 @@
+import operator
 import re
 from typing import Callable
 from .runtime_result import RTResult
 from .context import Context
 from .symbol_table import SymbolTable
 from ..errors import NotImplementedError, RuntimeError, InvalidSyntaxError
-from ..lexer.tokens import KeywordToken
+from ..errors.errors import BasePSError
+from ..lexer.tokens import TokenKind
 from ..parser.nodes import (
     NumberNode, StringNode, BooleanNode, BinOpNode,
     UnaryOpNode, VarAssignNode, VarAccessNode,
     IfNode, CaseNode, ListNode, ForNode, WhileNode,
     ListIndexNode, NullNode, RepeatNode, FuncDefNode,
     CallNode, ReturnNode, ContinueNode, BreakNode,
-    PrintNode, InputNode
+    PrintNode, InputNode, ConstantNode
 )
 
 
+# Constant values are built by the optimizer before there is a context to give them, so errors they
+# raise take the context they were evaluated in
+def with_context(error, context: Context):
+    if isinstance(error, BasePSError) and error.context is None:
+        error.context = context
+    return error
+
+
+# Nodes whose value can be an object some variable also holds: reading a variable gives the stored
+# object and a call gives whatever its function returned, neither of them copied. Anything that would
+# change such a value or keep it somewhere else first takes a copy, stamped as reading it used to be.
+SHARED_NODES = (VarAccessNode, CallNode)
+
+
+def stamp(value, node: any, context: Context):
+    return value.copy().set_pos(node.start_position, node.end_position).set_context(context)
+
+
+def unshare(value, node: any, context: Context):
+    if isinstance(node, SHARED_NODES):
+        return stamp(value, node, context)
+    return value
+
+
 class Value:
+    # A frozen value is shared by every evaluation of a constant, so anything that would change it
+    # works on a copy instead
+    frozen = False
+
     def __init__(self):
         self.set_pos()
         self.set_context()
 
+    def freeze(self):
+        self.frozen = True
+        return self
+
     def illegal_operation(self, other=None, message=None):
         if other is None and message is None:
             return RuntimeError(
-                self.start_position, self.end_position.copy().advance(),
-                f"{self.start_position.ftxt} evaluates to a {self.__class__.__name__}"
+                self.start_position, self.end_position + 1,
+                f"The called expression evaluates to a {self.__class__.__name__}"
                 f"{f' with value {self.value}' if hasattr(self, 'value') else ''}, not a function, "
                 f"therefore it cannot be called.",
                 self.context
@@ -35,11 +69,15 @@ class Value:
         )
 
     def set_pos(self, start_position=None, end_position=None):
+        if self.frozen:
+            return self.copy().set_pos(start_position, end_position)
         self.start_position = start_position
         self.end_position = end_position
         return self
 
     def set_context(self, context=None):
+        if self.frozen:
+            return self.copy().set_context(context)
         self.context = context
         return self
 
@@ -79,7 +117,13 @@ class Value:
     def __le__(self, other):
         return None, self.illegal_operation(other, "'<=' operator")
 
-    def __call__(self, args):
+    def anded_by(self, other):
+        return None, self.illegal_operation(other, "'AND' operator")
+
+    def ored_by(self, other):
+        return None, self.illegal_operation(other, "'OR' operator")
+
+    def __call__(self, args, interpreter=None):
         return RTResult().failure(self.illegal_operation())
 
     def __getitem__(self, other):
@@ -139,10 +183,13 @@ class List(Value):
         return f"{[int(str(i)) if i.__class.__name__ == Number else str(i) for i in self.elements]}"
 
     def __getitem__(self, other):
-        if other.__class__.__name__ == "Number":
+        if isinstance(other, Number):
             if other.value == (x := int(other.value)):
                 if -len(self.elements) <= x < len(self.elements):
-                    return self.elements[x], None
+                    element = self.elements[x]
+                    if element.frozen:
+                        element = self.elements[x] = element.copy()
+                    return element, None
                 else:
                     return None, RuntimeError(
                         other.start_position, other.end_position,
@@ -470,15 +517,25 @@ class PSFunction(BaseFunction):
         self.arg_names = arg_names
         self.should_auto_return = should_auto_return
 
-    def __call__(self, args):
+    def __call__(self, args, interpreter=None):
         res = RTResult()
-        interpreter = Interpreter()
+        if interpreter is None:
+            interpreter = Interpreter()
         exec_ctx = self.generate_new_context()
         res.register(self.check_and_populate_args(self.arg_names, args, exec_ctx))
         if res.should_return():
             return res
 
-        value = res.register(interpreter.visit(self.body_node, exec_ctx))
+        function = self
+        call_result = self.return_value(interpreter.visit(self.body_node, exec_ctx), exec_ctx)
+        while type(call_result.value) is TailCall:
+            function, exec_ctx = interpreter.tail_call_context(function, exec_ctx, call_result.value)
+            call_result = function.return_value(interpreter.visit(function.body_node, exec_ctx), exec_ctx)
+        return call_result
+
+    def return_value(self, body_result, exec_ctx):
+        res = RTResult()
+        value = res.register(body_result)
         if res.should_return() and res.func_return_value is None:
             return res
 
@@ -499,7 +556,7 @@ class PythonFunction(BaseFunction):
         self.body = body
         self.arg_names = arg_names
 
-    def __call__(self, args):
+    def __call__(self, args, interpreter=None):
         res = RTResult()
         exec_ctx = self.generate_new_context()
         res.register(self.check_and_populate_args(self.arg_names, args, exec_ctx))
@@ -516,16 +573,114 @@ class PythonFunction(BaseFunction):
             self.start_position, self.end_position).set_context(self.context)
 
 
+# Same state as value_class(value).set_context(context).set_pos(start, end), without the calls
+def new_value(value_class: type, value: any, context: Context, start: int, end: int):
+    result = object.__new__(value_class)
+    result.value = value
+    result.context = context
+    result.start_position = start
+    result.end_position = end
+    return result
+
+
+# Integral floats past this are not all exact, so adding a step to them can round
+EXACT_FLOATS = 2 ** 53
+
+
+def is_whole(value):
+    return type(value) is int or (type(value) is float and value.is_integer() and abs(value) < EXACT_FLOATS)
+
+
+# The values a FOR loop gives its variable in turn: start_value, then each one after it with
+# step_value added, for as long as the loop's condition holds. When all three are whole numbers and
+# the step is positive they are counted off a Python range and boxed as they are given, which is
+# what adding and comparing the Numbers would give, without doing either.
+def for_counters(start_value, end_value, step_value):
+    if type(start_value) is Number and type(end_value) is Number and type(step_value) is Number:
+        start, end, step = start_value.value, end_value.value, step_value.value
+        if is_whole(start) and is_whole(end) and is_whole(step) and step > 0 and is_whole(end + step):
+            if start > end:
+                return iter(())
+            values = range(int(start) + int(step), int(end) + 1, int(step))
+            return count_off(start_value, values if type(start + step) is int else map(float, values))
+    return count_by_adding(start_value, end_value, step_value)
+
+
+def count_off(start_value, values):
+    context = start_value.context
+    yield start_value
+    for value in values:
+        yield new_value(Number, value, context, None, None)
+
+
+def count_by_adding(start_value, end_value, step_value):
+    i = start_value
+    ascending = step_value >= Number(0)
+    while (i <= end_value)[0] if ascending else (i >= end_value)[0]:
+        yield i
+        i, _ = i + step_value
+
+
+# What a call marked is_tail_call gives in place of calling a pseudocode function. Whatever ran the
+# function making the call runs that one next, instead of the body returning to it: the same function
+# runs again in the context it already has, with the arguments rebound there, so a function calling
+# itself this way runs in constant stack and without a context per call.
+class TailCall:
+    def __init__(self, function, args, node):
+        self.function = function
+        self.args = args
+        self.node = node
+
+
+# Binds the arguments of a call at node in exec_ctx
+def bind_args(function, args: list, node: any, exec_ctx: Context):
+    for name, value, arg_node in zip(function.arg_names, args, node.arg_nodes):
+        # A value some variable holds is bound as it is, anything else takes the new context as before
+        if not isinstance(arg_node, SHARED_NODES):
+            value = value.set_context(exec_ctx)
+        exec_ctx.symbol_table.set(name, value)
+
+
+BINARY_OPERATIONS = {
+    TokenKind.PLUS: operator.add,
+    TokenKind.MINUS: operator.sub,
+    TokenKind.MULTIPLY: operator.mul,
+    TokenKind.DIVIDE: operator.truediv,
+    TokenKind.FLOOR_DIVIDE: operator.floordiv,
+    TokenKind.POWER: operator.pow,
+    TokenKind.MODULO: operator.mod,
+    TokenKind.EQUALS: operator.eq,
+    TokenKind.NOT_EQUALS: operator.ne,
+    TokenKind.GREATER_THAN: operator.gt,
+    TokenKind.LESS_THAN: operator.lt,
+    TokenKind.GREATER_THAN_OR_EQUALS: operator.ge,
+    TokenKind.LESS_THAN_OR_EQUALS: operator.le,
+}
+
+KEYWORD_OPERATIONS = {
+    "AND": lambda left, right: left.anded_by(right),
+    "OR": lambda left, right: left.ored_by(right),
+}
+
+
 class Interpreter:
+    def __init__(self):
+        self.visitors = {}
+
     @staticmethod
     def get_method_name(method_name: str):
         return "visit_" + "_".join([i.lower() for i in re.findall("[A-Z][^A-Z]*", method_name)])
 
     def visit(self, node: any, context: Context) -> object:
-        method_name = self.get_method_name(type(node).__name__)
-        method: Callable = getattr(self, method_name, self.no_visit_method)
+        try:
+            method = self.visitors[type(node)]
+        except KeyError:
+            method = self.visitors[type(node)] = self.visitor(type(node))
         return method(node, context)
 
+    def visitor(self, node_class: type) -> Callable:
+        return getattr(self, self.get_method_name(node_class.__name__), self.no_visit_method)
+
     def no_visit_method(self, node: any, context: Context):
         return RTResult().failure(NotImplementedError(
             node.start_position, node.end_position,
@@ -553,6 +708,10 @@ class Interpreter:
             Boolean(node.tok.value == "TRUE").set_context(context).set_pos(node.start_position, node.end_position)
         )
 
+    @staticmethod
+    def visit_constant_node(node: ConstantNode, _context: Context) -> RTResult:
+        return RTResult().success(node.value)
+
     @staticmethod
     def visit_null_node(node: NullNode, context: Context) -> RTResult:
         return RTResult().success(
@@ -564,10 +723,14 @@ class Interpreter:
         elements = []
 
         for element_node in node.element_nodes:
-            elements.append(res.register(self.visit(element_node, context)))
+            element = res.register(self.visit(element_node, context))
             if res.should_return():
                 return res
-            
+            if not node.is_statement:
+                elements.append(unshare(element, element_node, context))
+
+        if node.is_statement:
+            return res.success(context.symbol_table.get("NULL"))
         return res.success(
             List(elements).set_context(context).set_pos(node.start_position, node.end_position)
         )
@@ -583,7 +746,8 @@ class Interpreter:
 
         result, error = list_instance[index]
         if error:
-            return res.failure(error)
+            result, error = stamp(list_instance, node.list_instance, context)[stamp(index, node.index, context)]
+            return res.failure(with_context(error, context))
         return res.success(result)
 
     def visit_bin_op_node(self, node: BinOpNode, context: Context):
@@ -594,40 +758,20 @@ class Interpreter:
         right = res.register(self.visit(node.right_node, context))
         if res.should_return():
             return res
-        if node.op_tok.__class__.__name__ == "PlusToken":
-            result, error = left + right
-        elif node.op_tok.__class__.__name__ == "MinusToken":
-            result, error = left - right
-        elif node.op_tok.__class__.__name__ == "MultiplyToken":
-            result, error = left * right
-        elif node.op_tok.__class__.__name__ == "DivideToken":
-            result, error = left / right
-        elif node.op_tok.__class__.__name__ == "FloorDivideToken":
-            result, error = left // right
-        elif node.op_tok.__class__.__name__ == "PowerToken":
-            result, error = left ** right
-        elif node.op_tok.__class__.__name__ == "ModuloToken":
-            result, error = left % right
-        elif node.op_tok.__class__.__name__ == "EqualsToken":
-            result, error = left == right
-        elif node.op_tok.__class__.__name__ == "NotEqualsToken":
-            result, error = left != right
-        elif node.op_tok.__class__.__name__ == "GreaterThanToken":
-            result, error = left > right
-        elif node.op_tok.__class__.__name__ == "LessThanToken":
-            result, error = left < right
-        elif node.op_tok.__class__.__name__ == "GreaterThanOrEqualsToken":
-            result, error = left >= right
-        elif node.op_tok.__class__.__name__ == "LessThanOrEqualsToken":
-            result, error = left <= right
-        elif node.op_tok.__class__.__name__ == "KeywordToken" and node.op_tok.value == "and":
-            result, error = left.anded_by(right)
-        elif node.op_tok.__class__.__name__ == "KeywordToken" and node.op_tok.value == "or":
-            result, error = left.ored_by(right)
+        if node.op_tok.kind == TokenKind.KEYWORD:
+            operation = KEYWORD_OPERATIONS.get(node.op_tok.value)
         else:
+            operation = BINARY_OPERATIONS.get(node.op_tok.kind)
+
+        if operation is None:
             result, error = None, None
+        else:
+            result, error = operation(left, right)
         if error:
-            return res.failure(error)
+            # Errors are built from the operands' positions and context, so the operation is done again
+            # on operands stamped with those of the nodes they came from
+            result, error = operation(stamp(left, node.left_node, context), stamp(right, node.right_node, context))
+            return res.failure(with_context(error, context))
         else:
             return res.success(result.set_pos(node.start_position, node.end_position))
 
@@ -638,14 +782,15 @@ class Interpreter:
         if res.should_return():
             return res
 
-        if operand.__class__.__name__ == "Number":
-            if node.op_tok.__class__.__name__ == "MinusToken":
+        operand = unshare(operand, node.node, context)
+        if isinstance(operand, Number):
+            if node.op_tok.kind == TokenKind.MINUS:
                 operand, error = operand * Number(-1)
-            elif node.op_tok.__class__.__name__ == "PlusToken":
+            elif node.op_tok.kind == TokenKind.PLUS:
                 pass
-        elif operand.__class__.__name__ == "Boolean":
-            if node.op_tok.matches(KeywordToken("not")):
-                operand.value = not operand.value
+        elif isinstance(operand, Boolean):
+            if node.op_tok.matches_keyword("NOT"):
+                operand = Boolean(not operand.value).set_context(operand.context)
 
         return res.success(operand.set_pos(node.start_position, node.end_position))
 
@@ -660,7 +805,7 @@ class Interpreter:
                 f"'{var_name}' is not defined.", context
             ))
 
-        return res.success(value.copy().set_pos(node.start_position, node.end_position).set_context(context))
+        return res.success(value)
 
     def visit_var_assign_node(self, node: VarAssignNode, context: Context):
         res = RTResult()
@@ -668,6 +813,7 @@ class Interpreter:
         value = res.register(self.visit(node.value_node, context))
         if res.should_return():
             return res
+        value = unshare(value, node.value_node, context)
         context.symbol_table.set(var_name, value)
         return res.success(value)
 
@@ -679,7 +825,7 @@ class Interpreter:
             if res.should_return():
                 return res
 
-            if condition_value.__class__.__name__ in ["Number", "Boolean"]:
+            if isinstance(condition_value, (Number, Boolean)):
                 if condition_value:
                     expr_value = res.register(self.visit(expr, context))
                     if res.should_return():
@@ -712,7 +858,8 @@ class Interpreter:
 
             case_matched, error = condition_value == var_value
             if error:
-                return res.failure(error)
+                case_matched, error = stamp(condition_value, value, context) == var_value
+                return res.failure(with_context(error, context))
 
             if case_matched:
                 expr_value = res.register(self.visit(response, context))
@@ -733,6 +880,7 @@ class Interpreter:
     def visit_for_node(self, node: ForNode, context: Context) -> RTResult:
         res = RTResult()
         elements = []
+        collect = not (node.should_auto_return or node.is_statement)
         start_value = res.register(self.visit(node.start_value_node, context))
         if res.should_return():
             return res
@@ -748,20 +896,10 @@ class Interpreter:
         else:
             step_value = Number(1.0)
 
-        i = start_value
-
-        if step_value >= Number(0):
-            def condition():
-                return (i <= end_value)[0]
-        else:
-            def condition():
-                return (i >= end_value)[0]
+        context.symbol_table.set(node.var_name_tok.value, start_value)
 
-        context.symbol_table.set(node.var_name_tok.value, i)
-
-        while condition():
+        for i in for_counters(start_value, end_value, step_value):
             context.symbol_table.set(node.var_name_tok.value, i)
-            i, _ = i + step_value
             value = res.register(self.visit(node.body_node, context))
             if res.should_return() and not res.loop_should_continue and not res.loop_should_break:
                 return res
@@ -772,15 +910,17 @@ class Interpreter:
             if res.loop_should_break:
                 break
 
-            elements.append(value)
+            if collect:
+                elements.append(value)
 
         return res.success(List(elements).set_context(context).set_pos(node.start_position, node.end_position)
-                           if not node.should_auto_return
+                           if collect
                            else context.symbol_table.get("NULL"))
 
     def visit_while_node(self, node: WhileNode, context: Context):
         res = RTResult()
         elements = []
+        collect = node.should_auto_return and not node.is_statement
 
         while True:
             condition = res.register(self.visit(node.condition_node, context))
@@ -801,17 +941,19 @@ class Interpreter:
             if res.loop_should_break:
                 break
 
-            elements.append(value)
+            if collect:
+                elements.append(value)
 
         return res.success(
             List(elements).set_context(context).set_pos(node.start_position, node.end_position)
-            if node.should_auto_return
+            if collect
             else context.symbol_table.get("NULL")
         )
 
     def visit_repeat_node(self, node: RepeatNode, context: Context):
         res = RTResult()
         elements = []
+        collect = node.should_auto_return and not node.is_statement
 
         while True:
             value = res.register(self.visit(node.body_node, context))
@@ -825,7 +967,8 @@ class Interpreter:
             if res.loop_should_break:
                 break
 
-            elements.append(value)
+            if collect:
+                elements.append(value)
 
             condition = res.register(self.visit(node.condition_node, context))
             if res.should_return():
@@ -836,7 +979,7 @@ class Interpreter:
 
         return res.success(
             List(elements).set_context(context).set_pos(node.start_position, node.end_position)
-            if node.should_auto_return
+            if collect
             else context.symbol_table.get("NULL")
         )
 
@@ -861,17 +1004,67 @@ class Interpreter:
         value_to_call = res.register(self.visit(node.node_to_call, context))
         if res.should_return():
             return res
-        value_to_call = value_to_call.copy().set_pos(node.start_position, node.end_position)
+        parent = self.call_parent(value_to_call, node, context)
+        if not isinstance(value_to_call, PSFunction):
+            value_to_call = value_to_call.copy().set_pos(node.start_position, node.end_position).set_context(parent)
 
         for arg_node in node.arg_nodes:
             args.append(res.register(self.visit(arg_node, context)))
             if res.should_return():
                 return res
 
-        return_value = res.register(value_to_call(args))
+        if isinstance(value_to_call, PSFunction):
+            if node.is_tail_call and len(args) == len(value_to_call.arg_names):
+                return res.success(TailCall(value_to_call, args, node))
+
+            exec_ctx, error = self.call_context(value_to_call, parent, args, node)
+            if error:
+                return res.failure(with_context(error, context))
+            call_result = value_to_call.return_value(self.visit(value_to_call.body_node, exec_ctx), exec_ctx)
+            while type(call_result.value) is TailCall:
+                value_to_call, exec_ctx = self.tail_call_context(value_to_call, exec_ctx, call_result.value)
+                call_result = value_to_call.return_value(self.visit(value_to_call.body_node, exec_ctx), exec_ctx)
+        else:
+            call_result = value_to_call(args, self)
+
+        return_value = res.register(call_result)
+        if res.error:
+            return res.failure(with_context(res.error, context))
         if res.should_return():
             return res
-        return res.success(return_value.copy().set_pos(node.start_position, node.end_position).set_context(context))
+        return res.success(return_value)
+
+    # The context the copy of the callee used to have, which is the parent of the context a function runs in
+    @staticmethod
+    def call_parent(value_to_call: any, node: CallNode, context: Context):
+        return context if isinstance(node.node_to_call, SHARED_NODES) else value_to_call.context
+
+    # The context PSFunction.__call__ runs function in when called at node, without copying the function
+    @staticmethod
+    def call_context(function: PSFunction, parent: Context, args: list, node: CallNode):
+        arg_names = function.arg_names
+        if len(args) != len(arg_names):
+            return None, RuntimeError(
+                node.start_position, node.end_position,
+                f"Invalid number of arguments passed to function.\n"
+                f"You passed {len(args)} arguments. The function expects {len(arg_names)} arguments.",
+                parent
+            )
+
+        exec_ctx = Context(function.name, parent, node.start_position)
+        exec_ctx.symbol_table = SymbolTable(parent.symbol_table)
+        bind_args(function, args, node, exec_ctx)
+        return exec_ctx, None
+
+    # The function a TailCall made by function in exec_ctx runs and the context it runs in. A call of
+    # function itself reuses exec_ctx, anything else runs in a context of its own under it as usual.
+    @staticmethod
+    def tail_call_context(function: PSFunction, exec_ctx: Context, tail_call: TailCall):
+        if tail_call.function.body_node is function.body_node:
+            bind_args(function, tail_call.args, tail_call.node, exec_ctx)
+            return function, exec_ctx
+        exec_ctx, _ = Interpreter.call_context(tail_call.function, exec_ctx, tail_call.args, tail_call.node)
+        return tail_call.function, exec_ctx
 
     def visit_print_node(self, node: PrintNode, context: Context):
         res = RTResult()
@@ -0,0 +1,124 @@
+from .interpreter import Number, String, Boolean, BINARY_OPERATIONS, KEYWORD_OPERATIONS
+from ..lexer.tokens import BaseToken, TokenKind
+from ..parser.nodes import (
+    NumberNode, StringNode, BooleanNode, BinOpNode, UnaryOpNode, ConstantNode, child_slots
+)
+
+# Longest string a repetition is folded into, so code that never runs can't make the optimizer build
+# something huge
+MAX_FOLDED_STRING = 4096
+
+
+# Runs between the parser and the interpreter. Literals become ConstantNodes holding a frozen value
+# built once, and operators whose operands are all constant are evaluated here, with the same value
+# methods the interpreter uses. Anything that would fail or misbehave at run time is left alone, so
+# the error is still raised (or not) when and where it was before.
+class Optimizer:
+    def __init__(self):
+        self.literals = {
+            NumberNode: lambda node: Number(node.tok.value),
+            StringNode: lambda node: String(node.tok.value),
+            BooleanNode: lambda node: Boolean(node.tok.value == "TRUE"),
+        }
+
+    # Works bottom up from a flat list of the nodes rather than recursing, so it handles anything the
+    # explicit stack parser can produce
+    def optimize(self, tree: any):
+        nodes = []
+        stack = [tree]
+        while stack:
+            obj = stack.pop()
+            cls = type(obj)
+            if cls is list or cls is tuple:
+                stack.extend(obj)
+                continue
+            slots = child_slots(cls)
+            if slots is None or isinstance(obj, (BaseToken, ConstantNode)):
+                continue
+            nodes.append(obj)
+            stack.extend(getattr(obj, name) for name in slots)
+
+        # Children come after their parents in nodes, so walking it backwards folds them first
+        replaced = {}
+        for node in reversed(nodes):
+            for name in child_slots(type(node)):
+                value = getattr(node, name)
+                new_value = self.substitute(value, replaced)
+                if new_value is not value:
+                    setattr(node, name, new_value)
+
+            new_node = self.fold(node)
+            if new_node is not node:
+                replaced[id(node)] = new_node
+
+        return replaced.get(id(tree), tree)
+
+    def substitute(self, value: any, replaced: dict):
+        cls = type(value)
+        if cls is list:
+            for i, item in enumerate(value):
+                value[i] = self.substitute(item, replaced)
+            return value
+        if cls is tuple:
+            return tuple(self.substitute(item, replaced) for item in value)
+        return replaced.get(id(value), value)
+
+    def fold(self, node: any):
+        make_literal = self.literals.get(type(node))
+        if make_literal is not None:
+            value = make_literal(node)
+        elif isinstance(node, BinOpNode):
+            value = self.fold_bin_op(node)
+        elif isinstance(node, UnaryOpNode):
+            value = self.fold_unary_op(node)
+        else:
+            value = None
+
+        if value is None:
+            return node
+        return ConstantNode(node, value.set_pos(node.start_position, node.end_position).freeze())
+
+    @staticmethod
+    def fold_bin_op(node: BinOpNode):
+        if not (isinstance(node.left_node, ConstantNode) and isinstance(node.right_node, ConstantNode)):
+            return None
+
+        if node.op_tok.kind == TokenKind.KEYWORD:
+            operation = KEYWORD_OPERATIONS.get(node.op_tok.value)
+        else:
+            operation = BINARY_OPERATIONS.get(node.op_tok.kind)
+        if operation is None:
+            return None
+
+        left, right = node.left_node.value, node.right_node.value
+        if (isinstance(left, String) and isinstance(right, Number) and node.op_tok.kind == TokenKind.MULTIPLY
+                and len(left.value) * abs(right.value) > MAX_FOLDED_STRING):
+            return None
+
+        # Operand types a method doesn't handle can raise anything, such as TypeError from ** on a String
+        try:
+            outcome = operation(left, right)
+        except Exception:
+            return None
+
+        # Some operand types make these methods return None rather than a (value, error) pair
+        if not isinstance(outcome, tuple):
+            return None
+        result, error = outcome
+        if error or result is None:
+            return None
+        return result
+
+    @staticmethod
+    def fold_unary_op(node: UnaryOpNode):
+        if not isinstance(node.node, ConstantNode):
+            return None
+
+        operand = node.node.value.copy()
+        if isinstance(operand, Number):
+            if node.op_tok.kind == TokenKind.MINUS:
+                operand, error = operand * Number(-1)
+        elif isinstance(operand, Boolean):
+            if node.op_tok.matches_keyword("NOT"):
+                operand.value = not operand.value
+        return operand
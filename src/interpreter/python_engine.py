@@ -0,0 +1,274 @@
+from .context import Context
+from .symbol_table import SymbolTable
+from .interpreter import (
+    Interpreter, RTResult, Number, String, Boolean, List, PSFunction, with_context, for_counters, TailCall
+)
+from .closure_interpreter import PRIMITIVES, Failure, Return, Continue, new_value
+from .bytecode import OPERATIONS, NUMBER_OPERATIONS, UNARY_NEGATE, UNARY_NOT
+from .transpiler import Transpiler
+from ..errors import RuntimeError, InvalidSyntaxError, PythonError
+
+
+# The helpers below are what the code from the Transpiler calls. Each does what the matching
+# Interpreter.visit_ method or VirtualMachine instruction does, raising Failure for an error.
+
+def load(context: Context, name: str, start: int, end: int):
+    value = context.symbol_table.get(name)
+    if value is None:
+        raise Failure(RuntimeError(start, end, f"'{name}' is not defined.", context))
+    if type(value) in PRIMITIVES:
+        return new_value(type(value), value.value, context, start, end)
+    return value.copy().set_pos(start, end).set_context(context)
+
+
+def load_null(context: Context, start: int, end: int):
+    return context.symbol_table.get("NULL").set_pos(start, end)
+
+
+def null(context: Context):
+    return context.symbol_table.get("NULL")
+
+
+def assign(context: Context, name: str, value: any):
+    context.symbol_table.set(name, value)
+    return value
+
+
+def make_list(context: Context, elements: list, start: int, end: int):
+    return List(elements).set_context(context).set_pos(start, end)
+
+
+def index(context: Context, list_instance: any, position: any):
+    result, error = list_instance[position]
+    if error:
+        raise Failure(with_context(error, context))
+    return result
+
+
+def arithmetic(context: Context, operation: int, left: any, right: any, start: int, end: int):
+    if type(left) is Number and type(right) is Number:
+        return new_value(Number, NUMBER_OPERATIONS[operation](left.value, right.value), left.context, start, end)
+    return binary(context, operation, left, right, start, end)
+
+
+def compare(context: Context, operation: int, left: any, right: any, start: int, end: int):
+    if type(left) is Number and type(right) is Number:
+        return new_value(Boolean, NUMBER_OPERATIONS[operation](left.value, right.value), None, start, end)
+    return binary(context, operation, left, right, start, end)
+
+
+def binary(context: Context, operation: int, left: any, right: any, start: int, end: int):
+    result, error = OPERATIONS[operation](left, right)
+    if error:
+        raise Failure(with_context(error, context))
+    return result.set_pos(start, end)
+
+
+def unary(operand: any, kind: int, start: int, end: int):
+    if isinstance(operand, Number):
+        if kind == UNARY_NEGATE:
+            operand, error = operand * Number(-1)
+    elif isinstance(operand, Boolean):
+        if kind == UNARY_NOT:
+            operand = Boolean(not operand.value).set_context(operand.context)
+    return operand.set_pos(start, end)
+
+
+def condition(value: any, start: int, end: int):
+    if not isinstance(value, (Number, Boolean)):
+        raise Failure(InvalidSyntaxError(start, end, "Invalid case - must evaluate to Boolean or Number."))
+    return value
+
+
+def match(context: Context, value: any, subject: any):
+    case_matched, error = value == subject
+    if error:
+        raise Failure(with_context(error, context))
+    return case_matched
+
+
+def make_function(context: Context, name: str, body_node: any, arg_names: list, should_auto_return: bool,
+                  start: int, end: int):
+    func_value = PSFunction(name, body_node, arg_names, should_auto_return).set_context(context).set_pos(start, end)
+    if name is not None:
+        context.symbol_table.set(name, func_value)
+    return func_value
+
+
+# Pseudocode functions are called as they are, anything else is copied as reading it would
+def callee(context: Context, name: str, start: int, end: int):
+    value = context.symbol_table.get(name)
+    if value is None:
+        raise Failure(RuntimeError(start, end, f"'{name}' is not defined.", context))
+    if not isinstance(value, PSFunction):
+        value = value.copy().set_context(context)
+    return value
+
+
+def prepare(value: any, start: int, end: int):
+    return value.copy().set_pos(start, end)
+
+
+def print_values(context: Context, print_list: list):
+    for obj in print_list[:-1]:
+        print(obj, end=" ")
+    print(print_list[-1])
+    return context.symbol_table.get("NULL")
+
+
+RUNTIME = {
+    "Number": Number, "String": String, "Boolean": Boolean, "Failure": Failure, "Return": Return,
+    "Continue": Continue, "new_value": new_value, "load": load, "load_null": load_null, "null": null,
+    "assign": assign, "make_list": make_list, "index": index, "arithmetic": arithmetic, "compare": compare,
+    "binary": binary, "unary": unary, "condition": condition, "match": match, "make_function": make_function,
+    "callee": callee, "prepare": prepare, "print_values": print_values, "for_counters": for_counters,
+}
+
+
+# Transpiles each tree to a Python module and runs that, so the work a tree walker does between
+# nodes is left to the Python interpreter. The modules are compiled under a filename of their own
+# with the span of every line kept, so a Python exception raised by the generated code is reported
+# as a PythonError at the pseudocode it came from. A tree nested too deeply for Python to compile
+# is run by the tree walker instead.
+class PythonEngine(Interpreter):
+    def __init__(self):
+        super().__init__()
+        self.transpiler = Transpiler()
+        self.bodies = {}
+        self.source_maps = {}
+        self.runtime = dict(
+            RUNTIME, call=self.call, call_name=self.call_name, tail_call=self.tail_call, input_node=self.input_node,
+            unknown_node=self.unknown_node
+        )
+
+    def visit(self, node: any, context: Context) -> RTResult:
+        res = RTResult()
+        namespace = self.load(self.transpiler.transpile(node))
+        if namespace is None:
+            return Interpreter().visit(node, context)
+
+        try:
+            return res.success(namespace["_main"](context))
+        except Failure as failure:
+            return res.failure(failure.error)
+        except Return as signal:
+            return res.success_return(signal.value)
+        except Continue:
+            return res.success_continue()
+        except Exception as exception:
+            return res.failure(self.python_error(exception))
+
+    # Compiles and runs the module, giving its globals, or None when Python cannot compile it
+    def load(self, module: any):
+        try:
+            code = compile(module.source, module.filename, "exec")
+        except (SyntaxError, RecursionError):
+            return None
+
+        namespace = dict(self.runtime)
+        namespace.update(module.constants)
+        exec(code, namespace)
+        self.source_maps[module.filename] = module.spans
+        for name, body_node in module.functions:
+            self.bodies[body_node] = namespace[name]
+        return namespace
+
+    def python_error(self, exception: Exception):
+        generated = None
+        traceback = exception.__traceback__
+        while traceback is not None:
+            if traceback.tb_frame.f_code.co_filename in self.source_maps:
+                generated = traceback
+            traceback = traceback.tb_next
+        if generated is None:
+            raise exception
+
+        start, end = self.source_maps[generated.tb_frame.f_code.co_filename][generated.tb_lineno - 1]
+        return PythonError(start, end, exception, generated.tb_frame.f_locals["ctx"])
+
+    # The function running body_node, for functions made by code this engine did not transpile
+    def function_body(self, function: PSFunction):
+        body = self.bodies.get(function.body_node)
+        if body is not None:
+            return body
+
+        module = self.transpiler.transpile_function(function.body_node, function.should_auto_return)
+        if self.load(module) is not None:
+            return self.bodies[function.body_node]
+
+        def tree_body(exec_ctx):
+            res = RTResult()
+            value = res.register(Interpreter().visit(function.body_node, exec_ctx))
+            if res.error:
+                raise Failure(res.error)
+            if res.func_return_value:
+                return res.func_return_value
+            if res.loop_should_continue:
+                raise Continue()
+            return (value if function.should_auto_return else None) or exec_ctx.symbol_table.get("NULL")
+        return tree_body
+
+    def call_name(self, context: Context, function: any, args: list, start: int, end: int):
+        if isinstance(function, PSFunction):
+            return self.call_function(function, context, args, start, end, context)
+        return self.call_value(function.set_pos(start, end), args, start, end, context)
+
+    # A call marked is_tail_call, which gives a TailCall for call_function to run when it can
+    def tail_call(self, context: Context, function: any, args: list, node: any, start: int, end: int):
+        if isinstance(function, PSFunction) and len(args) == len(function.arg_names):
+            return TailCall(function, args, node)
+        return self.call_name(context, function, args, start, end)
+
+    def call(self, context: Context, function: any, args: list, start: int, end: int):
+        if isinstance(function, PSFunction):
+            return self.call_function(function, function.context, args, start, end, context)
+        return self.call_value(function, args, start, end, context)
+
+    def call_function(self, function: PSFunction, parent: Context, args: list, start: int, end: int,
+                      context: Context):
+        arg_names = function.arg_names
+        if len(args) != len(arg_names):
+            raise Failure(with_context(RuntimeError(
+                start, end,
+                f"Invalid number of arguments passed to function.\n"
+                f"You passed {len(args)} arguments. The function expects {len(arg_names)} arguments.",
+                parent
+            ), context))
+
+        exec_ctx = Context(function.name, parent, start)
+        exec_ctx.symbol_table = SymbolTable(parent.symbol_table)
+
+        while True:
+            for name, value in zip(function.arg_names, args):
+                exec_ctx.symbol_table.set(name, value.set_context(exec_ctx))
+
+            body = self.bodies.get(function.body_node) or self.function_body(function)
+            return_value = body(exec_ctx)
+            if type(return_value) is not TailCall:
+                break
+            # A call of the function itself runs again in the same context, anything else in one under it
+            if return_value.function.body_node is not function.body_node:
+                function = return_value.function
+                exec_ctx = Context(function.name, exec_ctx, return_value.node.start_position)
+                exec_ctx.symbol_table = SymbolTable(exec_ctx.parent.symbol_table)
+            args = return_value.args
+
+        if type(return_value) in PRIMITIVES:
+            return new_value(type(return_value), return_value.value, context, start, end)
+        return return_value.copy().set_pos(start, end).set_context(context)
+
+    @staticmethod
+    def call_value(function: any, args: list, start: int, end: int, context: Context):
+        res = function(args)
+        if res.error:
+            raise Failure(with_context(res.error, context))
+        return_value = res.value
+        if type(return_value) in PRIMITIVES:
+            return new_value(type(return_value), return_value.value, context, start, end)
+        return return_value.copy().set_pos(start, end).set_context(context)
+
+    def input_node(self, context: Context, node: any):
+        return self.visit_input_node(node, context).value
+
+    def unknown_node(self, context: Context, node: any):
+        raise Failure(self.no_visit_method(node, context).error)
@@ -0,0 +1,309 @@
+from .context import Context
+from .runtime_result import RTResult
+from .interpreter import (
+    Interpreter, Number, String, Boolean, List, PSFunction, BINARY_OPERATIONS, KEYWORD_OPERATIONS, with_context,
+    stamp, unshare, for_counters, TailCall
+)
+from .closure_interpreter import Failure, Return, Continue, Break
+from ..errors import RuntimeError, InvalidSyntaxError
+from ..parser.nodes import (
+    NumberNode, StringNode, BooleanNode, NullNode, ConstantNode, BinOpNode, UnaryOpNode, VarAccessNode,
+    VarAssignNode, IfNode, CaseNode, ListNode, ForNode, WhileNode, ListIndexNode, RepeatNode, FuncDefNode,
+    CallNode, ReturnNode, ContinueNode, BreakNode, PrintNode, InputNode
+)
+from ..lexer.tokens import TokenKind
+
+
+# A tree walker whose evaluate_ methods give a node's value as it is, instead of in an RTResult that
+# every parent registers and checks with should_return(). An error, RETURN, CONTINUE or BREAK is
+# raised as Failure, Return, Continue or Break, and only the loops and function calls catch them.
+# BREAK leaves the loop here, where the tree walker goes on with the next iteration as it does for
+# CONTINUE, so a program using BREAK prints differently in this engine.
+# Every evaluate_ method otherwise does what the matching Interpreter.visit_ method does, and visit
+# still gives an RTResult for whoever runs a tree or a function body with it.
+class RaisingInterpreter(Interpreter):
+    def __init__(self):
+        super().__init__()
+        self.evaluators = {}
+
+    def visit(self, node: any, context: Context) -> RTResult:
+        res = RTResult()
+        try:
+            return res.success(self.evaluate(node, context))
+        except Failure as failure:
+            return res.failure(failure.error)
+        except Return as signal:
+            return res.success_return(signal.value)
+        except Continue:
+            return res.success_continue()
+
+    def evaluate(self, node: any, context: Context):
+        try:
+            method = self.evaluators[type(node)]
+        except KeyError:
+            method = self.evaluators[type(node)] = self.evaluator(type(node))
+        return method(node, context)
+
+    def evaluator(self, node_class: type):
+        method_name = "evaluate" + self.get_method_name(node_class.__name__)[len("visit"):]
+        return getattr(self, method_name, self.evaluate_unknown_node)
+
+    def evaluate_unknown_node(self, node: any, context: Context):
+        raise Failure(self.no_visit_method(node, context).error)
+
+    @staticmethod
+    def evaluate_number_node(node: NumberNode, context: Context):
+        return Number(node.tok.value).set_context(context).set_pos(node.start_position, node.end_position)
+
+    @staticmethod
+    def evaluate_string_node(node: StringNode, context: Context):
+        return String(node.tok.value).set_context(context).set_pos(node.start_position, node.end_position)
+
+    @staticmethod
+    def evaluate_boolean_node(node: BooleanNode, context: Context):
+        return Boolean(node.tok.value == "TRUE").set_context(context).set_pos(node.start_position, node.end_position)
+
+    @staticmethod
+    def evaluate_constant_node(node: ConstantNode, _context: Context):
+        return node.value
+
+    @staticmethod
+    def evaluate_null_node(node: NullNode, context: Context):
+        return context.symbol_table.get("NULL").set_pos(node.start_position, node.end_position)
+
+    def evaluate_list_node(self, node: ListNode, context: Context):
+        if node.is_statement:
+            for element_node in node.element_nodes:
+                self.evaluate(element_node, context)
+            return context.symbol_table.get("NULL")
+
+        elements = [unshare(self.evaluate(element_node, context), element_node, context)
+                    for element_node in node.element_nodes]
+        return List(elements).set_context(context).set_pos(node.start_position, node.end_position)
+
+    def evaluate_list_index_node(self, node: ListIndexNode, context: Context):
+        list_instance = self.evaluate(node.list_instance, context)
+        index = self.evaluate(node.index, context)
+
+        result, error = list_instance[index]
+        if error:
+            result, error = stamp(list_instance, node.list_instance, context)[stamp(index, node.index, context)]
+            raise Failure(with_context(error, context))
+        return result
+
+    def evaluate_bin_op_node(self, node: BinOpNode, context: Context):
+        left = self.evaluate(node.left_node, context)
+        right = self.evaluate(node.right_node, context)
+        if node.op_tok.kind == TokenKind.KEYWORD:
+            operation = KEYWORD_OPERATIONS.get(node.op_tok.value)
+        else:
+            operation = BINARY_OPERATIONS.get(node.op_tok.kind)
+
+        result, error = operation(left, right)
+        if error:
+            result, error = operation(stamp(left, node.left_node, context), stamp(right, node.right_node, context))
+            raise Failure(with_context(error, context))
+        return result.set_pos(node.start_position, node.end_position)
+
+    def evaluate_unary_op_node(self, node: UnaryOpNode, context: Context):
+        operand = unshare(self.evaluate(node.node, context), node.node, context)
+        if isinstance(operand, Number):
+            if node.op_tok.kind == TokenKind.MINUS:
+                operand, error = operand * Number(-1)
+        elif isinstance(operand, Boolean):
+            if node.op_tok.matches_keyword("NOT"):
+                operand = Boolean(not operand.value).set_context(operand.context)
+        return operand.set_pos(node.start_position, node.end_position)
+
+    @staticmethod
+    def evaluate_var_access_node(node: VarAccessNode, context: Context):
+        var_name = node.var_name_tok.value
+        value = context.symbol_table.get(var_name)
+        if value is None:
+            raise Failure(RuntimeError(
+                node.start_position, node.end_position,
+                f"'{var_name}' is not defined.", context
+            ))
+        return value
+
+    def evaluate_var_assign_node(self, node: VarAssignNode, context: Context):
+        value = unshare(self.evaluate(node.value_node, context), node.value_node, context)
+        context.symbol_table.set(node.var_name_tok.value, value)
+        return value
+
+    def evaluate_if_node(self, node: IfNode, context: Context):
+        for condition, expr, should_auto_return in node.cases:
+            condition_value = self.evaluate(condition, context)
+            if not isinstance(condition_value, (Number, Boolean)):
+                raise Failure(InvalidSyntaxError(
+                    node.start_position, node.end_position,
+                    "Invalid case - must evaluate to Boolean or Number."
+                ))
+            if condition_value:
+                expr_value = self.evaluate(expr, context)
+                return expr_value if not should_auto_return else context.symbol_table.get("NULL")
+
+        if node.else_case:
+            expr, should_auto_return = node.else_case
+            else_value = self.evaluate(expr, context)
+            return else_value if not should_auto_return else context.symbol_table.get("NULL")
+
+        return context.symbol_table.get("NULL")
+
+    def evaluate_case_node(self, node: CaseNode, context: Context):
+        var_value = context.symbol_table.get(node.var_name_tok.value)
+
+        for value, response, should_auto_return in node.cases:
+            condition_value = self.evaluate(value, context)
+            case_matched, error = condition_value == var_value
+            if error:
+                case_matched, error = stamp(condition_value, value, context) == var_value
+                raise Failure(with_context(error, context))
+
+            if case_matched:
+                expr_value = self.evaluate(response, context)
+                return context.symbol_table.get("NULL") if should_auto_return else expr_value
+
+        if node.otherwise_case:
+            expr, should_auto_return = node.otherwise_case
+            otherwise_value = self.evaluate(expr, context)
+            return context.symbol_table.get("NULL") if should_auto_return else otherwise_value
+
+        return context.symbol_table.get("NULL")
+
+    def evaluate_for_node(self, node: ForNode, context: Context):
+        elements = []
+        collect = not (node.should_auto_return or node.is_statement)
+        var_name = node.var_name_tok.value
+        start_value = self.evaluate(node.start_value_node, context)
+        end_value = self.evaluate(node.end_value_node, context)
+        step_value = self.evaluate(node.step_value_node, context) if node.step_value_node else Number(1.0)
+
+        context.symbol_table.set(var_name, start_value)
+
+        for i in for_counters(start_value, end_value, step_value):
+            context.symbol_table.set(var_name, i)
+            try:
+                value = self.evaluate(node.body_node, context)
+            except Break:
+                break
+            except Continue:
+                continue
+            if collect:
+                elements.append(value)
+
+        return (List(elements).set_context(context).set_pos(node.start_position, node.end_position)
+                if collect
+                else context.symbol_table.get("NULL"))
+
+    def evaluate_while_node(self, node: WhileNode, context: Context):
+        elements = []
+        collect = node.should_auto_return and not node.is_statement
+
+        while self.evaluate(node.condition_node, context):
+            try:
+                value = self.evaluate(node.body_node, context)
+            except Break:
+                break
+            except Continue:
+                continue
+            if collect:
+                elements.append(value)
+
+        return (List(elements).set_context(context).set_pos(node.start_position, node.end_position)
+                if collect
+                else context.symbol_table.get("NULL"))
+
+    def evaluate_repeat_node(self, node: RepeatNode, context: Context):
+        elements = []
+        collect = node.should_auto_return and not node.is_statement
+
+        while True:
+            try:
+                value = self.evaluate(node.body_node, context)
+            except Break:
+                break
+            except Continue:
+                continue
+            if collect:
+                elements.append(value)
+
+            if self.evaluate(node.condition_node, context):
+                break
+
+        return (List(elements).set_context(context).set_pos(node.start_position, node.end_position)
+                if collect
+                else context.symbol_table.get("NULL"))
+
+    @staticmethod
+    def evaluate_func_def_node(node: FuncDefNode, context: Context):
+        func_name = node.var_name_tok.value if node.var_name_tok else None
+        arg_names = [arg_name.value for arg_name in node.arg_name_toks]
+        func_value = PSFunction(func_name, node.body_node, arg_names, node.should_auto_return).set_context(
+            context).set_pos(node.start_position, node.end_position)
+
+        if func_name:
+            context.symbol_table.set(func_name, func_value)
+
+        return func_value
+
+    def evaluate_call_node(self, node: CallNode, context: Context):
+        value_to_call = self.evaluate(node.node_to_call, context)
+        parent = self.call_parent(value_to_call, node, context)
+        if not isinstance(value_to_call, PSFunction):
+            value_to_call = value_to_call.copy().set_pos(node.start_position, node.end_position).set_context(parent)
+
+        args = [self.evaluate(arg_node, context) for arg_node in node.arg_nodes]
+
+        if not isinstance(value_to_call, PSFunction):
+            res = value_to_call(args, self)
+            if res.error:
+                raise Failure(with_context(res.error, context))
+            return res.value
+
+        if node.is_tail_call and len(args) == len(value_to_call.arg_names):
+            return TailCall(value_to_call, args, node)
+
+        exec_ctx, error = self.call_context(value_to_call, parent, args, node)
+        if error:
+            raise Failure(with_context(error, context))
+
+        while True:
+            # PSFunction.return_value, with a RETURN in the body caught here rather than registered
+            try:
+                value = self.evaluate(value_to_call.body_node, exec_ctx)
+            except Return as signal:
+                value = signal.value
+            else:
+                value = (value if value_to_call.should_auto_return else None) or exec_ctx.symbol_table.get("NULL")
+
+            if type(value) is not TailCall:
+                return value
+            value_to_call, exec_ctx = self.tail_call_context(value_to_call, exec_ctx, value)
+
+    def evaluate_print_node(self, node: PrintNode, context: Context):
+        print_list = [self.evaluate(obj, context) for obj in node.objects_to_print]
+
+        for obj in print_list[:-1]:
+            print(obj, end=" ")
+
+        print(print_list[-1])
+        return context.symbol_table.get("NULL")
+
+    def evaluate_input_node(self, node: InputNode, context: Context):
+        return self.visit_input_node(node, context).value
+
+    def evaluate_return_node(self, node: ReturnNode, context: Context):
+        if node.node_to_return:
+            value = self.evaluate(node.node_to_return, context)
+        else:
+            value = context.symbol_table.get("NULL")
+        raise Return(value or context.symbol_table.get("NULL"))
+
+    @staticmethod
+    def evaluate_continue_node(_node: ContinueNode, _context: Context):
+        raise Continue()
+
+    @staticmethod
+    def evaluate_break_node(_node: BreakNode, _context: Context):
+        raise Break()
@@ -0,0 +1,44 @@
+from ..parser.nodes import VarAssignNode, ForNode, FuncDefNode, InputNode, child_slots
+
+
+# The nodes of a tree in source order, leaving out the bodies of the functions it defines
+def scope_nodes(node: any):
+    stack = [node]
+    while stack:
+        obj = stack.pop()
+        cls = type(obj)
+        if cls is list or cls is tuple:
+            stack.extend(reversed(obj))
+            continue
+        slots = child_slots(cls)
+        if slots is None:
+            continue
+        yield obj
+        if cls is not FuncDefNode:
+            stack.extend(getattr(obj, name) for name in reversed(slots))
+
+
+# Numbers the variables of each scope so compiled code can keep them in the slots of a
+# FrameSymbolTable. Scoping is dynamic, so a function can read any variable of whoever called it:
+# only the names a body binds itself (its parameters, assignments, FOR variables, INPUT variables and
+# named functions) get slots, and every other name is still looked up through the symbol tables.
+class Resolver:
+    def __init__(self):
+        self.scopes = {}
+
+    @staticmethod
+    def bound_names(node: any):
+        names = {}
+        for obj in scope_nodes(node):
+            if type(obj) in (VarAssignNode, ForNode, InputNode) or (type(obj) is FuncDefNode and obj.var_name_tok):
+                names[obj.var_name_tok.value] = None
+        return list(names)
+
+    # The slot of each name the function with this body binds, its parameters first
+    def scope(self, body_node: any, arg_names: list):
+        index = self.scopes.get(body_node)
+        if index is None:
+            index = self.scopes[body_node] = {}
+            for name in arg_names + self.bound_names(body_node):
+                index.setdefault(name, len(index))
+        return index
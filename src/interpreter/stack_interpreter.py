@@ -0,0 +1,385 @@
+from types import GeneratorType
+from .context import Context
+from .interpreter import (
+    Interpreter, RTResult, Number, Boolean, List, PSFunction, BINARY_OPERATIONS, KEYWORD_OPERATIONS, with_context,
+    stamp, unshare, for_counters, TailCall
+)
+from ..errors import RuntimeError, InvalidSyntaxError
+from ..lexer.tokens import TokenKind
+from ..parser.stack_parser import MAX_DEPTH
+from ..parser.nodes import (
+    BinOpNode, UnaryOpNode, VarAssignNode, IfNode, CaseNode, ListNode, ForNode, WhileNode,
+    ListIndexNode, RepeatNode, CallNode, ReturnNode, PrintNode
+)
+
+MAX_CALL_DEPTH = 20000
+
+
+# Same semantics as Interpreter, but every node that evaluates children is a generator which yields
+# (node, context) pairs instead of calling visit(). visit() drives them from a list, and calls to
+# pseudocode functions are run on that same list rather than by PSFunction.__call__, so both nesting
+# and recursion are bounded by the limits below rather than by the Python call stack.
+class StackInterpreter(Interpreter):
+    def __init__(self, max_depth: int = MAX_DEPTH, max_call_depth: int = MAX_CALL_DEPTH):
+        super().__init__()
+        self.max_depth = max_depth
+        self.max_call_depth = max_call_depth
+        self.call_depth = 0
+
+    def visit(self, node: any, context: Context) -> RTResult:
+        dispatch = super().visit
+        result = dispatch(node, context)
+        if not isinstance(result, GeneratorType):
+            return result
+
+        stack = [result]
+        res = None
+        while True:
+            try:
+                node, context = stack[-1].send(res)
+            except StopIteration as stop:
+                stack.pop()
+                if not stack:
+                    return stop.value
+                res = stop.value
+                continue
+
+            if len(stack) >= self.max_depth:
+                res = RTResult().failure(RuntimeError(
+                    node.start_position, node.end_position,
+                    f"Evaluation is nested too deeply, the evaluator is limited to {self.max_depth} levels.",
+                    context
+                ))
+                continue
+
+            res = dispatch(node, context)
+            if isinstance(res, GeneratorType):
+                stack.append(res)
+                res = None
+
+    def visit_list_node(self, node: ListNode, context: Context) -> RTResult:
+        res = RTResult()
+        elements = []
+
+        for element_node in node.element_nodes:
+            element = res.register((yield element_node, context))
+            if res.should_return():
+                return res
+            if not node.is_statement:
+                elements.append(unshare(element, element_node, context))
+
+        if node.is_statement:
+            return res.success(context.symbol_table.get("NULL"))
+        return res.success(
+            List(elements).set_context(context).set_pos(node.start_position, node.end_position)
+        )
+
+    def visit_list_index_node(self, node: ListIndexNode, context: Context) -> RTResult:
+        res = RTResult()
+        list_instance = res.register((yield node.list_instance, context))
+        if res.should_return():
+            return res
+        index = res.register((yield node.index, context))
+        if res.should_return():
+            return res
+
+        result, error = list_instance[index]
+        if error:
+            result, error = stamp(list_instance, node.list_instance, context)[stamp(index, node.index, context)]
+            return res.failure(with_context(error, context))
+        return res.success(result)
+
+    def visit_bin_op_node(self, node: BinOpNode, context: Context):
+        res = RTResult()
+        left = res.register((yield node.left_node, context))
+        if res.should_return():
+            return res
+        right = res.register((yield node.right_node, context))
+        if res.should_return():
+            return res
+        if node.op_tok.kind == TokenKind.KEYWORD:
+            operation = KEYWORD_OPERATIONS.get(node.op_tok.value)
+        else:
+            operation = BINARY_OPERATIONS.get(node.op_tok.kind)
+
+        if operation is None:
+            result, error = None, None
+        else:
+            result, error = operation(left, right)
+        if error:
+            result, error = operation(stamp(left, node.left_node, context), stamp(right, node.right_node, context))
+            return res.failure(with_context(error, context))
+        else:
+            return res.success(result.set_pos(node.start_position, node.end_position))
+
+    def visit_unary_op_node(self, node: UnaryOpNode, context: Context):
+        res = RTResult()
+        operand = res.register((yield node.node, context))
+
+        if res.should_return():
+            return res
+
+        operand = unshare(operand, node.node, context)
+        if isinstance(operand, Number):
+            if node.op_tok.kind == TokenKind.MINUS:
+                operand, error = operand * Number(-1)
+            elif node.op_tok.kind == TokenKind.PLUS:
+                pass
+        elif isinstance(operand, Boolean):
+            if node.op_tok.matches_keyword("NOT"):
+                operand = Boolean(not operand.value).set_context(operand.context)
+
+        return res.success(operand.set_pos(node.start_position, node.end_position))
+
+    def visit_var_assign_node(self, node: VarAssignNode, context: Context):
+        res = RTResult()
+        var_name = node.var_name_tok.value
+        value = res.register((yield node.value_node, context))
+        if res.should_return():
+            return res
+        value = unshare(value, node.value_node, context)
+        context.symbol_table.set(var_name, value)
+        return res.success(value)
+
+    def visit_if_node(self, node: IfNode, context: Context):
+        res = RTResult()
+
+        for condition, expr, should_auto_return in node.cases:
+            condition_value = res.register((yield condition, context))
+            if res.should_return():
+                return res
+
+            if isinstance(condition_value, (Number, Boolean)):
+                if condition_value:
+                    expr_value = res.register((yield expr, context))
+                    if res.should_return():
+                        return res
+                    return res.success(expr_value if not should_auto_return else context.symbol_table.get("NULL"))
+            else:
+                return res.failure(InvalidSyntaxError(
+                    node.start_position, node.end_position,
+                    "Invalid case - must evaluate to Boolean or Number."
+                ))
+
+        if node.else_case:
+            expr, should_auto_return = node.else_case
+            else_value = res.register((yield expr, context))
+            if res.should_return():
+                return res
+            return res.success(else_value if not should_auto_return else context.symbol_table.get("NULL"))
+
+        return res.success(context.symbol_table.get("NULL"))
+
+    def visit_case_node(self, node: CaseNode, context: Context) -> RTResult:
+        res = RTResult()
+
+        var_value = context.symbol_table.get(node.var_name_tok.value)
+
+        for value, response, should_auto_return in node.cases:
+            condition_value = res.register((yield value, context))
+            if res.should_return():
+                return res
+
+            case_matched, error = condition_value == var_value
+            if error:
+                case_matched, error = stamp(condition_value, value, context) == var_value
+                return res.failure(with_context(error, context))
+
+            if case_matched:
+                expr_value = res.register((yield response, context))
+                if res.should_return():
+                    return res
+                return res.success(context.symbol_table.get("NULL") if should_auto_return else expr_value)
+
+        else:
+            if node.otherwise_case:
+                expr, should_auto_return = node.otherwise_case
+                otherwise_value = res.register((yield expr, context))
+                if res.should_return():
+                    return res
+                return res.success(context.symbol_table.get("NULL") if should_auto_return else otherwise_value)
+
+        return res.success(context.symbol_table.get("NULL"))
+
+    def visit_for_node(self, node: ForNode, context: Context) -> RTResult:
+        res = RTResult()
+        elements = []
+        collect = not (node.should_auto_return or node.is_statement)
+        start_value = res.register((yield node.start_value_node, context))
+        if res.should_return():
+            return res
+
+        end_value = res.register((yield node.end_value_node, context))
+        if res.should_return():
+            return res
+
+        if node.step_value_node:
+            step_value = res.register((yield node.step_value_node, context))
+            if res.should_return():
+                return res
+        else:
+            step_value = Number(1.0)
+
+        context.symbol_table.set(node.var_name_tok.value, start_value)
+
+        for i in for_counters(start_value, end_value, step_value):
+            context.symbol_table.set(node.var_name_tok.value, i)
+            value = res.register((yield node.body_node, context))
+            if res.should_return() and not res.loop_should_continue and not res.loop_should_break:
+                return res
+
+            if res.loop_should_continue:
+                continue
+
+            if res.loop_should_break:
+                break
+
+            if collect:
+                elements.append(value)
+
+        return res.success(List(elements).set_context(context).set_pos(node.start_position, node.end_position)
+                           if collect
+                           else context.symbol_table.get("NULL"))
+
+    def visit_while_node(self, node: WhileNode, context: Context):
+        res = RTResult()
+        elements = []
+        collect = node.should_auto_return and not node.is_statement
+
+        while True:
+            condition = res.register((yield node.condition_node, context))
+            if res.should_return():
+                return res
+
+            if not condition:
+                break
+
+            value = res.register((yield node.body_node, context))
+
+            if res.should_return() and not res.loop_should_continue and not res.loop_should_break:
+                return res
+
+            if res.loop_should_continue:
+                continue
+
+            if res.loop_should_break:
+                break
+
+            if collect:
+                elements.append(value)
+
+        return res.success(
+            List(elements).set_context(context).set_pos(node.start_position, node.end_position)
+            if collect
+            else context.symbol_table.get("NULL")
+        )
+
+    def visit_repeat_node(self, node: RepeatNode, context: Context):
+        res = RTResult()
+        elements = []
+        collect = node.should_auto_return and not node.is_statement
+
+        while True:
+            value = res.register((yield node.body_node, context))
+
+            if res.should_return() and not res.loop_should_continue and not res.loop_should_break:
+                return res
+
+            if res.loop_should_continue:
+                continue
+
+            if res.loop_should_break:
+                break
+
+            if collect:
+                elements.append(value)
+
+            condition = res.register((yield node.condition_node, context))
+            if res.should_return():
+                return res
+
+            if condition:
+                break
+
+        return res.success(
+            List(elements).set_context(context).set_pos(node.start_position, node.end_position)
+            if collect
+            else context.symbol_table.get("NULL")
+        )
+
+    def visit_call_node(self, node: CallNode, context: Context):
+        res = RTResult()
+        args = []
+
+        value_to_call = res.register((yield node.node_to_call, context))
+        if res.should_return():
+            return res
+        parent = self.call_parent(value_to_call, node, context)
+        if not isinstance(value_to_call, PSFunction):
+            value_to_call = value_to_call.copy().set_pos(node.start_position, node.end_position).set_context(parent)
+
+        for arg_node in node.arg_nodes:
+            args.append(res.register((yield arg_node, context)))
+            if res.should_return():
+                return res
+
+        if isinstance(value_to_call, PSFunction):
+            if node.is_tail_call and len(args) == len(value_to_call.arg_names):
+                return res.success(TailCall(value_to_call, args, node))
+
+            if self.call_depth >= self.max_call_depth:
+                return res.failure(RuntimeError(
+                    node.start_position, node.end_position,
+                    f"Maximum recursion depth of {self.max_call_depth} exceeded.", context
+                ))
+
+            exec_ctx, error = self.call_context(value_to_call, parent, args, node)
+            if error:
+                return res.failure(with_context(error, context))
+
+            self.call_depth += 1
+            body_result = yield value_to_call.body_node, exec_ctx
+            call_result = value_to_call.return_value(body_result, exec_ctx)
+            while type(call_result.value) is TailCall:
+                value_to_call, exec_ctx = self.tail_call_context(value_to_call, exec_ctx, call_result.value)
+                body_result = yield value_to_call.body_node, exec_ctx
+                call_result = value_to_call.return_value(body_result, exec_ctx)
+            self.call_depth -= 1
+        else:
+            call_result = value_to_call(args)
+
+        return_value = res.register(call_result)
+        if res.error:
+            return res.failure(with_context(res.error, context))
+        if res.should_return():
+            return res
+        return res.success(return_value)
+
+    def visit_print_node(self, node: PrintNode, context: Context):
+        res = RTResult()
+
+        print_list = []
+
+        for obj in node.objects_to_print:
+            value = res.register((yield obj, context))
+            if res.should_return():
+                return res
+
+            print_list.append(value)
+
+        for obj in print_list[:-1]:
+            print(obj, end=" ")
+
+        print(print_list[-1])
+        return res.success(context.symbol_table.get("NULL"))
+
+    def visit_return_node(self, node: ReturnNode, context: Context):
+        res = RTResult()
+
+        if node.node_to_return:
+            value = res.register((yield node.node_to_return, context))
+            if res.should_return():
+                return res
+        else:
+            value = context.symbol_table.get("NULL")
+        return res.success_return(value or context.symbol_table.get("NULL"))
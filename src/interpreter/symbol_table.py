@@ -1,16 +1,57 @@
 class SymbolTable:
+    # Names kept in slots rather than in symbols, by slot. Only a FrameSymbolTable has any.
+    index = {}
+    slots = ()
+
     def __init__(self, parent=None):
         self.symbols = {}
         self.parent = parent
 
     def get(self, name):
-        value = self.symbols.get(name)
-        if value is None and self.parent:
-            return self.parent.get(name)
-        return value
+        table = self
+        while table:
+            value = table.symbols.get(name)
+            if value is None and name in table.index:
+                value = table.slots[table.index[name]]
+            if value is not None:
+                return value
+            table = table.parent
+        return None
 
     def set(self, name, value):
         self.symbols[name] = value
 
     def remove(self, name):
         self.symbols.pop(name)
+
+
+# A symbol table keeping the names in index in a list of slots, which compiled code reads and writes
+# by position. A slot is None until its name is set, and the names of one function share one index.
+class FrameSymbolTable(SymbolTable):
+    def __init__(self, index, parent=None):
+        self.symbols = {}
+        self.parent = parent
+        self.index = index
+        self.slots = [None] * len(index)
+
+    def set(self, name, value):
+        slot = self.index.get(name)
+        if slot is None:
+            self.symbols[name] = value
+        else:
+            self.slots[slot] = value
+
+    def remove(self, name):
+        slot = self.index.get(name)
+        if slot is None or self.slots[slot] is None:
+            self.symbols.pop(name)
+        else:
+            self.slots[slot] = None
+
+    # The slot of name, given one at the end if it has none, for a table whose index is its own
+    def slot(self, name):
+        slot = self.index.get(name)
+        if slot is None:
+            slot = self.index[name] = len(self.slots)
+            self.slots.append(self.symbols.pop(name, None))
+        return slot
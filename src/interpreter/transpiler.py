@@ -0,0 +1,445 @@
+from .bytecode import OPERATORS, UNARY_PLUS, UNARY_NEGATE, UNARY_NOT
+from .closure_interpreter import NUMBER_ARITHMETIC, NUMBER_COMPARISONS
+from .interpreter import Interpreter, Number, String, Boolean
+from ..lexer.tokens import TokenKind
+from ..parser.nodes import (
+    NumberNode, StringNode, BooleanNode, NullNode, ConstantNode, BinOpNode, UnaryOpNode, VarAccessNode,
+    VarAssignNode, IfNode, CaseNode, ListNode, ForNode, WhileNode, ListIndexNode, RepeatNode, FuncDefNode,
+    CallNode, ReturnNode, ContinueNode, BreakNode, PrintNode, InputNode, child_slots
+)
+
+
+# Python source generated from one tree. spans[i] is the pseudocode span line i + 1 came from,
+# constants are the globals the source expects besides the runtime, and functions pairs the name of
+# each generated function with the body node it runs.
+class PythonModule:
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.source = ""
+        self.spans = []
+        self.constants = {}
+        self.functions = []
+
+
+def contains_call(node: any):
+    stack = [node]
+    while stack:
+        obj = stack.pop()
+        cls = type(obj)
+        if cls is list or cls is tuple:
+            stack.extend(obj)
+            continue
+        if cls is CallNode:
+            return True
+        slots = child_slots(cls)
+        if slots is not None:
+            stack.extend(getattr(obj, name) for name in slots)
+    return False
+
+
+# The span of node and everything under it. Some nodes span less than their children, such as a
+# VarAssignNode, which ends where its name does.
+def extent(node: any):
+    start, end = node.start_position, node.end_position
+    stack = [node]
+    while stack:
+        obj = stack.pop()
+        cls = type(obj)
+        if cls is list or cls is tuple:
+            stack.extend(obj)
+            continue
+        slots = child_slots(cls)
+        if slots is not None:
+            start = min(start, obj.start_position)
+            end = max(end, obj.end_position)
+            stack.extend(getattr(obj, name) for name in slots)
+    return start, end
+
+
+# Translates a tree into the source of a Python module for the PythonEngine. Pseudocode variables
+# stay in the symbol tables, since a function sees the variables of whoever calls it, and every
+# operation calls the same runtime helper or value method the interpreters use, so the generated
+# code keeps their semantics; what it saves is the dispatch between nodes. Each pseudocode function
+# becomes a Python function taking its context, and the program itself becomes _main.
+#
+# Expressions translate to Python expressions. IF, CASE and the loops are statements in Python, so
+# they are written out before the expression that uses them, with their value in a temporary; any
+# operand to their left is moved into a temporary first, so it is still evaluated before them.
+class Transpiler:
+    # Nodes whose translate method takes keep, the rest are translated and then dropped
+    STATEMENT_NODES = (ListNode, IfNode, CaseNode, ForNode, WhileNode, RepeatNode, ReturnNode, ContinueNode, BreakNode)
+
+    def __init__(self):
+        self.translators = {}
+        self.modules = 0
+        self.module = None
+        self.names = 0
+        self.pure = set()
+        self.lines = None
+        self.indent = 0
+        self.loops = 0
+        self.in_function = False
+
+    def transpile(self, node: any):
+        self.begin_module()
+        self.function("_main", node, False, False)
+        return self.end_module()
+
+    # A module defining just the function that runs body_node
+    def transpile_function(self, body_node: any, should_auto_return: bool):
+        self.begin_module()
+        name = self.function(self.name("_f"), body_node, should_auto_return, True)
+        self.module.functions.append((name, body_node))
+        return self.end_module()
+
+    def begin_module(self):
+        self.module = PythonModule(f"<pscode-{self.modules}>")
+        self.modules += 1
+        self.names = 0
+        self.pure = {"None"}
+        self.blocks = []
+
+    def end_module(self):
+        module = self.module
+        lines = []
+        for block in self.blocks:
+            for indent, text, start, end in block:
+                lines.append("    " * indent + text)
+                module.spans.append((start, end))
+        module.source = "\n".join(lines) + "\n"
+        self.module = self.blocks = None
+        return module
+
+    def function(self, name: str, node: any, should_auto_return: bool, in_function: bool):
+        state = (self.lines, self.indent, self.loops, self.in_function)
+        self.lines, self.indent, self.loops, self.in_function = [], 0, 0, in_function
+
+        self.emit(f"def {name}(ctx):", node)
+        self.indent = 1
+        if should_auto_return:
+            self.emit(f"return {self.value(node)} or null(ctx)", node)
+        else:
+            self.translate(node, False)
+            self.emit("return null(ctx)", node)
+
+        self.blocks.append(self.lines)
+        self.lines, self.indent, self.loops, self.in_function = state
+        return name
+
+    def emit(self, text: str, node: any):
+        self.lines.append((self.indent, text) + extent(node))
+
+    def name(self, prefix: str):
+        self.names += 1
+        return f"{prefix}{self.names}"
+
+    def temp(self):
+        name = self.name("_t")
+        self.pure.add(name)
+        return name
+
+    def constant(self, value: any):
+        name = self.name("_c")
+        self.module.constants[name] = value
+        self.pure.add(name)
+        return name
+
+    def translate(self, node: any, keep: bool = True):
+        try:
+            translator = self.translators[type(node)]
+        except KeyError:
+            translator = self.translators[type(node)] = self.translator(type(node))
+
+        if isinstance(node, self.STATEMENT_NODES):
+            return translator(node, keep)
+        text = translator(node)
+        if keep:
+            return text
+        if text not in self.pure:
+            self.emit(text, node)
+        return None
+
+    def translator(self, node_class: type):
+        method_name = "translate" + Interpreter.get_method_name(node_class.__name__)[len("visit"):]
+        return getattr(self, method_name, self.translate_unknown_node)
+
+    def value(self, node: any):
+        return self.translate(node, True)
+
+    # The values of nodes, evaluated in order. first is the text and node of a value to go before them.
+    def values(self, nodes: list, first: tuple = None):
+        texts, sources = ([first[0]], [first[1]]) if first else ([], [])
+        for node in nodes:
+            mark = len(self.lines)
+            text = self.value(node)
+            if len(self.lines) > mark:
+                hoisted = []
+                for i, earlier in enumerate(texts):
+                    if earlier not in self.pure:
+                        texts[i] = self.temp()
+                        hoisted.append((self.indent, f"{texts[i]} = {earlier}",
+                                        sources[i].start_position, sources[i].end_position))
+                self.lines[mark:mark] = hoisted
+            texts.append(text)
+            sources.append(node)
+        return texts
+
+    def translate_unknown_node(self, node: any, *_):
+        return f"unknown_node(ctx, {self.constant(node)})"
+
+    def translate_constant_node(self, node: ConstantNode):
+        return self.constant(node.value)
+
+    def literal(self, value_class: type, value: any, node: any):
+        return f"new_value({value_class.__name__}, {self.constant(value)}, ctx, {node.start_position}, {node.end_position})"
+
+    def translate_number_node(self, node: NumberNode):
+        return self.literal(Number, node.tok.value, node)
+
+    def translate_string_node(self, node: StringNode):
+        return self.literal(String, node.tok.value, node)
+
+    def translate_boolean_node(self, node: BooleanNode):
+        return self.literal(Boolean, node.tok.value == "TRUE", node)
+
+    @staticmethod
+    def translate_null_node(node: NullNode):
+        return f"load_null(ctx, {node.start_position}, {node.end_position})"
+
+    def translate_list_node(self, node: ListNode, keep: bool):
+        if not keep:
+            for element_node in node.element_nodes:
+                self.translate(element_node, False)
+            return None
+        elements = ", ".join(self.values(node.element_nodes))
+        return f"make_list(ctx, [{elements}], {node.start_position}, {node.end_position})"
+
+    def translate_list_index_node(self, node: ListIndexNode):
+        list_instance, index = self.values([node.list_instance, node.index])
+        return f"index(ctx, {list_instance}, {index})"
+
+    def translate_bin_op_node(self, node: BinOpNode):
+        left, right = self.values([node.left_node, node.right_node])
+        operator = node.op_tok.value if node.op_tok.kind == TokenKind.KEYWORD else node.op_tok.kind
+        if operator in NUMBER_ARITHMETIC:
+            helper = "arithmetic"
+        elif operator in NUMBER_COMPARISONS:
+            helper = "compare"
+        else:
+            helper = "binary"
+        return (f"{helper}(ctx, {OPERATORS.index(operator)}, {left}, {right}, "
+                f"{node.start_position}, {node.end_position})")
+
+    def translate_unary_op_node(self, node: UnaryOpNode):
+        if node.op_tok.kind == TokenKind.MINUS:
+            kind = UNARY_NEGATE
+        elif node.op_tok.matches_keyword("NOT"):
+            kind = UNARY_NOT
+        else:
+            kind = UNARY_PLUS
+        return f"unary({self.value(node.node)}, {kind}, {node.start_position}, {node.end_position})"
+
+    @staticmethod
+    def translate_var_access_node(node: VarAccessNode):
+        return f"load(ctx, {node.var_name_tok.value!r}, {node.start_position}, {node.end_position})"
+
+    def translate_var_assign_node(self, node: VarAssignNode):
+        return f"assign(ctx, {node.var_name_tok.value!r}, {self.value(node.value_node)})"
+
+    # The body of an IF or CASE branch, whose value is replaced by NULL when should_auto_return
+    def branch(self, node: any, should_auto_return: bool, result: str):
+        mark = len(self.lines)
+        self.indent += 1
+        if should_auto_return:
+            self.translate(node, False)
+            if result:
+                self.emit(f"{result} = null(ctx)", node)
+        elif result:
+            self.emit(f"{result} = {self.value(node)}", node)
+        else:
+            self.translate(node, False)
+
+        if len(self.lines) == mark:
+            self.emit("pass", node)
+        self.indent -= 1
+
+    # An if/elif/else chain. A test that needs statements of its own goes in a nested else instead.
+    def chain(self, node: any, tests: list, otherwise: tuple, result: str):
+        nested = 0
+        for i, (test_node, make_test, body, should_auto_return) in enumerate(tests):
+            if i:
+                self.emit("else:", node)
+                self.indent += 1
+                nested += 1
+            mark = len(self.lines)
+            test = make_test(self.value(test_node))
+            if i and len(self.lines) == mark:
+                self.lines.pop()
+                self.indent -= 1
+                nested -= 1
+                self.emit(f"elif {test}:", node)
+            else:
+                self.emit(f"if {test}:", node)
+            self.branch(body, should_auto_return, result)
+
+        if otherwise:
+            self.emit("else:", node)
+            self.branch(otherwise[0], otherwise[1], result)
+        elif result:
+            self.emit("else:", node)
+            self.indent += 1
+            self.emit(f"{result} = null(ctx)", node)
+            self.indent -= 1
+        self.indent -= nested
+
+    def translate_if_node(self, node: IfNode, keep: bool):
+        result = self.temp() if keep else None
+        positions = f"{node.start_position}, {node.end_position}"
+        tests = [(condition, lambda test: f"condition({test}, {positions})", expr, should_auto_return)
+                 for condition, expr, should_auto_return in node.cases]
+        self.chain(node, tests, node.else_case, result)
+        return result
+
+    def translate_case_node(self, node: CaseNode, keep: bool):
+        result = self.temp() if keep else None
+        subject = self.temp()
+        self.emit(f"{subject} = ctx.symbol_table.get({node.var_name_tok.value!r})", node)
+        tests = [(value, lambda test: f"match(ctx, {test}, {subject})", response, should_auto_return)
+                 for value, response, should_auto_return in node.cases]
+        self.chain(node, tests, node.otherwise_case, result)
+        return result
+
+    # The body of a loop, appending its value to elements when collecting. A call in the body can
+    # continue this loop from inside the function it calls, so then the body catches Continue.
+    def loop_body(self, node: any, elements: str, on_continue: str):
+        catches = contains_call(node)
+        if catches:
+            self.emit("try:", node)
+            self.indent += 1
+
+        mark = len(self.lines)
+        self.loops += 1
+        if elements:
+            self.emit(f"{elements}.append({self.value(node)})", node)
+        else:
+            self.translate(node, False)
+        self.loops -= 1
+        if len(self.lines) == mark:
+            self.emit("pass", node)
+
+        if catches:
+            self.indent -= 1
+            self.emit("except Continue:", node)
+            self.emit(f"    {on_continue}", node)
+
+    def end_loop(self, node: any, elements: str, keep: bool):
+        if elements:
+            result = self.temp()
+            self.emit(f"{result} = make_list(ctx, {elements}, {node.start_position}, {node.end_position})", node)
+            return result
+        if keep:
+            result = self.temp()
+            self.emit(f"{result} = null(ctx)", node)
+            return result
+        return None
+
+    def translate_for_node(self, node: ForNode, keep: bool):
+        bounds = [node.start_value_node, node.end_value_node]
+        if node.step_value_node:
+            bounds.append(node.step_value_node)
+        values = self.values(bounds)
+        if not node.step_value_node:
+            values.append(self.constant(Number(1.0)))
+
+        name = repr(node.var_name_tok.value)
+        start, end, step, i = self.temp(), self.temp(), self.temp(), self.temp()
+        elements = self.temp() if keep and not node.should_auto_return else None
+        for temp, value in zip((start, end, step), values):
+            self.emit(f"{temp} = {value}", node)
+        self.emit(f"ctx.symbol_table.set({name}, {start})", node)
+        if elements:
+            self.emit(f"{elements} = []", node)
+
+        self.emit(f"for {i} in for_counters({start}, {end}, {step}):", node)
+        self.indent += 1
+        self.emit(f"ctx.symbol_table.set({name}, {i})", node)
+        self.loop_body(node.body_node, elements, "continue")
+        self.indent -= 1
+        return self.end_loop(node, elements, keep)
+
+    def translate_while_node(self, node: WhileNode, keep: bool):
+        elements = self.temp() if keep and node.should_auto_return else None
+        if elements:
+            self.emit(f"{elements} = []", node)
+
+        self.emit("while True:", node)
+        self.indent += 1
+        self.emit(f"if not {self.value(node.condition_node)}:", node)
+        self.emit("    break", node)
+        self.loop_body(node.body_node, elements, "continue")
+        self.indent -= 1
+        return self.end_loop(node, elements, keep)
+
+    # CONTINUE goes back to the start of the body without testing the condition, as in the tree walker
+    def translate_repeat_node(self, node: RepeatNode, keep: bool):
+        elements = self.temp() if keep and node.should_auto_return else None
+        if elements:
+            self.emit(f"{elements} = []", node)
+
+        self.emit("while True:", node)
+        self.indent += 1
+        self.loop_body(node.body_node, elements, "continue")
+        self.emit(f"if {self.value(node.condition_node)}:", node)
+        self.emit("    break", node)
+        self.indent -= 1
+        return self.end_loop(node, elements, keep)
+
+    def translate_func_def_node(self, node: FuncDefNode):
+        func_name = node.var_name_tok.value if node.var_name_tok else None
+        arg_names = [arg_name.value for arg_name in node.arg_name_toks]
+        name = self.function(self.name("_f"), node.body_node, node.should_auto_return, True)
+        self.module.functions.append((name, node.body_node))
+        return (f"make_function(ctx, {func_name!r}, {self.constant(node.body_node)}, {self.constant(arg_names)}, "
+                f"{node.should_auto_return}, {node.start_position}, {node.end_position})")
+
+    def translate_call_node(self, node: CallNode):
+        positions = f"{node.start_position}, {node.end_position}"
+        # A function read from a variable is called without copying it first
+        if isinstance(node.node_to_call, VarAccessNode):
+            callee = node.node_to_call
+            text = f"callee(ctx, {callee.var_name_tok.value!r}, {callee.start_position}, {callee.end_position})"
+            helper = "call_name"
+            if node.is_tail_call:
+                values = self.values(node.arg_nodes, (text, callee))
+                return f"tail_call(ctx, {values[0]}, [{', '.join(values[1:])}], {self.constant(node)}, {positions})"
+        else:
+            callee = node.node_to_call
+            text = f"prepare({self.value(callee)}, {positions})"
+            helper = "call"
+
+        values = self.values(node.arg_nodes, (text, callee))
+        return f"{helper}(ctx, {values[0]}, [{', '.join(values[1:])}], {positions})"
+
+    def translate_print_node(self, node: PrintNode):
+        return f"print_values(ctx, [{', '.join(self.values(node.objects_to_print))}])"
+
+    def translate_input_node(self, node: InputNode):
+        return f"input_node(ctx, {self.constant(node)})"
+
+    def translate_return_node(self, node: ReturnNode, _keep: bool):
+        value = self.value(node.node_to_return) if node.node_to_return else "null(ctx)"
+        if self.in_function:
+            self.emit(f"return {value} or null(ctx)", node)
+        else:
+            self.emit(f"raise Return({value} or null(ctx))", node)
+        return "None"
+
+    # Outside a loop of its own function, CONTINUE leaves the function to continue the caller's loop
+    def translate_continue_node(self, node: ContinueNode, _keep: bool):
+        self.emit("continue" if self.loops else "raise Continue()", node)
+        return "None"
+
+    # BREAK continues the loop, as it does in the tree walker
+    def translate_break_node(self, node: BreakNode, _keep: bool):
+        self.emit("continue" if self.loops else "raise Continue()", node)
+        return "None"
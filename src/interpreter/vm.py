@@ -0,0 +1,380 @@
+from .context import Context
+from .symbol_table import FrameSymbolTable
+from .interpreter import Interpreter, RTResult, Number, Boolean, List, PSFunction, with_context, for_counters
+from .closure_interpreter import PRIMITIVES, new_value
+from .stack_interpreter import MAX_CALL_DEPTH
+from .bytecode import Code, Compiler, Opcode, OPERATIONS, NUMBER_OPERATIONS, UNARY_NEGATE, UNARY_NOT
+from ..errors import RuntimeError, InvalidSyntaxError
+
+# The dispatch loop compares against these rather than looking up the attributes of Opcode
+LOAD_NAME = Opcode.LOAD_NAME
+LOAD_CONST = Opcode.LOAD_CONST
+LOAD_LITERAL = Opcode.LOAD_LITERAL
+LOAD_NULL = Opcode.LOAD_NULL
+PUSH_NULL = Opcode.PUSH_NULL
+STORE_NAME = Opcode.STORE_NAME
+POP = Opcode.POP
+ARITHMETIC_OP = Opcode.ARITHMETIC_OP
+COMPARE_OP = Opcode.COMPARE_OP
+BINARY_OP = Opcode.BINARY_OP
+UNARY_OP = Opcode.UNARY_OP
+BUILD_LIST = Opcode.BUILD_LIST
+LIST_INDEX = Opcode.LIST_INDEX
+JUMP = Opcode.JUMP
+POP_JUMP_IF_FALSE = Opcode.POP_JUMP_IF_FALSE
+POP_JUMP_IF_NOT_CASE = Opcode.POP_JUMP_IF_NOT_CASE
+LOAD_CASE_SUBJECT = Opcode.LOAD_CASE_SUBJECT
+MATCH_CASE = Opcode.MATCH_CASE
+FOR_SETUP = Opcode.FOR_SETUP
+FOR_ITER = Opcode.FOR_ITER
+NEW_ELEMENTS = Opcode.NEW_ELEMENTS
+LIST_APPEND = Opcode.LIST_APPEND
+END_LOOP = Opcode.END_LOOP
+MAKE_FUNCTION = Opcode.MAKE_FUNCTION
+LOAD_CALLEE = Opcode.LOAD_CALLEE
+PREPARE_CALL = Opcode.PREPARE_CALL
+CALL_NAME = Opcode.CALL_NAME
+CALL = Opcode.CALL
+TAIL_CALL = Opcode.TAIL_CALL
+RETURN_VALUE = Opcode.RETURN_VALUE
+CONTINUE = Opcode.CONTINUE
+PRINT = Opcode.PRINT
+INPUT = Opcode.INPUT
+LOAD_FAST = Opcode.LOAD_FAST
+STORE_FAST = Opcode.STORE_FAST
+LOAD_FAST_CALLEE = Opcode.LOAD_FAST_CALLEE
+
+# Indexes into the loop state FOR_SETUP leaves on the stack
+FOR_COUNTERS = 0
+FOR_NAME = 1
+FOR_SLOT = 2
+
+
+# Runs the bytecode the Compiler produces. Each frame has its own value stack, and calls to
+# pseudocode functions push a frame rather than recursing, so recursion is bounded by max_call_depth
+# instead of the Python call stack. Errors end the run straight away, RETURN pops a frame, and
+# CONTINUE (or a call that continued its caller's loop) jumps to the target continue_table gives it,
+# or failing that leaves the frame to continue the loop in the caller. The variables the Resolver
+# gives slots are read and written by index in the slots of the frame's FrameSymbolTable.
+class VirtualMachine(Interpreter):
+    def __init__(self, max_call_depth: int = MAX_CALL_DEPTH):
+        super().__init__()
+        self.max_call_depth = max_call_depth
+        self.compiler = Compiler()
+
+    def visit(self, node: any, context: Context) -> RTResult:
+        return self.run(self.compiler.compile(node, symbol_table=context.symbol_table), context)
+
+    def function_code(self, function: PSFunction):
+        code = self.compiler.functions.get(function.body_node)
+        if code is None:
+            code = self.compiler.compile_function(
+                function.body_node, function.name, function.arg_names, function.should_auto_return
+            )
+        return code
+
+    def run(self, code: Code, context: Context) -> RTResult:
+        res = RTResult()
+        frames = []
+        stack = []
+        push, pop = stack.append, stack.pop
+        ops, args, starts, ends, consts, names = code.ops, code.args, code.starts, code.ends, code.consts, code.names
+        slots = context.symbol_table.slots
+        pc = 0
+
+        while True:
+            offset = pc
+            op = ops[offset]
+            arg = args[offset]
+            pc = offset + 1
+
+            if op == LOAD_FAST:
+                value = slots[arg]
+                if value is None:
+                    # Not set in this frame yet, so the name is looked up in the callers as usual
+                    name = code.slot_names[arg]
+                    parent = context.symbol_table.parent
+                    value = parent.get(name) if parent is not None else None
+                    if value is None:
+                        return res.failure(RuntimeError(
+                            starts[offset], ends[offset], f"'{name}' is not defined.", context
+                        ))
+                if type(value) in PRIMITIVES:
+                    push(new_value(type(value), value.value, context, starts[offset], ends[offset]))
+                else:
+                    push(value.copy().set_pos(starts[offset], ends[offset]).set_context(context))
+
+            elif op == LOAD_CONST:
+                push(consts[arg])
+
+            elif op == STORE_FAST:
+                slots[arg] = stack[-1]
+
+            elif op == POP:
+                pop()
+
+            elif op == ARITHMETIC_OP or op == COMPARE_OP:
+                right = pop()
+                left = stack[-1]
+                if type(left) is Number and type(right) is Number:
+                    if op == ARITHMETIC_OP:
+                        stack[-1] = new_value(Number, NUMBER_OPERATIONS[arg](left.value, right.value), left.context,
+                                              starts[offset], ends[offset])
+                    else:
+                        stack[-1] = new_value(Boolean, NUMBER_OPERATIONS[arg](left.value, right.value), None,
+                                              starts[offset], ends[offset])
+                else:
+                    result, error = OPERATIONS[arg](left, right)
+                    if error:
+                        return res.failure(with_context(error, context))
+                    stack[-1] = result.set_pos(starts[offset], ends[offset])
+
+            elif op == JUMP:
+                pc = arg
+
+            elif op == POP_JUMP_IF_FALSE:
+                if not pop():
+                    pc = arg
+
+            elif op == FOR_ITER:
+                state = stack[-1]
+                i = next(state[FOR_COUNTERS], None)
+                if i is not None:
+                    if state[FOR_SLOT] is None:
+                        context.symbol_table.set(state[FOR_NAME], i)
+                    else:
+                        slots[state[FOR_SLOT]] = i
+                else:
+                    pop()
+                    pc = arg
+
+            elif op == LOAD_LITERAL:
+                value_class, value = consts[arg]
+                push(new_value(value_class, value, context, starts[offset], ends[offset]))
+
+            elif op == POP_JUMP_IF_NOT_CASE:
+                condition = pop()
+                if not isinstance(condition, (Number, Boolean)):
+                    return res.failure(InvalidSyntaxError(
+                        starts[offset], ends[offset],
+                        "Invalid case - must evaluate to Boolean or Number."
+                    ))
+                if not condition:
+                    pc = arg
+
+            elif op == LOAD_NAME:
+                name = names[arg]
+                value = context.symbol_table.get(name)
+                if value is None:
+                    return res.failure(RuntimeError(starts[offset], ends[offset], f"'{name}' is not defined.", context))
+                if type(value) in PRIMITIVES:
+                    push(new_value(type(value), value.value, context, starts[offset], ends[offset]))
+                else:
+                    push(value.copy().set_pos(starts[offset], ends[offset]).set_context(context))
+
+            elif op == STORE_NAME:
+                context.symbol_table.set(names[arg], stack[-1])
+
+            elif op == LOAD_CALLEE or op == LOAD_FAST_CALLEE:
+                if op == LOAD_CALLEE:
+                    name = names[arg]
+                    value = context.symbol_table.get(name)
+                else:
+                    name = code.slot_names[arg]
+                    value = slots[arg]
+                    if value is None and context.symbol_table.parent is not None:
+                        value = context.symbol_table.parent.get(name)
+                if value is None:
+                    return res.failure(RuntimeError(starts[offset], ends[offset], f"'{name}' is not defined.", context))
+                # Pseudocode functions are called as they are, anything else is copied as reading it would
+                if not isinstance(value, PSFunction):
+                    value = value.copy().set_context(context)
+                push(value)
+
+            elif op == CALL_NAME or op == CALL or op == TAIL_CALL:
+                split = len(stack) - arg
+                call_args = stack[split:]
+                del stack[split:]
+                function = pop()
+                start, end = starts[offset], ends[offset]
+
+                if isinstance(function, PSFunction):
+                    # A function calling itself in tail position runs again in this frame with the
+                    # arguments rebound, which is all a frame of its own would have differed in
+                    if (op == TAIL_CALL and function.body_node is code.body_node
+                            and len(call_args) == len(function.arg_names)):
+                        for name, value in zip(function.arg_names, call_args):
+                            slots[code.slot_index[name]] = value.set_context(context)
+                        del stack[:]
+                        pc = 0
+                        continue
+
+                    parent = function.context if op == CALL else context
+                    if len(frames) >= self.max_call_depth:
+                        return res.failure(RuntimeError(
+                            start, end, f"Maximum recursion depth of {self.max_call_depth} exceeded.", context
+                        ))
+
+                    arg_names = function.arg_names
+                    if len(call_args) != len(arg_names):
+                        return res.failure(with_context(RuntimeError(
+                            start, end,
+                            f"Invalid number of arguments passed to function.\n"
+                            f"You passed {len(call_args)} arguments. The function expects {len(arg_names)} arguments.",
+                            parent
+                        ), context))
+
+                    frames.append((code, pc, stack, context))
+                    code = self.function_code(function)
+                    ops, args, starts, ends, consts, names = (
+                        code.ops, code.args, code.starts, code.ends, code.consts, code.names
+                    )
+
+                    exec_ctx = Context(function.name, parent, start)
+                    exec_ctx.symbol_table = FrameSymbolTable(code.slot_index, parent.symbol_table)
+                    slots = exec_ctx.symbol_table.slots
+                    for name, value in zip(arg_names, call_args):
+                        slots[code.slot_index[name]] = value.set_context(exec_ctx)
+                    stack = []
+                    push, pop = stack.append, stack.pop
+                    context = exec_ctx
+                    pc = 0
+                    continue
+
+                if op != CALL:
+                    function = function.set_pos(start, end)
+                call_result = function(call_args)
+                if call_result.error:
+                    return res.failure(with_context(call_result.error, context))
+                value = call_result.value
+                if type(value) in PRIMITIVES:
+                    push(new_value(type(value), value.value, context, start, end))
+                else:
+                    push(value.copy().set_pos(start, end).set_context(context))
+
+            elif op == RETURN_VALUE:
+                value = pop() or context.symbol_table.get("NULL")
+                if not frames:
+                    return res.success(value)
+
+                code, pc, stack, context = frames.pop()
+                ops, args, starts, ends, consts, names = (
+                    code.ops, code.args, code.starts, code.ends, code.consts, code.names
+                )
+                slots = context.symbol_table.slots
+                push, pop = stack.append, stack.pop
+                start, end = starts[pc - 1], ends[pc - 1]
+                if type(value) in PRIMITIVES:
+                    push(new_value(type(value), value.value, context, start, end))
+                else:
+                    push(value.copy().set_pos(start, end).set_context(context))
+
+            elif op == LIST_APPEND:
+                value = pop()
+                stack[-arg].append(value)
+
+            elif op == LIST_INDEX:
+                index = pop()
+                result, error = stack[-1][index]
+                if error:
+                    return res.failure(with_context(error, context))
+                stack[-1] = result
+
+            elif op == UNARY_OP:
+                operand = stack[-1]
+                if isinstance(operand, Number):
+                    if arg == UNARY_NEGATE:
+                        operand, error = operand * Number(-1)
+                elif isinstance(operand, Boolean):
+                    if arg == UNARY_NOT:
+                        operand = Boolean(not operand.value).set_context(operand.context)
+                stack[-1] = operand.set_pos(starts[offset], ends[offset])
+
+            elif op == BINARY_OP:
+                right = pop()
+                result, error = OPERATIONS[arg](stack[-1], right)
+                if error:
+                    return res.failure(with_context(error, context))
+                stack[-1] = result.set_pos(starts[offset], ends[offset])
+
+            elif op == PUSH_NULL:
+                push(context.symbol_table.get("NULL"))
+
+            elif op == LOAD_NULL:
+                push(context.symbol_table.get("NULL").set_pos(starts[offset], ends[offset]))
+
+            elif op == BUILD_LIST:
+                split = len(stack) - arg
+                elements = stack[split:]
+                del stack[split:]
+                push(List(elements).set_context(context).set_pos(starts[offset], ends[offset]))
+
+            elif op == CONTINUE:
+                while True:
+                    target = code.continue_table.get(pc - 1)
+                    if target is not None:
+                        pc, depth = target
+                        del stack[depth:]
+                        break
+
+                    if not frames:
+                        return res.success_continue()
+                    code, pc, stack, context = frames.pop()
+                    ops, args, starts, ends, consts, names = (
+                        code.ops, code.args, code.starts, code.ends, code.consts, code.names
+                    )
+                    slots = context.symbol_table.slots
+                    push, pop = stack.append, stack.pop
+
+            elif op == LOAD_CASE_SUBJECT:
+                push(context.symbol_table.get(names[arg]))
+
+            elif op == MATCH_CASE:
+                value = pop()
+                case_matched, error = value == stack[-1]
+                if error:
+                    return res.failure(with_context(error, context))
+                if not case_matched:
+                    pc = arg
+
+            elif op == FOR_SETUP:
+                step_value = pop()
+                end_value = pop()
+                start_value = stack[-1]
+                name = names[arg]
+                context.symbol_table.set(name, start_value)
+                stack[-1] = [for_counters(start_value, end_value, step_value), name, code.slot_index.get(name)]
+
+            elif op == NEW_ELEMENTS:
+                push([])
+
+            elif op == END_LOOP:
+                stack[-1] = List(stack[-1]).set_context(context).set_pos(starts[offset], ends[offset])
+
+            elif op == MAKE_FUNCTION:
+                function_code = consts[arg]
+                func_value = PSFunction(
+                    function_code.name, function_code.body_node, function_code.arg_names,
+                    function_code.should_auto_return
+                ).set_context(context).set_pos(starts[offset], ends[offset])
+                if function_code.name is not None:
+                    context.symbol_table.set(function_code.name, func_value)
+                push(func_value)
+
+            elif op == PREPARE_CALL:
+                stack[-1] = stack[-1].copy().set_pos(starts[offset], ends[offset])
+
+            elif op == PRINT:
+                split = len(stack) - arg
+                print_list = stack[split:]
+                del stack[split:]
+                for obj in print_list[:-1]:
+                    print(obj, end=" ")
+                print(print_list[-1])
+                push(context.symbol_table.get("NULL"))
+
+            elif op == INPUT:
+                push(self.visit_input_node(consts[arg], context).value)
+
+            else:
+                return res.failure(self.no_visit_method(consts[arg], context).error)
@@ -1 +1,5 @@
-from .lexer import Lexer
\ No newline at end of file
+from .lexer import Lexer
+from .source import Source
+from .table_lexer import TableLexer
+from .token_buffer import TokenBuffer
+from .token_stream import TokenStream
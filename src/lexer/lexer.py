@@ -14,15 +14,16 @@ from .tokens import (
     ColonToken
 )
 from ..keywords import keywords
-from .position import Position
+from .source import Source
 from string import ascii_letters
 
 
 class Lexer:
-    def __init__(self, filename: str, text: str):
-        self.filename = filename
-        self.text = text.strip()
-        self.pos = Position(-1, 0, -1, filename, text)
+    def __init__(self, source: Source, start: int = 0, end: int = None):
+        self.source = source
+        self.text = source.text
+        self.end = len(self.text) if end is None else end
+        self.pos = start - 1
         self.current_char = None
         self.escape_chars = {
             "n": "\n",
@@ -32,8 +33,8 @@ class Lexer:
         self.advance()
 
     def advance(self):
-        self.pos.advance(self.current_char)
-        self.current_char = self.text[self.pos.index] if self.pos.index < len(self.text) else None
+        self.pos += 1
+        self.current_char = self.text[self.pos] if self.pos < self.end else None
 
     def lex_line(self):
         tokens = []
@@ -55,7 +56,7 @@ class Lexer:
                 else:
                     tokens.append(result)
             elif self.current_char == "=":
-                start_position = self.pos.copy()
+                start_position = self.pos
                 self.advance()
                 if self.current_char == ">":
                     tokens.append(ArrowToken(start_position=start_position, end_position=self.pos))
@@ -63,7 +64,7 @@ class Lexer:
                 else:
                     tokens.append(EqualsToken(start_position=start_position))
             elif self.current_char == "<":
-                start_position = self.pos.copy()
+                start_position = self.pos
                 self.advance()
                 if self.current_char == "=":
                     tokens.append(LessThanOrEqualsToken(start_position=start_position, end_position=self.pos))
@@ -77,7 +78,7 @@ class Lexer:
                 else:
                     tokens.append(LessThanToken(start_position=start_position))
             elif self.current_char == ">":
-                start_position = self.pos.copy()
+                start_position = self.pos
                 self.advance()
                 if self.current_char == "=":
                     tokens.append(GreaterThanOrEqualsToken(start_position=start_position, end_position=self.pos))
@@ -97,7 +98,7 @@ class Lexer:
                 tokens.append(ModuloToken(start_position=self.pos))
                 self.advance()
             elif self.current_char == '*':
-                start_position = self.pos.copy()
+                start_position = self.pos
                 self.advance()
                 if self.current_char == "*":
                     self.advance()
@@ -106,7 +107,7 @@ class Lexer:
                     tokens.append(MultiplyToken(start_position=start_position))
 
             elif self.current_char == '/':
-                start_position = self.pos.copy()
+                start_position = self.pos
                 self.advance()
                 if self.current_char == "/":
                     tokens.append(FloorDivideToken(start_position=start_position, end_position=self.pos))
@@ -135,7 +136,7 @@ class Lexer:
                 tokens.append(RCurlyToken(start_position=self.pos))
                 self.advance()
             else:
-                start_position = self.pos.copy()
+                start_position = self.pos
                 char = self.current_char
                 return [], IllegalCharError(start_position, char)
 
@@ -146,7 +147,7 @@ class Lexer:
         value = ""
         terminator = self.current_char
         escaped = False
-        start_position = self.pos.copy()
+        start_position = self.pos
         self.advance()
         while True:
             if self.current_char == terminator:
@@ -169,7 +170,7 @@ class Lexer:
     def make_number(self):
         num_str = ''
         dot_count = 0
-        start_position = self.pos.copy()
+        start_position = self.pos
 
         while self.current_char is not None and self.current_char in "0123456789.":
             if self.current_char == '.':
@@ -185,7 +186,7 @@ class Lexer:
 
     def make_identifier(self):
         id_str = ""
-        start_position = self.pos.copy()
+        start_position = self.pos
 
         while self.current_char and self.current_char in "0123456789_" + ascii_letters:
             id_str += self.current_char
@@ -199,7 +200,7 @@ class Lexer:
             return IdentifierToken(id_str, start_position=start_position, end_position=self.pos)
 
     def make_not_equals(self):
-        start_position = self.pos.copy()
+        start_position = self.pos
         self.advance()
 
         if self.current_char == "=":
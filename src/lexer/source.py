@@ -0,0 +1,78 @@
+import mmap
+import os
+from array import array
+from bisect import bisect_right
+
+
+class Source:
+    def __init__(self, filename: str, text: str):
+        self.filename = filename
+        self.text = ""
+        self.line_starts = array("I", [0])
+        self.extend(text)
+
+    @classmethod
+    def from_file(cls, filename: str):
+        with open(filename, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return cls(filename, "")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                text = str(mapped, "utf-8")
+
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return cls(filename, text)
+
+    def extend(self, text: str):
+        start = len(self.text)
+        if start:
+            text = "\n" + text
+        index = text.find("\n")
+        while index >= 0:
+            self.line_starts.append(start + index + 1)
+            index = text.find("\n", index + 1)
+
+        self.text += text
+        return start + 1 if start else 0
+
+    def replace(self, start: int, end: int, text: str):
+        first = bisect_right(self.line_starts, start)
+        last = bisect_right(self.line_starts, end)
+        delta = len(text) - (end - start)
+
+        line_starts = array("I")
+        index = text.find("\n")
+        while index >= 0:
+            line_starts.append(start + index + 1)
+            index = text.find("\n", index + 1)
+        line_starts.extend(i + delta for i in self.line_starts[last:])
+
+        self.line_starts[first:] = line_starts
+        self.text = self.text[:start] + text + self.text[end:]
+        return delta
+
+    def content_bounds(self, start: int = 0):
+        text = self.text
+        end = len(text)
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        return start, end
+
+    def line(self, index: int):
+        return bisect_right(self.line_starts, index) - 1
+
+    def column(self, index: int):
+        return index - self.line_starts[self.line(index)]
+
+    def end_column(self, index: int):
+        if index == 0:
+            return 0
+        return self.column(index - 1) + 1
+
+    def line_text(self, line: int):
+        start = self.line_starts[line]
+        if line + 1 < len(self.line_starts):
+            return self.text[start:self.line_starts[line + 1] - 1]
+        return self.text[start:]
@@ -0,0 +1,140 @@
+import re
+import sys
+from ..errors import IllegalCharError, UnexpectedEOFError
+from .tokens import (
+    PlusToken, MinusToken, MultiplyToken, DivideToken,
+    FloorDivideToken, PowerToken, CommaToken, ModuloToken,
+    AssignmentToken, ArrowToken, NumberToken, IdentifierToken,
+    KeywordToken, LParenToken, RParenToken, LSquareToken,
+    RSquareToken, LCurlyToken, RCurlyToken, EOFToken, EqualsToken,
+    NotEqualsToken, LessThanOrEqualsToken, LessThanToken,
+    GreaterThanOrEqualsToken, GreaterThanToken, StringToken,
+    NewlineToken, ColonToken
+)
+from ..keywords import keywords
+from .source import Source
+from .token_buffer import TokenBuffer
+
+
+TOKEN_REGEX = re.compile(r"""
+      (?P<whitespace>[ \t]+)
+    | (?P<newline>[;\n])
+    | (?P<number>[0-9]+\.?[0-9]*|\.[0-9]*)
+    | (?P<identifier>[A-Za-z][0-9_A-Za-z]*)
+    | (?P<string>"(?:[^"\\]|\\.)*")
+    | (?P<operator>=>|<=|<>|<-|>=|\*\*|//|[=<>,+\-%*/:()\[\]{}])
+""", re.VERBOSE | re.DOTALL)
+
+ESCAPE_REGEX = re.compile(r"\\(.)", re.DOTALL)
+
+# The second element is the width the token spans. Two character operators other than '**'
+# have always ended on their second character, and the table keeps that so both lexers agree.
+OPERATOR_TOKENS = {
+    "=>": (ArrowToken, 1),
+    "<=": (LessThanOrEqualsToken, 1),
+    "<>": (NotEqualsToken, 1),
+    "<-": (AssignmentToken, 1),
+    ">=": (GreaterThanOrEqualsToken, 1),
+    "**": (PowerToken, 2),
+    "//": (FloorDivideToken, 1),
+    "=": (EqualsToken, 1),
+    "<": (LessThanToken, 1),
+    ">": (GreaterThanToken, 1),
+    ",": (CommaToken, 1),
+    "+": (PlusToken, 1),
+    "-": (MinusToken, 1),
+    "%": (ModuloToken, 1),
+    "*": (MultiplyToken, 1),
+    "/": (DivideToken, 1),
+    ":": (ColonToken, 1),
+    "(": (LParenToken, 1),
+    ")": (RParenToken, 1),
+    "[": (LSquareToken, 1),
+    "]": (RSquareToken, 1),
+    "{": (LCurlyToken, 1),
+    "}": (RCurlyToken, 1),
+}
+
+
+class TableLexer:
+    def __init__(self, source: Source, start: int = 0, end: int = None):
+        self.source = source
+        self.start = start
+        self.end = len(source.text) if end is None else end
+        self.error = None
+        self.escape_chars = {
+            "n": "\n",
+            "t": "\t",
+            "r": "\r"
+        }
+
+    def unescape(self, body: str):
+        if "\\" not in body:
+            return body
+        return ESCAPE_REGEX.sub(lambda m: self.escape_chars.get(m.group(1), m.group(1)), body)
+
+    def lex_line(self):
+        buffer, error = self.lex_buffer()
+        if error:
+            return [], error
+        return list(buffer), None
+
+    def lex_buffer(self):
+        buffer = TokenBuffer(self.source)
+        append = buffer.append
+        for token_class, start, end, value in self.scan():
+            append(token_class, start, end, value)
+
+        if self.error:
+            return None, self.error
+        return buffer, None
+
+    def stream(self):
+        for token_class, start, end, value in self.scan():
+            yield token_class(value, start, end)
+
+        if self.error:
+            yield EOFToken(None, self.error.position)
+
+    def scan(self):
+        self.error = None
+        text = self.source.text
+        stop = self.end
+        match = TOKEN_REGEX.match
+        index = self.start
+
+        while index < stop:
+            m = match(text, index, stop)
+            if m is None:
+                if text[index] == '"':
+                    self.error = UnexpectedEOFError(index, "This probably means you have forgotten to close a string")
+                else:
+                    self.error = IllegalCharError(index, text[index])
+                return
+
+            kind = m.lastgroup
+            end = m.end()
+
+            if kind == "whitespace":
+                pass
+            elif kind == "newline":
+                yield NewlineToken, index, end, None
+            elif kind == "number":
+                yield NumberToken, index, end, float(m.group())
+            elif kind == "identifier":
+                id_str = sys.intern(m.group())
+                if id_str == "MOD":
+                    yield ModuloToken, index, end, id_str
+                elif id_str in keywords:
+                    yield KeywordToken, index, end, id_str
+                else:
+                    yield IdentifierToken, index, end, id_str
+            elif kind == "string":
+                yield StringToken, index, end, self.unescape(text[index + 1:end - 1])
+            else:
+                token_class, width = OPERATOR_TOKENS[m.group()]
+                yield token_class, index, index + width, None
+
+            index = end
+
+        yield EOFToken, index, index + 1, None
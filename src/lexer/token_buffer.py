@@ -0,0 +1,39 @@
+from array import array
+from .source import Source
+from .tokens import TOKEN_CLASSES
+
+
+class TokenBuffer:
+    def __init__(self, source: Source):
+        self.source = source
+        self.kinds = array("B")
+        self.starts = array("I")
+        self.ends = array("I")
+        self.value_ids = array("I")
+        self.values = [None]
+        self.value_index = {None: 0}
+
+    def append(self, token_class: type, start: int, end: int, value: any = None):
+        value_id = self.value_index.get(value)
+        if value_id is None:
+            value_id = self.value_index[value] = len(self.values)
+            self.values.append(value)
+
+        self.kinds.append(token_class.kind)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.value_ids.append(value_id)
+
+    def token(self, index: int):
+        return TOKEN_CLASSES[self.kinds[index]](
+            self.values[self.value_ids[index]], self.starts[index], self.ends[index]
+        )
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, index: int):
+        return self.token(index)
+
+    def __iter__(self):
+        return (self.token(i) for i in range(len(self.kinds)))
@@ -0,0 +1,32 @@
+from collections import deque
+from typing import Iterator
+
+
+class TokenStream:
+    def __init__(self, tokens: Iterator[any], window: int = 2):
+        self.tokens = tokens
+        self.lookahead = deque(maxlen=window)
+        self.end = 0
+
+    def pull(self):
+        token = next(self.tokens, None)
+        if token is None:
+            return False
+
+        self.lookahead.append(token)
+        self.end += 1
+        return True
+
+    def drain(self):
+        while self.pull():
+            pass
+
+    def __getitem__(self, index: int):
+        while index >= self.end:
+            if not self.pull():
+                raise IndexError(index)
+
+        offset = index - self.end + len(self.lookahead)
+        if offset < 0:
+            raise LookupError(f"Token {index} is no longer in the lookahead of {self.lookahead.maxlen} tokens")
+        return self.lookahead[offset]
@@ -1,167 +1,243 @@
-from .position import Position
+class TokenKind:
+    PLUS = 0
+    INCREMENT = 1
+    MINUS = 2
+    DECREMENT = 3
+    MULTIPLY = 4
+    MULTIPLY_INCREMENT = 5
+    DIVIDE = 6
+    POWER = 7
+    MODULO = 8
+    FLOOR_DIVIDE = 9
+    DIVIDE_DECREMENT = 10
+    FLOOR_DIVIDE_DECREMENT = 11
+    L_PAREN = 12
+    R_PAREN = 13
+    L_SQUARE = 14
+    R_SQUARE = 15
+    EOF = 16
+    ASSIGNMENT = 17
+    EQUALS = 18
+    NOT_EQUALS = 19
+    GREATER_THAN = 20
+    LESS_THAN = 21
+    GREATER_THAN_OR_EQUALS = 22
+    LESS_THAN_OR_EQUALS = 23
+    NUMBER = 24
+    IDENTIFIER = 25
+    KEYWORD = 26
+    COMMA = 27
+    ARROW = 28
+    COLON = 29
+    STRING = 30
+    NEWLINE = 31
+    L_CURLY = 32
+    R_CURLY = 33
 
 
 class BaseToken:
-    def __init__(self, value: any = None, start_position: Position = None, end_position: Position = None):
-        self.start_position = None
-        self.end_position = None
+    __slots__ = ("value", "start_position", "end_position")
+    kind = None
+
+    def __init__(self, value: any = None, start_position: int = None, end_position: int = None):
         self.value = value
+        self.start_position = start_position
+        self.end_position = end_position
 
-        if end_position and start_position:
-            self.start_position = start_position.copy()
-            self.end_position = end_position.copy()
-        elif start_position:
-            self.start_position = start_position.copy()
-            self.end_position = start_position.copy()
-            self.end_position.advance()
+        if end_position is None and start_position is not None:
+            self.end_position = start_position + 1
 
     def matches(self, other):
-        return self.__class__.__name__ == other.__class__.__name__ and self.value == other.value
+        return self.kind == other.kind and self.value == other.value
+
+    def matches_keyword(self, keyword: str):
+        return self.kind == TokenKind.KEYWORD and self.value == keyword
 
     def __repr__(self):
         if self.value:
-            try:
-                return f"[{self.__class__.__name__}({self.value}) at [{self.start_position.line + 1}:{self.start_position.column + 1}]]"
-            except AttributeError:
-                return f"[{self.__class__.__name__}({self.value}) at [UNKNOWN]]"
+            return f"[{self.__class__.__name__}({self.value}) at {self.start_position}]"
         else:
-            try:
-                return f"[{self.__class__.__name__} at [{self.start_position.line + 1}:{self.start_position.column + 1}]]"
-            except AttributeError:
-                return f"[{self.__class__.__name__} at [UNKNOWN]]"
+            return f"[{self.__class__.__name__} at {self.start_position}]"
 
 
 class PlusToken(BaseToken):
-    pass
+    __slots__ = ()
+    kind = TokenKind.PLUS
 
 
 class IncrementToken(BaseToken):
-    pass
+    __slots__ = ()
+    kind = TokenKind.INCREMENT
 
 
 class MinusToken(BaseToken):
-    pass
+    __slots__ = ()
+    kind = TokenKind.MINUS
 
 
 class DecrementToken(BaseToken):
-    pass
+    __slots__ = ()
+    kind = TokenKind.DECREMENT
 
 
 class MultiplyToken(BaseToken):
-    pass
+    __slots__ = ()
+    kind = TokenKind.MULTIPLY
 
 
 class MultiplyIncrementToken(BaseToken):
-    pass
+    __slots__ = ()
+    kind = TokenKind.MULTIPLY_INCREMENT
 
 
 class DivideToken(BaseToken):
-    pass
+    __slots__ = ()
+    kind = TokenKind.DIVIDE
 
 
 class PowerToken(BaseToken):
-    pass
+    __slots__ = ()
+    kind = TokenKind.POWER
 
 
 class ModuloToken(BaseToken):
-    pass
+    __slots__ = ()
+    kind = TokenKind.MODULO
 
 
 class FloorDivideToken(BaseToken):
-    pass
+    __slots__ = ()
+    kind = TokenKind.FLOOR_DIVIDE
 
 
 class DivideDecrementToken(BaseToken):
-    pass
+    __slots__ = ()
+    kind = TokenKind.DIVIDE_DECREMENT
 
 
 class FloorDivideDecrementToken(BaseToken):
-    pass
+    __slots__ = ()
+    kind = TokenKind.FLOOR_DIVIDE_DECREMENT
 
 
 class LParenToken(BaseToken):
-    pass
+    __slots__ = ()
+    kind = TokenKind.L_PAREN
 
 
 class RParenToken(BaseToken):
-    pass
+    __slots__ = ()
+    kind = TokenKind.R_PAREN
 
 
 class LSquareToken(BaseToken):
-    pass
+    __slots__ = ()
+    kind = TokenKind.L_SQUARE
 
 
 class RSquareToken(BaseToken):
-    pass
+    __slots__ = ()
+    kind = TokenKind.R_SQUARE
 
 
 class EOFToken(BaseToken):
-    pass
+    __slots__ = ()
+    kind = TokenKind.EOF
 
 
 class AssignmentToken(BaseToken):
-    pass
+    __slots__ = ()
+    kind = TokenKind.ASSIGNMENT
 
 
 class EqualsToken(BaseToken):
-    pass
+    __slots__ = ()
+    kind = TokenKind.EQUALS
 
 
 class NotEqualsToken(BaseToken):
-    pass
+    __slots__ = ()
+    kind = TokenKind.NOT_EQUALS
 
 
 class GreaterThanToken(BaseToken):
-    pass
+    __slots__ = ()
+    kind = TokenKind.GREATER_THAN
 
 
 class LessThanToken(BaseToken):
-    pass
+    __slots__ = ()
+    kind = TokenKind.LESS_THAN
 
 
 class GreaterThanOrEqualsToken(BaseToken):
-    pass
+    __slots__ = ()
+    kind = TokenKind.GREATER_THAN_OR_EQUALS
 
 
 class LessThanOrEqualsToken(BaseToken):
-    pass
+    __slots__ = ()
+    kind = TokenKind.LESS_THAN_OR_EQUALS
 
 
 class NumberToken(BaseToken):
-    pass
+    __slots__ = ()
+    kind = TokenKind.NUMBER
 
 
 class IdentifierToken(BaseToken):
-    pass
+    __slots__ = ()
+    kind = TokenKind.IDENTIFIER
 
 
 class KeywordToken(BaseToken):
-    pass
+    __slots__ = ()
+    kind = TokenKind.KEYWORD
 
 
 class CommaToken(BaseToken):
-    pass
+    __slots__ = ()
+    kind = TokenKind.COMMA
 
 
 class ArrowToken(BaseToken):
-    pass
+    __slots__ = ()
+    kind = TokenKind.ARROW
 
 
 class ColonToken(BaseToken):
-    pass
+    __slots__ = ()
+    kind = TokenKind.COLON
 
 
 class StringToken(BaseToken):
-    pass
+    __slots__ = ()
+    kind = TokenKind.STRING
 
 
 class NewlineToken(BaseToken):
-    pass
+    __slots__ = ()
+    kind = TokenKind.NEWLINE
 
 
 class LCurlyToken(BaseToken):
-    pass
+    __slots__ = ()
+    kind = TokenKind.L_CURLY
 
 
 class RCurlyToken(BaseToken):
-    pass
+    __slots__ = ()
+    kind = TokenKind.R_CURLY
+
+
+TOKEN_CLASSES = (
+    PlusToken, IncrementToken, MinusToken, DecrementToken,
+    MultiplyToken, MultiplyIncrementToken, DivideToken, PowerToken,
+    ModuloToken, FloorDivideToken, DivideDecrementToken,
+    FloorDivideDecrementToken, LParenToken, RParenToken,
+    LSquareToken, RSquareToken, EOFToken, AssignmentToken,
+    EqualsToken, NotEqualsToken, GreaterThanToken, LessThanToken,
+    GreaterThanOrEqualsToken, LessThanOrEqualsToken, NumberToken,
+    IdentifierToken, KeywordToken, CommaToken, ArrowToken,
+    ColonToken, StringToken, NewlineToken, LCurlyToken, RCurlyToken
+)
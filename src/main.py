@@ -1,7 +1,10 @@
 from typing import List
 import os
+import time
 import difflib
-from .executor import PSCodeExecutor
+from . import __version__
+from .executor import PSCodeExecutor, ASTCache, compile_files
+from .lexer import Source
 
 
 def similar(a: str, b: str) -> float:
@@ -24,19 +27,18 @@ def get_similar_files(filename: str) -> List[str]:
 
 def repl():
     executor = PSCodeExecutor()
-    print("PSCode Version 0.1.0")
+    print(f"PSCode Version {__version__}")
     print("Created by macaquedev\n")
     while True:
         code = input("pscode >>> ")
         executor.execute("<repl>", code, [])
 
 
-def exec_file(filename: str, args: List[str]):
+def exec_file(filename: str, args: List[str], use_cache: bool = True, **options):
     try:
-        with open(filename) as f:
-            code = f.read()
-            executor = PSCodeExecutor()
-            executor.execute(filename, code, args)
+        source = Source.from_file(filename)
+        executor = PSCodeExecutor(ast_cache=ASTCache() if use_cache else None, **options)
+        executor.execute_source(source, args)
 
     except FileNotFoundError:
         print(f"pscode > ERROR:"
@@ -54,3 +56,33 @@ def exec_file(filename: str, args: List[str]):
             print(f"    pscode {file.ljust(length)} "
                   f"Similarity: "
                   f"{round(similar(os.path.abspath(filename), file) * 100, 2)}%")
+
+
+def find_psc_files(paths: List[str]) -> List[str]:
+    filenames = []
+    for path in paths:
+        if not os.path.isdir(path):
+            filenames.append(path)
+            continue
+
+        for directory, subdirectories, files in os.walk(path):
+            subdirectories[:] = sorted(i for i in subdirectories if i != "__pscache__")
+            filenames.extend(os.path.join(directory, i) for i in sorted(files) if i.endswith(".psc"))
+    return filenames
+
+
+def compile_paths(paths: List[str], jobs: int = None, write: bool = False, quiet: bool = False) -> int:
+    start = time.perf_counter()
+    filenames = find_psc_files(paths)
+    failed = 0
+
+    for filename, error in compile_files(filenames, jobs, write):
+        if error:
+            failed += 1
+            print(f"*** Error compiling {filename!r}...")
+            print(error)
+
+    if not quiet:
+        print(f"Compiled {len(filenames)} files in {time.perf_counter() - start:.2f}s, "
+              f"{failed} with errors.")
+    return failed
@@ -1 +1,3 @@
-from .token_parser import Parser
\ No newline at end of file
+from .token_parser import Parser
+from .stack_parser import StackParser
+from .incremental import IncrementalParser
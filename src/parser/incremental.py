@@ -0,0 +1,154 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from ..errors import UnexpectedEOFError
+from ..lexer import Source, TableLexer
+from ..lexer.tokens import TokenKind
+from .nodes import ListNode, child_slots, mark_statements
+from .token_parser import Parser, BLOCK_TERMINATORS
+
+
+def shift_positions(node: any, delta: int):
+    stack = [node]
+    pop = stack.pop
+    append = stack.append
+    extend = stack.extend
+    while stack:
+        obj = pop()
+        cls = type(obj)
+        if cls is list or cls is tuple:
+            extend(obj)
+            continue
+        slots = child_slots(cls)
+        if slots is None:
+            continue
+
+        obj.start_position += delta
+        obj.end_position += delta
+        for name in slots:
+            append(getattr(obj, name))
+
+
+# Keeps the top-level statements of a file as separate subtrees, along with the span of text each
+# one was parsed from. An edit re-lexes and re-parses only the statements it touches (and one on
+# either side, so joining or splitting lines is picked up); everything after it is moved by
+# adjusting its span, and the positions inside those subtrees are only rewritten when tree() is
+# next asked for.
+class IncrementalParser:
+    def __init__(self, source: Source):
+        self.source = source
+        self.parser = Parser()
+        self.starts = array("q")
+        self.ends = array("q")
+        self.offsets = array("q")
+        self.nodes = []
+        self.error = None
+        # Set when the span that failed to parse runs on into the statements after it, e.g. an
+        # unclosed block. What that means for the rest of the file is only worked out by check().
+        self.pending = False
+        self.update(0, 0)
+
+    def edit(self, start: int, end: int, text: str):
+        delta = self.source.replace(start, end, text)
+
+        first = bisect_right(self.starts, start) - 2
+        last = bisect_left(self.ends, end) + 1
+        # A span that failed to parse is kept as a single entry with no node, and joins every later
+        # edit until it parses again
+        if self.error is not None or self.pending:
+            dirty = self.nodes.index(None)
+            first = min(first, dirty)
+            last = max(last, dirty)
+        first = max(first, 0)
+        stop = min(last + 1, len(self.nodes))
+
+        if delta:
+            for positions in (self.starts, self.ends, self.offsets):
+                positions[stop:] = array("q", [p + delta for p in positions[stop:]])
+
+        self.update(first, stop)
+
+    def update(self, first: int, stop: int):
+        content_start, content_end = self.source.content_bounds()
+        region_start = content_start if first == 0 else self.starts[first]
+        open_ended = stop < len(self.nodes)
+        region_end = self.starts[stop] if open_ended else content_end
+
+        statements, error = self.parse_region(region_start, region_end, open_ended, first > 0)
+        self.pending = bool(error) and open_ended and self.crosses(error, region_end)
+        self.error = None if self.pending else error
+        if error:
+            statements = [(region_start, region_end, None)]
+        self.splice(first, stop, statements)
+
+    def splice(self, first: int, stop: int, statements: list):
+        self.starts[first:stop] = array("q", [s[0] for s in statements])
+        self.ends[first:stop] = array("q", [s[1] for s in statements])
+        self.offsets[first:stop] = array("q", [0] * len(statements))
+        self.nodes[first:stop] = [s[2] for s in statements]
+
+    def crosses(self, error: any, region_end: int):
+        if isinstance(error, UnexpectedEOFError):
+            return True
+        position = getattr(error, "start_position", getattr(error, "position", None))
+        return position is not None and position >= region_end
+
+    # Mirrors Parser.parse() over a run of top-level statements. When open_ended, the region stops
+    # before a statement that is kept, so it has to finish with a new line rather than at the EOF.
+    def parse_region(self, start: int, end: int, open_ended: bool, following: bool):
+        tokens, error = TableLexer(self.source, start, end).lex_buffer()
+        if error:
+            return None, error
+
+        parser = self.parser
+        parser.initialize(tokens)
+        statements = []
+
+        parser.allow_zero_or_more_new_lines()
+        while True:
+            start_position = parser.tok_start
+            if parser.tok_kind == TokenKind.EOF and open_ended:
+                return statements, None
+
+            if following and parser.tok_kind == TokenKind.KEYWORD and parser.tok_value in BLOCK_TERMINATORS:
+                break
+
+            res = parser.run(parser.statement())
+            if res.error:
+                return None, res.error
+            mark_statements(res.node)
+
+            statements.append((start_position, parser.tok_start, res.node))
+            following = True
+
+            if not parser.allow_zero_or_more_new_lines():
+                break
+
+        if open_ended or parser.tok_kind != TokenKind.EOF:
+            return None, parser.trailing_token_error()
+        return statements, None
+
+    def check(self):
+        if self.pending:
+            first = self.nodes.index(None)
+            content_start, content_end = self.source.content_bounds()
+            region_start = content_start if first == 0 else self.starts[first]
+            statements, self.error = self.parse_region(region_start, content_end, False, first > 0)
+            if not self.error:
+                self.splice(first, len(self.nodes), statements)
+            self.pending = False
+        return self.error
+
+    def tree(self):
+        if self.check():
+            return None, self.error
+
+        offsets = self.offsets
+        for i, node in enumerate(self.nodes):
+            if offsets[i]:
+                shift_positions(node, offsets[i])
+                offsets[i] = 0
+
+        content_start, content_end = self.source.content_bounds()
+        node = ListNode(list(self.nodes), content_start, content_end + 1)
+        node.is_statement = True
+        return node, None
@@ -2,6 +2,8 @@ from src.lexer.tokens import IdentifierToken
 
 
 class NumberNode:
+    __slots__ = ("tok", "start_position", "end_position")
+
     def __init__(self, tok: any):
         self.tok = tok
         self.start_position = self.tok.start_position
@@ -12,18 +14,20 @@ class NumberNode:
 
 
 class StringNode(NumberNode):
-    pass
+    __slots__ = ()
 
 
 class BooleanNode(NumberNode):
-    pass
+    __slots__ = ()
 
 
 class NullNode(NumberNode):
-    pass
+    __slots__ = ()
 
 
 class BinOpNode:
+    __slots__ = ("left_node", "right_node", "op_tok", "start_position", "end_position")
+
     def __init__(self, left_node: any, op_tok: any, right_node: any):
         self.left_node = left_node
         self.right_node = right_node
@@ -36,6 +40,8 @@ class BinOpNode:
 
 
 class UnaryOpNode:
+    __slots__ = ("op_tok", "node", "start_position", "end_position")
+
     def __init__(self, op_tok: any, node: any):
         self.op_tok = op_tok
         self.node = node
@@ -47,8 +53,11 @@ class UnaryOpNode:
 
 
 class ListNode:
+    __slots__ = ("element_nodes", "is_statement", "start_position", "end_position")
+
     def __init__(self, element_nodes, start_position, end_position):
         self.element_nodes = element_nodes
+        self.is_statement = False
         self.start_position = start_position
         self.end_position = end_position
 
@@ -57,6 +66,8 @@ class ListNode:
 
 
 class VarAccessNode:
+    __slots__ = ("var_name_tok", "start_position", "end_position")
+
     def __init__(self, var_name_tok: IdentifierToken):
         self.var_name_tok = var_name_tok
         self.start_position = var_name_tok.start_position
@@ -67,6 +78,8 @@ class VarAccessNode:
 
 
 class VarAssignNode:
+    __slots__ = ("var_name_tok", "value_node", "start_position", "end_position")
+
     def __init__(self, var_name_tok: IdentifierToken, value_node: any):
         self.var_name_tok = var_name_tok
         self.value_node = value_node
@@ -78,6 +91,8 @@ class VarAssignNode:
 
 
 class IfNode:
+    __slots__ = ("cases", "else_case", "start_position", "end_position")
+
     def __init__(self, cases, else_case):
         self.cases = cases
         self.else_case = else_case
@@ -89,6 +104,8 @@ class IfNode:
 
 
 class CaseNode:
+    __slots__ = ("var_name_tok", "cases", "otherwise_case", "start_position", "end_position")
+
     def __init__(self, var_name_tok, cases, otherwise_case):
         self.var_name_tok = var_name_tok
         self.cases = cases
@@ -101,6 +118,11 @@ class CaseNode:
 
 
 class ForNode:
+    __slots__ = (
+        "var_name_tok", "start_value_node", "end_value_node", "step_value_node", "body_node",
+        "should_auto_return", "is_statement", "start_position", "end_position"
+    )
+
     def __init__(self, var_name_tok, start_value_node, end_value_node, step_value_node, body_node, should_auto_return):
         self.var_name_tok = var_name_tok
         self.start_value_node = start_value_node
@@ -108,6 +130,7 @@ class ForNode:
         self.step_value_node = step_value_node
         self.body_node = body_node
         self.should_auto_return = should_auto_return
+        self.is_statement = False
 
         self.start_position = self.var_name_tok.start_position
         self.end_position = self.body_node.end_position
@@ -117,8 +140,11 @@ class ForNode:
 
 
 class WhileNode:
+    __slots__ = ("should_auto_return", "is_statement", "condition_node", "body_node", "start_position", "end_position")
+
     def __init__(self, condition_node, body_node, should_auto_return):
         self.should_auto_return = should_auto_return
+        self.is_statement = False
         self.condition_node = condition_node
         self.body_node = body_node
 
@@ -130,8 +156,11 @@ class WhileNode:
 
 
 class RepeatNode:
+    __slots__ = ("should_auto_return", "is_statement", "condition_node", "body_node", "start_position", "end_position")
+
     def __init__(self, condition_node, body_node, should_auto_return):
         self.should_auto_return = should_auto_return
+        self.is_statement = False
         self.condition_node = condition_node
         self.body_node = body_node
 
@@ -143,6 +172,8 @@ class RepeatNode:
 
 
 class FuncDefNode:
+    __slots__ = ("should_auto_return", "var_name_tok", "arg_name_toks", "body_node", "start_position", "end_position")
+
     def __init__(self, var_name_tok, arg_name_toks, body_node, should_auto_return):
         self.should_auto_return = should_auto_return
         self.var_name_tok = var_name_tok
@@ -163,32 +194,39 @@ class FuncDefNode:
 
 
 class CallNode:
+    __slots__ = ("node_to_call", "arg_nodes", "is_tail_call", "start_position", "end_position")
+
     def __init__(self, node_to_call, arg_nodes):
         self.node_to_call = node_to_call
         self.arg_nodes = arg_nodes
+        self.is_tail_call = False
         self.start_position = self.node_to_call.start_position
 
         if len(self.arg_nodes) > 0:
-            self.end_position = self.arg_nodes[-1].end_position.copy().advance()
+            self.end_position = self.arg_nodes[-1].end_position + 1
         else:
-            self.end_position = self.node_to_call.end_position.copy().advance()
+            self.end_position = self.node_to_call.end_position + 1
 
     def __repr__(self):
         return f"Call({self.node_to_call}({self.arg_nodes}))"
 
 
 class ListIndexNode:
+    __slots__ = ("list_instance", "index", "start_position", "end_position")
+
     def __init__(self, list_instance, index):
         self.list_instance = list_instance
         self.index = index
         self.start_position = self.list_instance.start_position
-        self.end_position = self.index.end_position.copy().advance()
+        self.end_position = self.index.end_position + 1
 
     def __repr__(self):
         return f"{self.list_instance}[{self.index}]"
 
 
 class ReturnNode:
+    __slots__ = ("node_to_return", "start_position", "end_position")
+
     def __init__(self, node_to_return, start_position, end_position):
         self.node_to_return = node_to_return
         self.start_position = start_position
@@ -199,6 +237,8 @@ class ReturnNode:
 
 
 class ContinueNode:
+    __slots__ = ("start_position", "end_position")
+
     def __init__(self, start_position, end_position):
         self.start_position = start_position
         self.end_position = end_position
@@ -208,6 +248,8 @@ class ContinueNode:
 
 
 class BreakNode:
+    __slots__ = ("start_position", "end_position")
+
     def __init__(self, start_position, end_position):
         self.start_position = start_position
         self.end_position = end_position
@@ -217,6 +259,8 @@ class BreakNode:
 
 
 class PrintNode:
+    __slots__ = ("objects_to_print", "start_position", "end_position")
+
     def __init__(self, objects_to_print, start_position, end_position):
         self.objects_to_print = objects_to_print
         self.start_position = start_position
@@ -227,6 +271,8 @@ class PrintNode:
 
 
 class InputNode:
+    __slots__ = ("var_name_tok", "start_position", "end_position")
+
     def __init__(self, var_name_tok, start_position, end_position):
         self.var_name_tok = var_name_tok
         self.start_position = start_position
@@ -234,3 +280,113 @@ class InputNode:
 
     def __repr__(self):
         return f"InputNode({self.var_name_tok})"
+
+
+# A literal or constant subexpression, with the runtime value it evaluates to built ahead of time.
+# node is the expression it replaces.
+class ConstantNode:
+    __slots__ = ("node", "value", "start_position", "end_position")
+
+    def __init__(self, node, value):
+        self.node = node
+        self.value = value
+        self.start_position = node.start_position
+        self.end_position = node.end_position
+
+    def __repr__(self):
+        return f"{self.node}"
+
+
+POSITIONS = ("start_position", "end_position")
+
+_child_slots = {}
+
+
+# The slots of a node or token class other than its positions, or None for anything without positions
+def child_slots(cls: type):
+    try:
+        return _child_slots[cls]
+    except KeyError:
+        names = [name for klass in cls.__mro__ for name in getattr(klass, "__slots__", ())]
+        slots = _child_slots[cls] = (
+            tuple(name for name in names if name not in POSITIONS) if "start_position" in names else None
+        )
+        return slots
+
+
+# Sets is_statement on the blocks and loops of a tree whose values are never used, for a tree that is
+# a program or one of its statements. The statements of a block are used when the block is. An IF or
+# CASE gives the value of the branch taken, and a FOR, a function in braces or anything else whose
+# value should_auto_return replaces never uses the value of its body. The tail calls of each function
+# the tree defines are marked as well.
+def mark_statements(node: any):
+    stack = [(node, True)]
+    while stack:
+        obj, is_statement = stack.pop()
+        cls = type(obj)
+        if cls is ListNode:
+            obj.is_statement = is_statement
+            stack.extend((element_node, is_statement) for element_node in obj.element_nodes)
+        elif cls is IfNode or cls is CaseNode:
+            for test_node, body_node, should_auto_return in obj.cases:
+                stack.append((test_node, False))
+                stack.append((body_node, is_statement or should_auto_return))
+            last_case = obj.else_case if cls is IfNode else obj.otherwise_case
+            if last_case:
+                stack.append((last_case[0], is_statement or last_case[1]))
+        elif cls is ForNode:
+            obj.is_statement = is_statement
+            stack.extend((value_node, False)
+                         for value_node in (obj.start_value_node, obj.end_value_node, obj.step_value_node))
+            stack.append((obj.body_node, is_statement or obj.should_auto_return))
+        elif cls is WhileNode or cls is RepeatNode:
+            obj.is_statement = is_statement
+            stack.append((obj.condition_node, False))
+            stack.append((obj.body_node, is_statement or not obj.should_auto_return))
+        elif cls is FuncDefNode:
+            mark_tail_calls(obj)
+            stack.append((obj.body_node, not obj.should_auto_return))
+        elif cls is list or cls is tuple:
+            stack.extend((item, False) for item in obj)
+        else:
+            slots = child_slots(cls)
+            if slots is not None:
+                stack.extend((getattr(obj, name), False) for name in slots)
+
+
+# Sets is_tail_call on the calls a named function makes to itself by name whose value is the value it
+# returns: its body when that is an arrow body, what a RETURN gives, or the response of a CASE in one
+# of those that gives its value. The branches of an IF are blocks, which give a list of their values,
+# so only a RETURN in them gives a tail call. A RETURN in a loop of the function is left out, since
+# CONTINUE in the call would go on with that loop.
+def mark_tail_calls(node: FuncDefNode):
+    if not node.var_name_tok:
+        return
+    func_name = node.var_name_tok.value
+
+    tails = [node.body_node] if node.should_auto_return else []
+    stack = [node.body_node]
+    while stack:
+        obj = stack.pop()
+        cls = type(obj)
+        if cls is ReturnNode:
+            if obj.node_to_return:
+                tails.append(obj.node_to_return)
+        elif cls is list or cls is tuple:
+            stack.extend(obj)
+        elif cls not in (ForNode, WhileNode, RepeatNode, FuncDefNode):
+            slots = child_slots(cls)
+            if slots is not None:
+                stack.extend(getattr(obj, name) for name in slots)
+
+    while tails:
+        obj = tails.pop()
+        cls = type(obj)
+        if cls is CallNode:
+            node_to_call = obj.node_to_call
+            if type(node_to_call) is VarAccessNode and node_to_call.var_name_tok.value == func_name:
+                obj.is_tail_call = True
+        elif cls is CaseNode:
+            tails.extend(body_node for _, body_node, should_auto_return in obj.cases if not should_auto_return)
+            if obj.otherwise_case and not obj.otherwise_case[1]:
+                tails.append(obj.otherwise_case[0])
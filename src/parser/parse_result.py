@@ -2,17 +2,8 @@ class ParseResult:
     def __init__(self):
         self.error = None
         self.node = None
-        self.last_registered_advance_count = 0
-        self.advance_count = 0
-        self.to_reverse_count = 0
-
-    def register_advancement(self):
-        self.last_registered_advance_count = 1
-        self.advance_count += 1
 
     def register(self, res: any):
-        self.last_registered_advance_count = res.advance_count
-        self.advance_count += res.advance_count
         if res.error:
             self.error = res.error
         return res.node
@@ -22,15 +13,6 @@ class ParseResult:
         return self
 
     def failure(self, error):
-        if not self.error or self.advance_count == 0:
+        if not self.error:
             self.error = error
         return self
-
-    def try_register(self, res):
-        if res.error:
-            self.to_reverse_count = res.advance_count
-            self.error = res.error
-            return self
-        return self.register(res)
-
-
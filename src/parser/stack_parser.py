@@ -0,0 +1,41 @@
+from ..errors import InvalidSyntaxError
+from .parse_result import ParseResult
+from .token_parser import Parser
+
+MAX_DEPTH = 250000
+
+
+# Parser with a run() that drives its rules from a list rather than by recursing, so nesting is limited
+# by max_depth rather than by the Python call stack
+class StackParser(Parser):
+    def __init__(self, max_depth: int = MAX_DEPTH):
+        super().__init__()
+        self.max_depth = max_depth
+
+    def run(self, parse):
+        if isinstance(parse, ParseResult):
+            return parse
+
+        stack = [parse]
+        res = None
+        while True:
+            try:
+                child = stack[-1].send(res)
+            except StopIteration as stop:
+                stack.pop()
+                if not stack:
+                    return stop.value
+                res = stop.value
+                continue
+
+            if isinstance(child, ParseResult):
+                res = child
+            elif len(stack) >= self.max_depth:
+                # Returned straight away, since unwinding through the rules would let them reword it
+                return ParseResult().failure(InvalidSyntaxError(
+                    self.tok_start, self.tok_end,
+                    f"Code is nested too deeply, the parser is limited to {self.max_depth} levels"
+                ))
+            else:
+                stack.append(child)
+                res = None
@@ -1,508 +1,556 @@
-from typing import List, Callable, Union, Tuple
+from typing import List
 from .nodes import (
     NumberNode, BooleanNode, StringNode, BinOpNode, UnaryOpNode, VarAssignNode,
     VarAccessNode, IfNode, ForNode, WhileNode, FuncDefNode, CallNode, ListNode, ListIndexNode, NullNode, ReturnNode,
     ContinueNode, BreakNode, RepeatNode, CaseNode,
-    PrintNode, InputNode
+    PrintNode, InputNode, mark_statements
 )
 from ..errors import InvalidSyntaxError
-from ..lexer.tokens import KeywordToken
+from ..lexer.token_buffer import TokenBuffer
+from ..lexer.tokens import BaseToken, TokenKind
 from .parse_result import ParseResult
 
 
+BLOCK_TERMINATORS = {"ELIF", "ELSE", "ENDIF", "ENDWHILE", "UNTIL", "NEXT", "ENDCASE", "ENDPROCEDURE"}
+STATEMENT_ENDS = {TokenKind.NEWLINE, TokenKind.EOF, TokenKind.R_CURLY}
+
+# Binding powers, loosest first. 'NOT' binds at COMPARISON and the sign operators at UNARY.
+LOGICAL = 1
+COMPARISON = 2
+ARITHMETIC = 3
+TERM = 4
+UNARY = 5
+
+BINARY_PRECEDENCE = {
+    TokenKind.EQUALS: COMPARISON,
+    TokenKind.NOT_EQUALS: COMPARISON,
+    TokenKind.LESS_THAN: COMPARISON,
+    TokenKind.GREATER_THAN: COMPARISON,
+    TokenKind.LESS_THAN_OR_EQUALS: COMPARISON,
+    TokenKind.GREATER_THAN_OR_EQUALS: COMPARISON,
+    TokenKind.PLUS: ARITHMETIC,
+    TokenKind.MINUS: ARITHMETIC,
+    TokenKind.MULTIPLY: TERM,
+    TokenKind.DIVIDE: TERM,
+    TokenKind.FLOOR_DIVIDE: TERM,
+    TokenKind.MODULO: TERM,
+    TokenKind.POWER: UNARY,
+}
+
+KEYWORD_PRECEDENCE = {
+    "AND": LOGICAL,
+    "OR": LOGICAL,
+}
+
+
+# Every rule that can nest is a generator, which yields the sub-parse it needs (a generator, or the
+# ParseResult of a rule that never nests) and is sent back its ParseResult. run() drives them by
+# recursing, and StackParser drives the same rules from a list instead.
 class Parser:
     def __init__(self):
         self.tokens = None
+        self.kinds = None
+        self.starts = None
+        self.ends = None
+        self.value_ids = None
+        self.values = None
         self.tok_idx = None
-        self.current_tok = None
-
+        self.tok_pos = None
+        self.tok_kind = None
+        self.tok_value = None
+        self.tok_start = None
+        self.tok_end = None
+        self.keyword_statements = {
+            "RETURN": self.return_statement,
+            "CONTINUE": self.continue_statement,
+            "BREAK": self.break_statement,
+            "OUTPUT": self.output_statement,
+            "INPUT": self.input_statement,
+        }
+        self.keyword_atoms = {
+            "IF": self.if_expr,
+            "FOR": self.for_expr,
+            "WHILE": self.while_expr,
+            "REPEAT": self.repeat_expr,
+            "CASE": self.case_expr,
+            "FUNCTION": self.func_def,
+        }
+
+    # The current token is kept as its kind, value and offsets. A TokenBuffer is read straight from its
+    # arrays, so a token object is only built by token() for a node that keeps one; any other sequence
+    # of tokens, such as a TokenStream, is read a token at a time.
     def initialize(self, tokens: List[any]):
         self.tokens = tokens
+        if isinstance(tokens, TokenBuffer):
+            self.kinds, self.starts, self.ends = tokens.kinds, tokens.starts, tokens.ends
+            self.value_ids, self.values = tokens.value_ids, tokens.values
+        else:
+            self.kinds = self.starts = self.ends = self.value_ids = self.values = None
         self.tok_idx = -1
-        self.current_tok = None
+        self.tok_pos = None
         self.advance()
 
+    # Past the last token, the last token stays current
     def advance(self):
         self.tok_idx += 1
-        self.update_current_tok()
+        idx = self.tok_idx
+        kinds = self.kinds
+        if kinds is None:
+            try:
+                tok = self.tokens[idx]
+            except IndexError:
+                return
+            self.tok_kind, self.tok_value = tok.kind, tok.value
+            self.tok_start, self.tok_end = tok.start_position, tok.end_position
+        elif idx < len(kinds):
+            self.tok_kind = kinds[idx]
+            self.tok_value = self.values[self.value_ids[idx]]
+            self.tok_start = self.starts[idx]
+            self.tok_end = self.ends[idx]
+        else:
+            return
+        self.tok_pos = idx
 
-    def reverse(self, amount: int = 1):
-        self.tok_idx -= amount
-        self.update_current_tok()
-        return self.current_tok
+    def peek_kind(self):
+        idx = self.tok_idx + 1
+        kinds = self.kinds
+        if kinds is None:
+            try:
+                return self.tokens[idx].kind
+            except IndexError:
+                return self.tok_kind
+        return kinds[idx] if idx < len(kinds) else self.tok_kind
 
-    def update_current_tok(self):
-        if 0 <= self.tok_idx < len(self.tokens):
-            self.current_tok = self.tokens[self.tok_idx]
+    def token(self):
+        return self.tokens[self.tok_pos]
+
+    def matches_keyword(self, keyword: str):
+        return self.tok_kind == TokenKind.KEYWORD and self.tok_value == keyword
+
+    def matches(self, tok: BaseToken):
+        return self.tok_kind == tok.kind and self.tok_value == tok.value
 
     def parse(self):
-        res = self.statements()
-        if not (res.error or self.current_tok.__class__.__name__ == "EOFToken"):
-            return res.failure(InvalidSyntaxError(
-                self.current_tok.start_position, self.current_tok.end_position,
-                "Expected '+', '-', '*', '/', '=', '!=', '<', '>', <=', '>=', 'AND' or 'OR'"
-            ))
+        res = self.run(self.statements())
+        if not (res.error or self.tok_kind == TokenKind.EOF):
+            return res.failure(self.trailing_token_error())
 
+        if not res.error:
+            mark_statements(res.node)
         return res
 
+    def run(self, parse):
+        if type(parse) is ParseResult:
+            return parse
+
+        res = None
+        while True:
+            try:
+                child = parse.send(res)
+            except StopIteration as stop:
+                return stop.value
+            res = self.run(child)
+
+    def trailing_token_error(self):
+        return InvalidSyntaxError(
+            self.tok_start, self.tok_end,
+            "Expected '+', '-', '*', '/', '=', '!=', '<', '>', <=', '>=', 'AND' or 'OR'"
+        )
+
     def statements(self):
         res = ParseResult()
         statements = []
-        start_position = self.current_tok.start_position.copy()
+        start_position = self.tok_start
 
-        self.allow_zero_or_more_new_lines(res)
+        self.allow_zero_or_more_new_lines()
 
-        statement = res.register(self.statement())
+        statement = res.register((yield self.statement()))
         if res.error:
             return res
 
         statements.append(statement)
 
-        more_statements = True
-
-        while True:
-            newline_count = self.allow_zero_or_more_new_lines(res)
-
-            if newline_count == 0:
-                more_statements = False
-
-            if not more_statements:
+        while self.allow_zero_or_more_new_lines():
+            if self.tok_kind == TokenKind.KEYWORD and self.tok_value in BLOCK_TERMINATORS:
                 break
 
-            if self.current_tok.__class__.__name__ == "KeywordToken" and self.current_tok.value in ["ELIF", "ELSE", "ENDIF", "ENDWHILE", "UNTIL", "NEXT", "ENDCASE", "ENDPROCEDURE"]:
-                self.reverse()
-                more_statements = False
-                continue
-
-            statement = res.register(self.statement())
+            statement = res.register((yield self.statement()))
             if res.error:
                 return res
 
             statements.append(statement)
 
-        return res.success(ListNode(statements, start_position, self.current_tok.end_position.copy()))
+        return res.success(ListNode(statements, start_position, self.tok_end))
 
     def statement(self):
-        res = ParseResult()
-        start_position = self.current_tok.start_position.copy()
+        kind = self.tok_kind
 
-        if self.current_tok.matches(KeywordToken("RETURN")):
-            res.register_advancement()
-            self.advance()
+        if kind == TokenKind.KEYWORD:
+            keyword_statement = self.keyword_statements.get(self.tok_value)
+            if keyword_statement:
+                return keyword_statement()
 
-            expr = res.try_register(self.expr())
-            if not expr:
-                self.reverse(res.to_reverse_count)
-            return res.success(ReturnNode(expr, start_position, self.current_tok.start_position.copy()))
+        elif kind == TokenKind.IDENTIFIER and self.peek_kind() == TokenKind.ASSIGNMENT:
+            return self.assignment()
 
-        elif self.current_tok.matches(KeywordToken("CONTINUE")):
-            res.register_advancement()
-            self.advance()
-            return res.success(ContinueNode(start_position, self.current_tok.start_position.copy()))
+        return self.expr()
 
-        elif self.current_tok.matches(KeywordToken("BREAK")):
-            res.register_advancement()
-            self.advance()
-            return res.success(BreakNode(start_position, self.current_tok.start_position.copy()))
+    def return_statement(self):
+        res = ParseResult()
+        start_position = self.tok_start
+        self.advance()
 
-        elif self.current_tok.matches(KeywordToken("OUTPUT")):
-            objects_to_print = []
-            res.register_advancement()
-            self.advance()
+        kind = self.tok_kind
+        if kind in STATEMENT_ENDS or (kind == TokenKind.KEYWORD and self.tok_value in BLOCK_TERMINATORS):
+            return res.success(ReturnNode(None, start_position, self.tok_start))
 
-            expr = res.register(self.expr())
-            if res.error:
-                return res
+        expr = res.register((yield self.expr()))
+        if res.error:
+            return res
 
-            objects_to_print.append(expr)
+        return res.success(ReturnNode(expr, start_position, self.tok_start))
 
-            while self.current_tok.__class__.__name__ == "CommaToken":
-                res.register_advancement()
-                self.advance()
+    def continue_statement(self):
+        start_position = self.tok_start
+        self.advance()
+        return ParseResult().success(ContinueNode(start_position, self.tok_start))
 
-                expr = res.register(self.expr())
-                if res.error:
-                    return res
-                objects_to_print.append(expr)
+    def break_statement(self):
+        start_position = self.tok_start
+        self.advance()
+        return ParseResult().success(BreakNode(start_position, self.tok_start))
 
-            if self.current_tok.__class__.__name__ not in ["NewlineToken", "EOFToken"]:
-                return res.failure(InvalidSyntaxError(
-                    self.current_tok.start_position, self.current_tok.end_position,
-                    "Expected newline or comma"
-                ))
+    def output_statement(self):
+        res = ParseResult()
+        start_position = self.tok_start
+        objects_to_print = []
+        self.advance()
 
-            return res.success(PrintNode(
-                objects_to_print, 
-                start_position, self.current_tok.start_position.copy()
-            ))
+        expr = res.register((yield self.expr()))
+        if res.error:
+            return res
+
+        objects_to_print.append(expr)
 
-        elif self.current_tok.matches(KeywordToken("INPUT")):
-            res.register_advancement()
+        while self.tok_kind == TokenKind.COMMA:
             self.advance()
 
-            if self.current_tok.__class__.__name__ != "IdentifierToken":
-                return res.failure(InvalidSyntaxError(
-                    self.current_tok.start_position, self.current_tok.end_position,
-                    "Expected variable name"
-                ))
-            
-            var_name_tok = self.current_tok
+            expr = res.register((yield self.expr()))
+            if res.error:
+                return res
+            objects_to_print.append(expr)
 
-            res.register_advancement()
-            self.advance()
+        if self.tok_kind not in (TokenKind.NEWLINE, TokenKind.EOF):
+            return res.failure(InvalidSyntaxError(
+                self.tok_start, self.tok_end,
+                "Expected newline or comma"
+            ))
 
-            return res.success(InputNode(var_name_tok, start_position, self.current_tok.start_position.copy()))
+        return res.success(PrintNode(
+            objects_to_print,
+            start_position, self.tok_start
+        ))
 
-        elif self.current_tok.__class__.__name__ == "IdentifierToken":
-            var_name_tok = self.current_tok
-            self.advance()
+    def input_statement(self):
+        res = ParseResult()
+        start_position = self.tok_start
+        self.advance()
 
-            if self.current_tok.__class__.__name__ == "AssignmentToken":
-                res.register_advancement()
-                res.register_advancement()
-                self.advance()
+        if self.tok_kind != TokenKind.IDENTIFIER:
+            return res.failure(InvalidSyntaxError(
+                self.tok_start, self.tok_end,
+                "Expected variable name"
+            ))
 
-                expr = res.register(self.expr())
+        var_name_tok = self.token()
+        self.advance()
 
-                if res.error:
-                    return res
+        return res.success(InputNode(var_name_tok, start_position, self.tok_start))
 
-                return res.success(VarAssignNode(var_name_tok, expr))
+    def assignment(self):
+        res = ParseResult()
+        var_name_tok = self.token()
+        self.advance()
+        self.advance()
 
-            self.reverse()
-            
-        expr = res.register(self.expr())
+        expr = res.register((yield self.expr()))
         if res.error:
             return res
 
-        return res.success(expr)
+        return res.success(VarAssignNode(var_name_tok, expr))
 
     def expr(self):
-        res = ParseResult()
-        node = res.register(self.bin_op(self.comp_expr, [("KeywordToken", "AND"), ("KeywordToken", "OR")]))
-        if res.error:
-            return res
-
-        return res.success(node)
+        return self.expression(LOGICAL)
 
-    def comp_expr(self):
+    def expression(self, precedence: int):
         res = ParseResult()
-        if self.current_tok.matches(KeywordToken("NOT")):
-            op_tok = self.current_tok
-            res.register_advancement()
-            self.advance()
+        start_idx = self.tok_idx
+        kind = self.tok_kind
 
-            node = res.register(self.comp_expr())
+        if precedence <= COMPARISON and self.matches_keyword("NOT"):
+            tok = self.token()
+            self.advance()
+            node = res.register((yield self.expression(COMPARISON)))
             if res.error:
                 return res
-            return res.success(UnaryOpNode(op_tok, node))
+            left = UnaryOpNode(tok, node)
 
-        node = res.register(self.bin_op(self.arith_expr, [
-            "EqualsToken", "NotEqualsToken", "LessThanToken",
-            "GreaterThanToken", "LessThanOrEqualsToken", "GreaterThanOrEqualsToken"]))
-
-        if res.error:
-            return res.failure(InvalidSyntaxError(
-                self.current_tok.start_position, self.current_tok.end_position,
-                "Expected number, identifier, '+', '-', '(', '[' or 'not'",
-            ))
+        elif kind == TokenKind.PLUS or kind == TokenKind.MINUS:
+            tok = self.token()
+            self.advance()
+            node = res.register((yield self.expression(UNARY)))
+            if res.error:
+                return res
+            left = UnaryOpNode(tok, node)
 
-        return res.success(node)
+        else:
+            left = res.register((yield self.postfix()))
+            if res.error:
+                # An operand that could not even start is reported with the wider message,
+                # but only where 'NOT' would have been accepted
+                if precedence <= COMPARISON and self.tok_idx == start_idx:
+                    return ParseResult().failure(InvalidSyntaxError(
+                        self.tok_start, self.tok_end,
+                        "Expected number, identifier, '+', '-', '(', '[' or 'not'",
+                    ))
+                return res
 
-    def arith_expr(self):
-        return self.bin_op(self.term, ["PlusToken", "MinusToken"])
+        while True:
+            if self.tok_kind == TokenKind.KEYWORD:
+                op_precedence = KEYWORD_PRECEDENCE.get(self.tok_value)
+            else:
+                op_precedence = BINARY_PRECEDENCE.get(self.tok_kind)
 
-    def term(self):
-        return self.bin_op(self.factor, ["MultiplyToken", "DivideToken", "FloorDivideToken", "ModuloToken"])
+            if op_precedence is None or op_precedence < precedence:
+                break
 
-    def factor(self):
-        res = ParseResult()
-        tok = self.current_tok
-        if tok.__class__.__name__ in ["PlusToken", "MinusToken"]:
-            res.register_advancement()
+            op_tok = self.token()
             self.advance()
-            factor = res.register(self.factor())
+            # '**' is the only right associative operator
+            right = res.register((yield self.expression(UNARY if op_precedence == UNARY else op_precedence + 1)))
             if res.error:
                 return res
-            return res.success(UnaryOpNode(tok, factor))
-
-        return self.power()
+            left = BinOpNode(left, op_tok, right)
 
-    def power(self):
-        return self.bin_op(self.call, ["PowerToken"], self.factor)
+        return res.success(left)
 
-    def call(self):
+    def postfix(self):
         res = ParseResult()
-        list_index = res.register(self.list_index())
+        node = res.register((yield self.atom()))
         if res.error:
             return res
 
-        if self.current_tok.__class__.__name__ == "LParenToken":
-            res.register_advancement()
+        if self.tok_kind == TokenKind.L_SQUARE:
+            self.advance()
+
+            index = res.register((yield self.expr()))
+            if res.error:
+                return res
+
+            if self.tok_kind != TokenKind.R_SQUARE:
+                return res.failure(InvalidSyntaxError(
+                    node.start_position, self.tok_end,
+                    "Expected ']'"
+                ))
+
+            self.advance()
+            node = ListIndexNode(node, index)
+
+        if self.tok_kind == TokenKind.L_PAREN:
             self.advance()
             arg_nodes = []
-            if self.current_tok.__class__.__name__ == "RParenToken":
-                res.register_advancement()
+            if self.tok_kind == TokenKind.R_PAREN:
                 self.advance()
             else:
-                arg_nodes.append(res.register(self.expr()))
+                arg_nodes.append(res.register((yield self.expr())))
                 if res.error:
-                    return res.failure(InvalidSyntaxError(
-                        self.current_tok.start_position, self.current_tok.end_position,
-                        "Expected ')', 'IF', 'FOR', 'WHILE', 'REPEAT', 'CASE', 'PROCEDURE', "
-                        "number, identifier, '+', '-', '(', '[' or 'NOT'"
-                    ))
+                    return res
 
-                while self.current_tok.__class__.__name__ == "CommaToken":
-                    res.register_advancement()
+                while self.tok_kind == TokenKind.COMMA:
                     self.advance()
 
-                    arg_nodes.append(res.register(self.expr()))
+                    arg_nodes.append(res.register((yield self.expr())))
                     if res.error:
                         return res
 
-                if self.current_tok.__class__.__name__ != "RParenToken":
+                if self.tok_kind != TokenKind.R_PAREN:
                     return res.failure(InvalidSyntaxError(
-                        self.current_tok.start_position, self.current_tok.end_position,
+                        self.tok_start, self.tok_end,
                         "Expected ',' or ')"
                     ))
 
-                res.register_advancement()
                 self.advance()
 
-            return res.success(CallNode(list_index, arg_nodes))
-        return res.success(list_index)
-
-    def list_index(self):
-        res = ParseResult()
-        atom = res.register(self.atom())
-        if res.error:
-            return res
-
-        if self.current_tok.__class__.__name__ == "LSquareToken":
-            res.register_advancement()
-            self.advance()
-
-            index = res.register(self.expr())
+            node = CallNode(node, arg_nodes)
 
-            if self.current_tok.__class__.__name__ != "RSquareToken":
-                return res.failure(InvalidSyntaxError(
-                    atom.start_position, self.current_tok.end_position,
-                    "Expected ']'"
-                ))
-
-            res.register_advancement()
-            self.advance()
-            return res.success(ListIndexNode(atom, index))
-        return res.success(atom)
+        return res.success(node)
 
     def atom(self):
         res = ParseResult()
-        tok = self.current_tok
+        kind = self.tok_kind
 
-        if tok.__class__.__name__ == "NumberToken":
-            res.register_advancement()
+        if kind == TokenKind.NUMBER:
+            tok = self.token()
             self.advance()
             return res.success(NumberNode(tok))
-        if tok.__class__.__name__ == "StringToken":
-            res.register_advancement()
+        if kind == TokenKind.STRING:
+            tok = self.token()
             self.advance()
             return res.success(StringNode(tok))
-        elif tok.__class__.__name__ == "IdentifierToken":
-            res.register_advancement()
+        elif kind == TokenKind.IDENTIFIER:
+            tok = self.token()
             self.advance()
             return res.success(VarAccessNode(tok))
-        elif tok.__class__.__name__ == "KeywordToken" and tok.value in {"TRUE", "FALSE"}:
-            res.register_advancement()
+        elif kind == TokenKind.KEYWORD and self.tok_value in {"TRUE", "FALSE"}:
+            tok = self.token()
             self.advance()
             return res.success(BooleanNode(tok))
-        elif tok.matches(KeywordToken("NULL")):
-            res.register_advancement()
+        elif self.matches_keyword("NULL"):
+            tok = self.token()
             self.advance()
             return res.success(NullNode(tok))
-        elif tok.__class__.__name__ == "LParenToken":
-            res.register_advancement()
-            self.advance()
-            expression = res.register(self.expr())
-            if res.error:
-                return res
-            if self.current_tok.__class__.__name__ == "RParenToken":
-                res.register_advancement()
-                self.advance()
-                return res.success(expression)
-            else:
-                return res.failure(InvalidSyntaxError(
-                    tok.start_position, tok.end_position,
-                    "Expected ')'. This probably means that you haven't closed a parenthesis you have opened."
-                ))
-        elif tok.__class__.__name__ == "LSquareToken":
-            list_expr = res.register(self.list_expr())
-            if res.error:
-                return res
-            return res.success(list_expr)
-        elif tok.matches(KeywordToken('IF')):
-            if_expr = res.register(self.if_expr())
-            if res.error:
-                return res
-            return res.success(if_expr)
-        elif tok.matches(KeywordToken('FOR')):
-            for_expr = res.register(self.for_expr())
-            if res.error:
-                return res
-            return res.success(for_expr)
-        elif tok.matches(KeywordToken('WHILE')):
-            while_expr = res.register(self.while_expr())
-            if res.error:
-                return res
-            return res.success(while_expr)
-        elif tok.matches(KeywordToken('REPEAT')):
-            repeat_expr = res.register(self.repeat_expr())
-            if res.error:
-                return res
-            return res.success(repeat_expr)
-        elif tok.matches(KeywordToken('CASE')):
-            case_expr = res.register(self.case_expr())
-            if res.error:
-                return res
-            return res.success(case_expr)
-        elif tok.matches(KeywordToken('FUNCTION')):
-            while_expr = res.register(self.func_def())
-            if res.error:
-                return res
-            return res.success(while_expr)
+        elif kind == TokenKind.L_PAREN:
+            return self.paren_expr()
+        elif kind == TokenKind.L_SQUARE:
+            return self.list_expr()
+        elif kind == TokenKind.KEYWORD and self.tok_value in self.keyword_atoms:
+            return self.keyword_atoms[self.tok_value]()
 
         return res.failure(InvalidSyntaxError(
-            tok.start_position, tok.end_position,
+            self.tok_start, self.tok_end,
             "Expected number, identifier, '+', '-', '(', '[', 'if', 'for', 'while' or 'function'",
         ))
 
+    def paren_expr(self):
+        res = ParseResult()
+        start_position, end_position = self.tok_start, self.tok_end
+        self.advance()
+
+        expression = res.register((yield self.expr()))
+        if res.error:
+            return res
+        if self.tok_kind != TokenKind.R_PAREN:
+            return res.failure(InvalidSyntaxError(
+                start_position, end_position,
+                "Expected ')'. This probably means that you haven't closed a parenthesis you have opened."
+            ))
+
+        self.advance()
+        return res.success(expression)
+
     def list_expr(self):
         res = ParseResult()
         element_nodes = []
-        start_position = self.current_tok.start_position.copy()
+        start_position = self.tok_start
 
-        if self.current_tok.__class__.__name__ != "LSquareToken":
+        if self.tok_kind != TokenKind.L_SQUARE:
             return res.failure(InvalidSyntaxError(
-                self.current_tok.start_position, self.current_tok.end_position,
+                self.tok_start, self.tok_end,
                 f"Expected '['"
             ))
 
-        res.register_advancement()
         self.advance()
-        if self.current_tok.__class__.__name__ == "RSquareToken":
-            res.register_advancement()
+        if self.tok_kind == TokenKind.R_SQUARE:
             self.advance()
         else:
-            element_nodes.append(res.register(self.expr()))
+            element_nodes.append(res.register((yield self.expr())))
             if res.error:
-                return res.failure(InvalidSyntaxError(
-                    self.current_tok.start_position, self.current_tok.end_position,
-                    "Expected ']', 'IF', 'FOR', 'WHILE', 'REPEAT', 'CASE', 'PROCEDURE', "
-                    "number, identifier, '+', '-', '(', '[' or 'NOT'"
-                ))
+                return res
 
-            while self.current_tok.__class__.__name__ == "CommaToken":
-                res.register_advancement()
+            while self.tok_kind == TokenKind.COMMA:
                 self.advance()
 
-                element_nodes.append(res.register(self.expr()))
+                element_nodes.append(res.register((yield self.expr())))
                 if res.error:
                     return res
 
-            if self.current_tok.__class__.__name__ != "RSquareToken":
+            if self.tok_kind != TokenKind.R_SQUARE:
                 return res.failure(InvalidSyntaxError(
-                    self.current_tok.start_position, self.current_tok.end_position,
+                    self.tok_start, self.tok_end,
                     "Expected ',' or ']"
                 ))
 
-            res.register_advancement()
             self.advance()
 
-        return res.success(ListNode(element_nodes, start_position, self.current_tok.end_position.copy()))
+        return res.success(ListNode(element_nodes, start_position, self.tok_end))
 
     def if_expr(self):
         res = ParseResult()
         cases = []
         else_case = None
 
-        if not self.current_tok.matches(KeywordToken("IF")):
+        if not self.matches_keyword("IF"):
             return res.failure(InvalidSyntaxError(
-                self.current_tok.start_position, self.current_tok.end_position,
+                self.tok_start, self.tok_end,
                 "Expected 'IF'"
             ))
 
-        res.register_advancement()
         self.advance()
 
-        condition = res.register(self.expr())
+        condition = res.register((yield self.expr()))
         if res.error:
             return res
 
-        self.allow_zero_or_more_new_lines(res)
+        self.allow_zero_or_more_new_lines()
 
-        if not self.current_tok.matches(KeywordToken("THEN")):
+        if not self.matches_keyword("THEN"):
             return res.failure(InvalidSyntaxError(
-                self.current_tok.start_position, self.current_tok.end_position,
+                self.tok_start, self.tok_end,
                 "Expected 'THEN'"
             ))
-        res.register_advancement()
         self.advance()
-        self.allow_zero_or_more_new_lines(res)
+        self.allow_zero_or_more_new_lines()
 
-        body = res.register(self.statements())
+        body = res.register((yield self.statements()))
 
         if res.error:
             return res
 
         cases.append((condition, body, False))
-        self.allow_zero_or_more_new_lines(res)
-        while self.current_tok.matches(KeywordToken("ELIF")):
-            res.register_advancement()
+        self.allow_zero_or_more_new_lines()
+        while self.matches_keyword("ELIF"):
             self.advance()
 
-            condition = res.register(self.expr())
+            condition = res.register((yield self.expr()))
             if res.error:
                 return res
 
-            self.allow_zero_or_more_new_lines(res)
+            self.allow_zero_or_more_new_lines()
 
-            if not self.current_tok.matches(KeywordToken("THEN")):
+            if not self.matches_keyword("THEN"):
                 return res.failure(InvalidSyntaxError(
-                    self.current_tok.start_position, self.current_tok.end_position,
+                    self.tok_start, self.tok_end,
                     "Expected 'THEN'"
                 ))
 
-            res.register_advancement()
             self.advance()
-            self.allow_zero_or_more_new_lines(res)
+            self.allow_zero_or_more_new_lines()
 
-            body = res.register(self.statements())
+            body = res.register((yield self.statements()))
 
             if res.error:
                 return res
-            
+
             cases.append((condition, body, False))
 
-        if self.current_tok.matches(KeywordToken("ELSE")):
-            res.register_advancement()
+        if self.matches_keyword("ELSE"):
             self.advance()
-            self.allow_zero_or_more_new_lines(res)
+            self.allow_zero_or_more_new_lines()
 
-            body = res.register(self.statements())
+            body = res.register((yield self.statements()))
             if res.error:
                 return res
-            
+
             else_case = (body, False)
-            self.allow_zero_or_more_new_lines(res)
+            self.allow_zero_or_more_new_lines()
 
-        if not self.current_tok.matches(KeywordToken("ENDIF")):
+        if not self.matches_keyword("ENDIF"):
             return res.failure(InvalidSyntaxError(
-                self.current_tok.start_position, self.current_tok.end_position,
+                self.tok_start, self.tok_end,
                 "Expected 'ENDIF'"
             ))
 
 
-        res.register_advancement()
         self.advance()
 
         return res.success(IfNode(cases, else_case))
@@ -511,111 +559,101 @@ class Parser:
         res = ParseResult()
         cases = []
 
-        if not self.current_tok.matches(KeywordToken("CASE")):
+        if not self.matches_keyword("CASE"):
             return res.failure(InvalidSyntaxError(
-                self.current_tok.start_position, self.current_tok.end_position,
+                self.tok_start, self.tok_end,
                 "Expected 'CASE'"
             ))
 
-        res.register_advancement()
         self.advance()
 
-        if not self.current_tok.matches(KeywordToken("OF")):
+        if not self.matches_keyword("OF"):
             return res.failure(InvalidSyntaxError(
-                self.current_tok.start_position, self.current_tok.end_position,
+                self.tok_start, self.tok_end,
                 "Expected 'OF'"
             ))
 
-        res.register_advancement()
         self.advance()
 
-        if self.current_tok.__class__.__name__ != "IdentifierToken":
+        if self.tok_kind != TokenKind.IDENTIFIER:
             return res.failure(InvalidSyntaxError(
-                self.current_tok.start_position, self.current_tok.end_position,
+                self.tok_start, self.tok_end,
                 "Expected identifier (variable name)"
             ))
 
-        var_name = self.current_tok
-        res.register_advancement()
+        var_name = self.token()
         self.advance()
-        self.allow_zero_or_more_new_lines(res)
+        self.allow_zero_or_more_new_lines()
 
         if res.error:
             return res
 
-        if self.current_tok.__class__.__name__ == "KeywordToken" and self.current_tok.value in ["ENDCASE", "OTHERWISE"]:
+        if self.tok_kind == TokenKind.KEYWORD and self.tok_value in ["ENDCASE", "OTHERWISE"]:
             return res.failure(InvalidSyntaxError(
-                self.current_tok.start_position, self.current_tok.end_position,
-                f"Expected case before {self.current_tok.value}"
+                self.tok_start, self.tok_end,
+                f"Expected case before {self.tok_value}"
             ))
 
-        while self.current_tok.__class__.__name__ != "IdentifierToken" and self.current_tok.value not in ["ENDCASE", "OTHERWISE"]:
-            value = res.register(self.expr())
+        while self.tok_kind != TokenKind.IDENTIFIER and self.tok_value not in ["ENDCASE", "OTHERWISE"]:
+            value = res.register((yield self.expr()))
             if res.error:
                 return res
-                
-            if self.current_tok.__class__.__name__ != "ColonToken":
+
+            if self.tok_kind != TokenKind.COLON:
                 return res.failure(InvalidSyntaxError(
-                    self.current_tok.start_position, self.current_tok.end_position,
+                    self.tok_start, self.tok_end,
                     "Expected colon"
                 ))
 
-            res.register_advancement() 
             self.advance()
 
-            response = res.register(self.statement())
+            response = res.register((yield self.statement()))
             if res.error:
                 return res
 
-            res.register_advancement()
             self.advance()
-            self.allow_zero_or_more_new_lines(res)
+            self.allow_zero_or_more_new_lines()
 
             cases.append((value, response, False))
 
-        self.allow_zero_or_more_new_lines(res)
+        self.allow_zero_or_more_new_lines()
 
-        if self.current_tok.matches(KeywordToken("ENDCASE")):
-            res.register_advancement()
+        if self.matches_keyword("ENDCASE"):
             self.advance()
 
             return res.success(CaseNode(var_name, cases, None))
 
-        elif self.current_tok.matches(KeywordToken("OTHERWISE")):
-            res.register_advancement() 
+        elif self.matches_keyword("OTHERWISE"):
             self.advance()
 
-            if self.current_tok.__class__.__name__ != "ColonToken":
+            if self.tok_kind != TokenKind.COLON:
                 return res.failure(InvalidSyntaxError(
-                    self.current_tok.start_position, self.current_tok.end_position,
+                    self.tok_start, self.tok_end,
                     "Expected colon"
                 ))
 
-            res.register_advancement() 
             self.advance()
 
-            response = res.register(self.statement())
+            response = res.register((yield self.statement()))
             if res.error:
                 return res
-            
-            res.register_advancement()
+
             self.advance()
-            self.allow_zero_or_more_new_lines(res)
+            self.allow_zero_or_more_new_lines()
 
-            if not self.current_tok.matches(KeywordToken("ENDCASE")):
+            if not self.matches_keyword("ENDCASE"):
                 return res.failure(InvalidSyntaxError(
-                    self.current_tok.start_position, self.current_tok.end_position,
+                    self.tok_start, self.tok_end,
                     "Expected 'ENDCASE'"
                 ))
 
-            res.register_advancement()
             self.advance()
 
             return res.success(CaseNode(var_name, cases, (response, False)))
-        
+
         else:
             return res.failure(InvalidSyntaxError(
-                self.current_tok.start_position, self.current_tok.end_position,
+                self.tok_start, self.tok_end,
                 "Expected case, 'OTHERWISE' or 'ENDCASE'"
             ))
 
@@ -623,86 +661,78 @@ class Parser:
     def for_expr(self):
         res = ParseResult()
 
-        if not self.current_tok.matches(KeywordToken("FOR")):
+        if not self.matches_keyword("FOR"):
             return res.failure(InvalidSyntaxError(
-                self.current_tok.start_position, self.current_tok.end_position,
+                self.tok_start, self.tok_end,
                 "Expected 'FOR'"
             ))
 
-        res.register_advancement()
         self.advance()
 
-        if self.current_tok.__class__.__name__ != "IdentifierToken":
+        if self.tok_kind != TokenKind.IDENTIFIER:
             return res.failure(InvalidSyntaxError(
-                self.current_tok.start_position, self.current_tok.end_position,
+                self.tok_start, self.tok_end,
                 "Expected identifier (variable name)"
             ))
 
-        var_name = self.current_tok
-        res.register_advancement()
+        var_name = self.token()
         self.advance()
 
-        if self.current_tok.__class__.__name__ != "AssignmentToken":
+        if self.tok_kind != TokenKind.ASSIGNMENT:
             return res.failure(InvalidSyntaxError(
-                self.current_tok.start_position, self.current_tok.end_position,
+                self.tok_start, self.tok_end,
                 "Expected '<-'"
             ))
 
-        res.register_advancement()
         self.advance()
 
-        start_value = res.register(self.expr())
+        start_value = res.register((yield self.expr()))
         if res.error:
             return res
 
-        if not self.current_tok.matches(KeywordToken('TO')):
+        if not self.matches_keyword("TO"):
             return res.failure(InvalidSyntaxError(
-                self.current_tok.start_position, self.current_tok.end_position,
+                self.tok_start, self.tok_end,
                 "Expected 'TO'"
             ))
 
-        res.register_advancement()
         self.advance()
 
-        end_value = res.register(self.expr())
+        end_value = res.register((yield self.expr()))
         if res.error:
             return res
 
-        if self.current_tok.matches(KeywordToken('STEP')):
-            res.register_advancement()
+        if self.matches_keyword("STEP"):
             self.advance()
 
-            step_value = res.register(self.expr())
+            step_value = res.register((yield self.expr()))
             if res.error:
                 return res
 
         else:
             step_value = None
 
-        res.register_advancement()
         self.advance()
-        self.allow_zero_or_more_new_lines(res)
+        self.allow_zero_or_more_new_lines()
 
-        body = res.register(self.statements())
+        body = res.register((yield self.statements()))
         if res.error:
             return res
-        
-        if not self.current_tok.matches(KeywordToken('NEXT')):
+
+        if not self.matches_keyword("NEXT"):
             return res.failure(InvalidSyntaxError(
-                self.current_tok.start_position, self.current_tok.end_position,
+                self.tok_start, self.tok_end,
                 "Expected 'NEXT'"
             ))
 
-        res.register_advancement()
         self.advance()
 
-        if not self.current_tok.matches(var_name):
+        if not self.matches(var_name):
             return res.failure(InvalidSyntaxError(
-                self.current_tok.start_position, self.current_tok.end_position,
+                self.tok_start, self.tok_end,
                 f"Expected '{var_name.value}'"
             ))
 
-        res.register_advancement()
         self.advance()
 
         return res.success(ForNode(var_name, start_value, end_value, step_value, body, True))
@@ -710,33 +740,30 @@ class Parser:
     def while_expr(self):
         res = ParseResult()
 
-        if not self.current_tok.matches(KeywordToken("WHILE")):
+        if not self.matches_keyword("WHILE"):
             return res.failure(InvalidSyntaxError(
-                self.current_tok.start_position, self.current_tok.end_position,
+                self.tok_start, self.tok_end,
                 "Expected 'WHILE'"
             ))
 
-        res.register_advancement()
         self.advance()
 
-        condition = res.register(self.expr())
+        condition = res.register((yield self.expr()))
         if res.error:
             return res
 
-        res.register_advancement()
         self.advance()
-        self.allow_zero_or_more_new_lines(res)
+        self.allow_zero_or_more_new_lines()
 
-        body = res.register(self.statements())
+        body = res.register((yield self.statements()))
         if res.error:
             return res
 
-        if not self.current_tok.matches(KeywordToken("ENDWHILE")):
+        if not self.matches_keyword("ENDWHILE"):
             return res.failure(InvalidSyntaxError(
-                self.current_tok.start_position, self.current_tok.end_position,
+                self.tok_start, self.tok_end,
                 "Expected 'ENDWHILE'"
             ))
-        res.register_advancement()
         self.advance()
 
         return res.success(WhileNode(condition, body, True))
@@ -744,34 +771,31 @@ class Parser:
     def repeat_expr(self):
         res = ParseResult()
 
-        if not self.current_tok.matches(KeywordToken("REPEAT")):
+        if not self.matches_keyword("REPEAT"):
             return res.failure(InvalidSyntaxError(
-                self.current_tok.start_position, self.current_tok.end_position,
+                self.tok_start, self.tok_end,
                 "Expected 'REPEAT'"
             ))
 
-        res.register_advancement()
         self.advance()
-        self.allow_zero_or_more_new_lines(res)
+        self.allow_zero_or_more_new_lines()
 
-        body = res.register(self.statements())
+        body = res.register((yield self.statements()))
         if res.error:
             return res
 
-        if not self.current_tok.matches(KeywordToken("UNTIL")):
+        if not self.matches_keyword("UNTIL"):
             return res.failure(InvalidSyntaxError(
-                self.current_tok.start_position, self.current_tok.end_position,
+                self.tok_start, self.tok_end,
                 "Expected 'UNTIL'"
             ))
-            
-        res.register_advancement()
+
         self.advance()
 
-        condition = res.register(self.expr())
+        condition = res.register((yield self.expr()))
         if res.error:
             return res
 
-        res.register_advancement()
         self.advance()
 
         return res.success(RepeatNode(condition, body, True))
@@ -779,130 +803,100 @@ class Parser:
     def func_def(self):
         res = ParseResult()
 
-        if not self.current_tok.matches(KeywordToken("FUNCTION")):
+        if not self.matches_keyword("FUNCTION"):
             return res.failure(InvalidSyntaxError(
-                self.current_tok.start_position, self.current_tok.end_position,
+                self.tok_start, self.tok_end,
                 "Expected 'function' keyword"
             ))
 
-        res.register_advancement()
         self.advance()
 
-        if self.current_tok.__class__.__name__ == "IdentifierToken":
-            var_name_tok = self.current_tok
-            res.register_advancement()
+        if self.tok_kind == TokenKind.IDENTIFIER:
+            var_name_tok = self.token()
             self.advance()
-            if self.current_tok.__class__.__name__ != "LParenToken":
+            if self.tok_kind != TokenKind.L_PAREN:
                 return res.failure(InvalidSyntaxError(
-                    self.current_tok.start_position, self.current_tok.end_position,
+                    self.tok_start, self.tok_end,
                     "Expected '('"
                 ))
 
         else:
             var_name_tok = None
-            if self.current_tok.__class__.__name__ != "LParenToken":
+            if self.tok_kind != TokenKind.L_PAREN:
                 return res.failure(InvalidSyntaxError(
-                    self.current_tok.start_position, self.current_tok.end_position,
+                    self.tok_start, self.tok_end,
                     "Expected identifier or '('"
                 ))
 
-        res.register_advancement()
         self.advance()
         arg_name_toks = []
 
-        if self.current_tok.__class__.__name__ == "IdentifierToken":
-            arg_name_toks.append(self.current_tok)
-            res.register_advancement()
+        if self.tok_kind == TokenKind.IDENTIFIER:
+            arg_name_toks.append(self.token())
             self.advance()
 
-            while self.current_tok.__class__.__name__ == "CommaToken":
-                res.register_advancement()
+            while self.tok_kind == TokenKind.COMMA:
                 self.advance()
 
-                if self.current_tok.__class__.__name__ != "IdentifierToken":
+                if self.tok_kind != TokenKind.IDENTIFIER:
                     return res.failure(InvalidSyntaxError(
-                        self.current_tok.start_position, self.current_tok.end_position,
+                        self.tok_start, self.tok_end,
                         "Expected identifier"
                     ))
 
-                arg_name_toks.append(self.current_tok)
-                res.register_advancement()
+                arg_name_toks.append(self.token())
                 self.advance()
 
-            if self.current_tok.__class__.__name__ != "RParenToken":
+            if self.tok_kind != TokenKind.R_PAREN:
                 return res.failure(InvalidSyntaxError(
-                    self.current_tok.start_position, self.current_tok.end_position,
+                    self.tok_start, self.tok_end,
                     "Expected ',' or ')'"
                 ))
 
         else:
-            if self.current_tok.__class__.__name__ != "RParenToken":
+            if self.tok_kind != TokenKind.R_PAREN:
                 return res.failure(InvalidSyntaxError(
-                    self.current_tok.start_position, self.current_tok.end_position,
+                    self.tok_start, self.tok_end,
                     "Expected ',' or ')'"
                 ))
 
-        res.register_advancement()
         self.advance()
-        if self.current_tok.__class__.__name__ == "ArrowToken":
-            res.register_advancement()
+        if self.tok_kind == TokenKind.ARROW:
             self.advance()
 
-            node_to_return = res.register(self.expr())
+            node_to_return = res.register((yield self.expr()))
             if res.error:
                 return res
 
             return res.success(FuncDefNode(var_name_tok, arg_name_toks, node_to_return, True))
 
         else:
-            self.allow_zero_or_more_new_lines(res)
-            if self.current_tok.__class__.__name__ != "LCurlyToken":
+            self.allow_zero_or_more_new_lines()
+            if self.tok_kind != TokenKind.L_CURLY:
                 return res.failure(InvalidSyntaxError(
-                    self.current_tok.start_position, self.current_tok.end_position,
+                    self.tok_start, self.tok_end,
                     "Expected '=>' or '{'"
                 ))
 
-            res.register_advancement()
             self.advance()
-            self.allow_zero_or_more_new_lines(res)
+            self.allow_zero_or_more_new_lines()
 
-            body = res.register(self.statements())
+            body = res.register((yield self.statements()))
             if res.error:
                 return res
 
-            if self.current_tok.__class__.__name__ != "RCurlyToken":
+            if self.tok_kind != TokenKind.R_CURLY:
                 return res.failure(InvalidSyntaxError(
-                    self.current_tok.start_position, self.current_tok.end_position,
+                    self.tok_start, self.tok_end,
                     "Expected '}'"
                 ))
 
-            res.register_advancement()
             self.advance()
             return res.success(FuncDefNode(var_name_tok, arg_name_toks, body, False))
 
-    def bin_op(self, func: Callable, ops: List[Union[str, Tuple[str, str]]], func2: Callable = None):
-        if not func2:
-            func2 = func
-        res = ParseResult()
-        left = res.register(func())
-        if res.error:
-            return res
-
-        while self.current_tok.__class__.__name__ in ops or (self.current_tok.__class__.__name__, self.current_tok.value) in ops:
-            op_tok = self.current_tok
-            res.register_advancement()
-            self.advance()
-            right = res.register(func2())
-            if res.error:
-                return res
-            left = BinOpNode(left, op_tok, right)
-
-        return res.success(left)
-
-    def allow_zero_or_more_new_lines(self, res):
+    def allow_zero_or_more_new_lines(self):
         count = 0
-        while self.current_tok.__class__.__name__ == "NewlineToken":
-            res.register_advancement()
+        while self.tok_kind == TokenKind.NEWLINE:
             self.advance()
             count += 1
 
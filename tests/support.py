@@ -0,0 +1,20 @@
+import contextlib
+import io
+import sys
+from src.executor import PSCodeExecutor
+from src.lexer import Source
+
+
+# What running code with an executor built from options prints, its error included, with inputs as
+# what INPUT reads
+def run_program(code: str, inputs: str = "", **options):
+    executor = PSCodeExecutor(**options)
+    output = io.StringIO()
+    stdin = sys.stdin
+    sys.stdin = io.StringIO(inputs)
+    try:
+        with contextlib.redirect_stdout(output):
+            executor.execute_source(Source("test.psc", code), [])
+    finally:
+        sys.stdin = stdin
+    return output.getvalue()
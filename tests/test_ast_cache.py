@@ -0,0 +1,36 @@
+import contextlib
+import io
+from src.executor import PSCodeExecutor, ASTCache
+from src.lexer import Source
+
+
+def run_cached(source: Source, cache: ASTCache):
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        PSCodeExecutor(ast_cache=cache).execute_source(source, [])
+    return output.getvalue()
+
+
+# Pickles failing with ValueError for an unknown protocol or extension code, and with TypeError for
+# calling something that is not callable
+BROKEN_PICKLES = [b"\x80\x09.", b"\x82\x05.", b"I1\n)R."]
+
+
+# A cache file cut short anywhere, or holding bytes that are no pickle, is parsed again and rewritten
+def test_corrupted_cache_is_a_miss(tmp_path):
+    source = Source(str(tmp_path / "program.psc"), 'x <- [1, "two"]\nOUTPUT STRING(x[0] + 2), x[1]\n')
+    cache = ASTCache()
+    expected = run_cached(source, cache)
+    path = cache.path_for(source.filename)
+    with open(path, "rb") as file:
+        data = file.read()
+    header = cache.header(source)
+
+    corruptions = [data[:end] for end in range(len(header), len(data))]
+    corruptions += [header + broken for broken in BROKEN_PICKLES]
+    for corruption in corruptions:
+        with open(path, "wb") as file:
+            file.write(corruption)
+        assert cache.load(source) is None
+        assert run_cached(source, cache) == expected
+        assert cache.load(source) is not None
@@ -0,0 +1,43 @@
+from src.lexer import Source, TableLexer
+from src.parser import Parser
+from src.parser.nodes import CallNode, child_slots
+from .support import run_program
+
+# Every engine, as the keyword arguments of the executor that runs it
+ENGINES = [
+    {}, {"explicit_stack": True}, {"engine": "closure"}, {"engine": "raising"}, {"engine": "vm"},
+    {"engine": "python"},
+]
+
+
+def test_not_leaves_its_operand_alone():
+    code = 'l <- [TRUE]\nOUTPUT NOT l[0]\nOUTPUT l[0]\nx <- TRUE\nOUTPUT NOT x\nOUTPUT x\nOUTPUT NOT NOT l[0]\n'
+    for options in ENGINES:
+        assert run_program(code, **options).split() == ["FALSE", "TRUE", "FALSE", "TRUE", "TRUE"], options
+
+
+# A call a function makes to itself in a RETURN in an IF branch is a tail call, and is run in the frame
+# of its caller, so recursing far deeper than Python could still works
+def test_return_in_if_branch_is_a_tail_call():
+    code = ('FUNCTION count(n, s) {\nIF n = 0 THEN\nRETURN s\nENDIF\nIF n > 0 THEN\nRETURN count(n - 1, s + 1)\n'
+            'ENDIF\nRETURN -1 }\n')
+    source = Source("test.psc", code)
+    tokens, error = TableLexer(source, *source.content_bounds(0)).lex_buffer()
+    parser = Parser()
+    parser.initialize(tokens)
+    res = parser.parse()
+    assert error is None and res.error is None
+    calls = []
+    stack = [res.node]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, (list, tuple)):
+            stack.extend(obj)
+        elif child_slots(type(obj)) is not None:
+            if isinstance(obj, CallNode):
+                calls.append(obj)
+            stack.extend(getattr(obj, name) for name in child_slots(type(obj)))
+    assert [call.is_tail_call for call in calls] == [True]
+
+    for options in ENGINES:
+        assert run_program(code + 'OUTPUT STRING(count(20000, 0))\n', **options) == "20000\n", options
@@ -0,0 +1,13 @@
+from .support import run_program
+
+# Operators whose operand types the value methods don't handle, which have to fail at run time only
+UNHANDLED_OPERATIONS = ['"a" ** 2', 'TRUE ** 2', '[1, 2] ** 2', '2 ** "a"']
+
+
+def test_unhandled_operation_in_dead_code_is_not_folded():
+    for operation in UNHANDLED_OPERATIONS:
+        code = f'OUTPUT "before"\nIF FALSE THEN\nx <- {operation}\nENDIF\nOUTPUT "after"\n'
+        optimized = run_program(code)
+        assert optimized == run_program(code, optimize=False)
+        assert optimized.split() == ["before", "after"]
+
@@ -0,0 +1,28 @@
+from .support import run_program
+
+
+def test_runtime_error_underlines_the_failing_node():
+    code = 'x <- 0\nIF TRUE THEN\n    OUTPUT 1 / x\nENDIF\n'
+    output = run_program(code, engine="python")
+    assert output == run_program(code)
+    assert output == (
+        "Traceback (most recent call last):\n"
+        "  File test.psc, line 3, in <main>\n"
+        "    OUTPUT 1 / x\n"
+        "    -------~~~~~\n"
+        "pscode > ERROR: Runtime Error\n"
+        "Division by zero.\n"
+    )
+
+
+# A float power too large to represent raises OverflowError in the generated code, which the source map
+# places at the whole assignment it came from
+def test_python_exception_underlines_the_statement_it_came_from():
+    code = 'x <- 400\nIF TRUE THEN\n    y <- 10 ** x\nENDIF\n'
+    assert run_program(code, engine="python").splitlines()[:-1] == [
+        "Traceback (most recent call last):",
+        "  File test.psc, line 3, in <main>",
+        "    y <- 10 ** x",
+        "    ~~~~~~~~~~~~",
+        "pscode > ERROR: OverflowError",
+    ]
@@ -0,0 +1,26 @@
+from .support import run_program
+
+# Loops of every kind with a BREAK in the middle of their body
+BREAK_PROGRAMS = [
+    'FOR i <- 1 TO 3\nIF i = 2 THEN\nBREAK\nENDIF\nOUTPUT STRING(i)\nNEXT i\nOUTPUT "done"\n',
+    'i <- 0\nWHILE i < 3\ni <- i + 1\nIF i = 2 THEN\nBREAK\nENDIF\nOUTPUT STRING(i)\nENDWHILE\nOUTPUT "done"\n',
+    'i <- 0\nREPEAT\ni <- i + 1\nIF i = 2 THEN\nBREAK\nENDIF\nOUTPUT STRING(i)\nUNTIL i = 3\n\nOUTPUT "done"\n',
+]
+
+
+def test_break_leaves_the_loop():
+    for code in BREAK_PROGRAMS:
+        assert run_program(code, engine="raising").split() == ["1", "done"]
+
+
+def test_break_leaves_only_the_innermost_loop():
+    code = 'FOR i <- 1 TO 2\nFOR j <- 1 TO 3\nIF j = 2 THEN\nBREAK\nENDIF\nOUTPUT STRING(i * 10 + j)\nNEXT j\nNEXT i\n'
+    assert run_program(code, engine="raising").split() == ["11", "21"]
+
+
+def test_continue_goes_on_with_the_next_iteration():
+    for code in BREAK_PROGRAMS:
+        code = code.replace("BREAK", "CONTINUE")
+        output = run_program(code, engine="raising")
+        assert output == run_program(code)
+        assert output.split() == ["1", "3", "done"]
@@ -0,0 +1,115 @@
+import pathlib
+import random
+from src.lexer import Source, TableLexer, TokenStream
+from src.parser import Parser, StackParser
+
+EXAMPLES = pathlib.Path(__file__).resolve().parent.parent / "ps-examples"
+
+# Programs between them using every rule of the grammar
+PROGRAMS = [
+    'x <- 1 + 2 * 3 - 4 / 5 // 6 MOD 7 ** 2\nOUTPUT STRING(x), -x, +x, NOT TRUE\n',
+    'a <- (1 < 2) AND (2 > 1) OR 1 <= 2 AND 2 >= 1 OR 1 = 1 AND 1 <> 2\n',
+    'l <- [1, 2.5, "s", [TRUE, NULL], []]\nOUTPUT l[1], l[a + 1]\n',
+    'IF x = 1 THEN\nOUTPUT "one"\nELIF x = 2 THEN\nOUTPUT "two"\nELSE\nOUTPUT "other"\nENDIF\n',
+    'IF x THEN CONTINUE ENDIF\nIF x THEN\nOUTPUT 1\nENDIF\n',
+    'CASE OF x\n1 : OUTPUT "one"\n0 : OUTPUT "zero"\nOTHERWISE : OUTPUT "other"\nENDCASE\n',
+    'CASE OF k\n  0: OUTPUT "zero"\nENDCASE\n',
+    'FOR i <- 1 TO 7 STEP 2\nIF i = 5 THEN\nBREAK\nENDIF\nOUTPUT STRING(i)\nNEXT i\n',
+    'FOR j <- -3 TO 0\nOUTPUT j\nNEXT j\n',
+    'x <- 0\nWHILE x < 5\nx <- x + 1\nIF x = 2 THEN\nCONTINUE\nENDIF\nENDWHILE\n',
+    'REPEAT\nx <- x - 1\nUNTIL x <= 1\n\nOUTPUT x\n',
+    'FUNCTION f(a, b) => a + b\nOUTPUT STRING(f(1, 2))\ng <- FUNCTION () => 1\nOUTPUT g()\n',
+    'FUNCTION acc(n, s) {\nIF n = 0 THEN\nRETURN s\nENDIF\nRETURN acc(n - 1, s + n) }\nOUTPUT STRING(acc(50, 0))\n',
+    'FUNCTION outer() {\n  x <- 20\n  FUNCTION inner(m) => "inner" + STRING(m)\n  RETURN inner(x) }\n',
+    'INPUT name\nOUTPUT "hi " + name; RETURN\n',
+    'y <- FOR i <- 1 TO 3\ni * 2\nNEXT i\nz <- WHILE FALSE\n1\nENDWHILE\n',
+    '((((((1 + 2) * 3) - 4) / 5) // 6) MOD 7)\n',
+    '\n\n  OUTPUT 1 ; OUTPUT 2\n\n',
+]
+
+# Pieces of programs, joined at random into code that mostly fails to parse
+FRAGMENTS = [
+    "a", "b", "1", "2.5", '"s"', "TRUE", "NULL", "+", "-", "*", "/", "//", "MOD", "**", "=", "<>", "<", ">",
+    "<=", ">=", "AND", "OR", "NOT", "(", ")", "[", "]", ",", ":", "f", "<-", "x", "FUNCTION", "=>", "IF",
+    "THEN", "ELIF", "ELSE", "ENDIF", "CASE", "OF", "OTHERWISE", "ENDCASE", "RETURN", "OUTPUT", "CONTINUE",
+    "BREAK", "INPUT", "WHILE", "ENDWHILE", "FOR", "TO", "STEP", "NEXT", "REPEAT", "UNTIL", "{", "}", "\n",
+    "\n", ";",
+]
+
+
+# A tree, or a token in it, as plain values two trees can be compared by
+def shape(obj: any):
+    if isinstance(obj, (list, tuple)):
+        return tuple(shape(item) for item in obj)
+    names = [name for klass in type(obj).__mro__ for name in getattr(klass, "__slots__", ())]
+    if not names:
+        return obj
+    return (type(obj).__name__,) + tuple(shape(getattr(obj, name, None)) for name in names)
+
+
+# What parsing code with a parser of parser_class gives, the tree or the error, lexing what the executor
+# would into a TokenBuffer, or into a TokenStream when stream is set
+def parse(parser_class: type, code: str, stream: bool = False):
+    source = Source("test.psc", code)
+    lexer = TableLexer(source, *source.content_bounds(0))
+    if stream:
+        tokens = TokenStream(lexer.stream())
+    else:
+        tokens, error = lexer.lex_buffer()
+        assert error is None, code
+    parser = parser_class()
+    parser.initialize(tokens)
+    try:
+        res = parser.parse()
+    except Exception as exception:
+        return type(exception)
+    if res.error:
+        error = res.error
+        return type(error), error.start_position, error.end_position, error.error_message
+    return shape(res.node)
+
+
+# A random expression nesting operators, calls, indexing and lists up to depth deep
+def expression(rng: random.Random, depth: int = 0):
+    roll = rng.random()
+    if depth > 4 or roll < 0.3:
+        return rng.choice(["a", "1", "2.5", '"s"', "TRUE", "f(a, 2)", "f()", "l[1]", "(a)", "[1, 2]"])
+    if roll < 0.45:
+        return rng.choice(["-", "+", "NOT "]) + expression(rng, depth + 1)
+    if roll < 0.55:
+        return "(" + expression(rng, depth + 1) + ")"
+    if roll < 0.6:
+        return "[" + expression(rng, depth + 1) + ", " + expression(rng, depth + 1) + "]"
+    operator = rng.choice(["+", "-", "*", "/", "//", "MOD", "**", "=", "<>", "<", ">", "<=", ">=", "AND", "OR"])
+    return expression(rng, depth + 1) + " " + operator + " " + expression(rng, depth + 1)
+
+
+def corpus():
+    programs = PROGRAMS + [path.read_text() for path in sorted(EXAMPLES.glob("*.psc"))]
+    # Every program cut short after each of its lines, which leaves most blocks unclosed
+    for code in programs:
+        yield code
+        lines = code.splitlines(keepends=True)
+        for end in range(1, len(lines)):
+            yield "".join(lines[:end])
+
+    rng = random.Random(2024)
+    for _ in range(3000):
+        yield " ".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 12)))
+        yield "x <- " + expression(rng)
+
+
+def test_programs_parse():
+    for code in PROGRAMS:
+        assert type(parse(Parser, code)[0]) is str, code
+
+
+def test_stack_parser_matches_parser():
+    for code in corpus():
+        assert parse(StackParser, code) == parse(Parser, code), code
+
+
+# The parser reads a TokenBuffer from its arrays and anything else a token at a time
+def test_token_stream_matches_token_buffer():
+    for code in corpus():
+        assert parse(Parser, code, stream=True) == parse(Parser, code), code
@@ -0,0 +1,39 @@
+import random
+from src.lexer import Lexer, TableLexer, Source
+
+# Pieces of source the random programs are made of, including ones that run into each other when joined
+# and characters neither lexer accepts
+FRAGMENTS = [
+    " ", "  ", "\t", "\n", ";", "0", "7", "42", "3.", ".5", "1.25", "x", "total", "a_1", "Dice", "MOD",
+    "OUTPUT", "IF", "THEN", "ENDIF", "FOR", "TO", "STEP", "NEXT", "FUNCTION", "RETURN", "TRUE", "AND",
+    '"text"', '"a\\"b"', '"tab\\tnew\\nline"', '"\\\\"', '""', '"open', "=", "=>", "<", "<=", "<>", "<-",
+    ">", ">=", "*", "**", "/", "//", "+", "-", "%", ",", ":", "(", ")", "[", "]", "{", "}", "!", "_", "&",
+]
+
+
+# What lexing code between start and end produces, as plain values both lexers' results can be compared by
+def lex(lexer_class: type, code: str, start: int = 0, end: int = None):
+    try:
+        tokens, error = lexer_class(Source("test.psc", code), start, end).lex_line()
+    except Exception as exception:
+        return type(exception)
+    if error:
+        return type(error), error.position
+    return [(type(token).__name__, token.value, token.start_position, token.end_position) for token in tokens]
+
+
+def test_table_lexer_matches_lexer():
+    assert type(lex(Lexer, 'OUTPUT "x", 1 + y')) is list
+    rng = random.Random(2024)
+    for _ in range(5000):
+        code = "".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 12)))
+        assert lex(TableLexer, code) == lex(Lexer, code), code
+
+
+def test_table_lexer_matches_lexer_on_ranges():
+    rng = random.Random(2025)
+    for _ in range(1000):
+        code = "".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 12)))
+        start = rng.randint(0, len(code))
+        end = rng.randint(start, len(code))
+        assert lex(TableLexer, code, start, end) == lex(Lexer, code, start, end), (code, start, end)
@@ -0,0 +1,22 @@
+from .support import run_program
+
+# Programs whose variables are only ever bound by INPUT, at the top level and in a function
+INPUT_PROGRAMS = [
+    "INPUT x\nOUTPUT x + 1\n",
+    "FUNCTION f() {\nINPUT y\nRETURN y * 2}\nOUTPUT f()\n",
+]
+
+def test_input_binds_a_variable():
+    for code in INPUT_PROGRAMS:
+        output = run_program(code, "41\n", engine="vm")
+        assert output == run_program(code, "41\n")
+        assert "ERROR" not in output
+
+
+# A read in a branch that never runs is no error, and one that does run fails only when it is reached
+def test_undefined_name_fails_when_it_is_read():
+    code = 'OUTPUT "a"\nIF FALSE THEN\nOUTPUT y\nENDIF\nOUTPUT "b"\nOUTPUT z\nOUTPUT "c"\n'
+    output = run_program(code, engine="vm")
+    assert output == run_program(code)
+    assert output.split()[:2] == ["a", "b"]
+    assert output.endswith("'z' is not defined.\n")